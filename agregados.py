@@ -0,0 +1,64 @@
+import streamlit as st
+import pandas as pd
+
+from consultas import versao_dados, particoes
+from arquivo import com_historico
+
+COMPETENCIAS = ["c1", "c2", "c3", "c4", "c5"]
+QUANTIS = [0.1, 0.25, 0.5, 0.75, 0.9]
+_SEGUNDA = 4  # dia 4 desde 1970 (05/01/1970) é uma segunda-feira: início das semanas
+
+# Agregados guardam somas e contagens, nunca médias: a visão "Todas" soma as partições
+# e divide no final, sem voltar às linhas brutas.
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _somas_por_materia(versao: str, _df: pd.DataFrame) -> pd.DataFrame:
+    return _df.groupby("materia")[["acertos", "total"]].sum()
+
+
+def somas_por_materia(df_atividades: pd.DataFrame, df_alunos: pd.DataFrame, id_mentoria: int | None) -> pd.DataFrame:
+    # Histórico completo: os meses arquivados entram pelo resumo, sem voltar às linhas
+    partes = [
+        _somas_por_materia(versao_dados(h), h)
+        for h in map(com_historico, particoes(df_atividades, df_alunos, id_mentoria))
+    ]
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes).groupby(level=0).sum()
+
+
+# --- Faixas de percentis da turma ---
+# Percentis não se somam entre partições: cada frame (partição ou base "Todas") tem o seu cache.
+
+def _percentis(valores: pd.Series) -> pd.DataFrame:
+    if valores.empty:
+        return pd.DataFrame(columns=[f"p{round(q * 100)}" for q in QUANTIS], index=pd.DatetimeIndex([]))
+    faixas = valores.groupby(level=0).quantile(QUANTIS).unstack()
+    faixas.columns = [f"p{round(q * 100)}" for q in QUANTIS]
+    faixas.index = pd.to_datetime(faixas.index, unit="D")
+    return faixas
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _faixas_diarias(versao: str, materias: tuple[str, ...], _df: pd.DataFrame) -> pd.DataFrame:
+    # Rendimento diário de cada aluno (só nos dias com questões) e os percentis entre alunos por dia
+    df = _df[_df["materia"].isin(materias) & _df["data"].notna()]
+    por_dia = df.groupby(["dia", "id_aluno"])[["acertos", "total"]].sum()
+    por_dia = por_dia[por_dia["total"] > 0]
+    return _percentis(por_dia["acertos"] / por_dia["total"] * 100)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _faixas_semanais(versao: str, _df: pd.DataFrame) -> pd.DataFrame:
+    df = _df[_df["data"].notna()]
+    semana = (df["dia"].to_numpy() - _SEGUNDA) // 7 * 7 + _SEGUNDA
+    return _percentis(df.groupby([semana, df["id_aluno"].to_numpy()])["total"].mean())
+
+
+def faixas_diarias(df_atividades: pd.DataFrame, materias) -> pd.DataFrame:
+    return _faixas_diarias(versao_dados(df_atividades), tuple(materias), df_atividades)
+
+
+def faixas_semanais(df_redacoes: pd.DataFrame) -> pd.DataFrame:
+    return _faixas_semanais(versao_dados(df_redacoes), df_redacoes)
@@ -0,0 +1,173 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from arquivo import anterior, com_historico
+from consultas import ORDEM_MATERIAS, versao_dados, assinaturas_por_aluno, alunos_alterados
+from registro import obter_registro
+from instrumentacao import medir
+
+LIMITE_HIATO = 7        # dias sem registrar uma matéria
+LIMITE_CRITICO = 50     # % de acertos de um conteúdo
+STREAK_MINIMO = 3       # sequência que, ao ser interrompida, vira alerta
+_MIN_QUESTOES = 5       # conteúdos com menos questões não entram nos críticos
+
+
+# --- Fatos por aluno (independentes de "hoje") ---
+
+def _fatos_streak(df: pd.DataFrame) -> pd.DataFrame:
+    dias = (
+        pd.DataFrame({"id_aluno": df["id_aluno"].to_numpy(), "dia": df["data"].dt.normalize().to_numpy()})
+        .dropna()
+        .drop_duplicates()
+        .sort_values(["id_aluno", "dia"])
+    )
+    # Blocos de dias consecutivos; o streak atual é o tamanho do último bloco de cada aluno
+    novo_bloco = (dias["dia"].diff() != pd.Timedelta(days=1)) | (dias["id_aluno"].diff() != 0)
+    dias["bloco"] = novo_bloco.cumsum()
+    ultimo = dias.groupby("id_aluno").agg(ultima_data=("dia", "max"), bloco=("bloco", "max"))
+    tamanho = dias.groupby("bloco").size()
+    ultimo["streak_final"] = tamanho.reindex(ultimo["bloco"]).to_numpy()
+    ultimo["inicio_streak"] = ultimo["ultima_data"] - pd.to_timedelta(ultimo["streak_final"] - 1, unit="D")
+    return ultimo.drop(columns="bloco")
+
+
+def _sequencias(df: pd.DataFrame, ids: pd.Index) -> pd.DataFrame:
+    # Sequências contam dias de verdade: saem das linhas quentes, não do resumo dos meses arquivados.
+    # Quem tem o último bloco começando no corte recua um mês arquivado por vez.
+    fatos = _fatos_streak(df[df["id_aluno"].isin(ids)])
+    while (corte := df.attrs.get("corte")) is not None:
+        no_corte = fatos.index[fatos["inicio_streak"] <= pd.Timestamp(corte)]
+        if no_corte.empty or (df := anterior(df)) is None:
+            break
+        fatos.loc[no_corte] = _fatos_streak(df[df["id_aluno"].isin(no_corte)]).loc[no_corte]
+    return fatos.drop(columns="inicio_streak")
+
+
+def _fatos_hiato(df: pd.DataFrame) -> pd.DataFrame:
+    ultimas = (
+        df[df["materia"].isin(ORDEM_MATERIAS)]
+        .groupby(["id_aluno", "materia"])["data"].max()
+        .reset_index()
+        .sort_values(["id_aluno", "data"])
+    )
+    mais_antiga = ultimas.drop_duplicates("id_aluno").set_index("id_aluno")
+    return mais_antiga.rename(columns={"materia": "materia_hiato", "data": "data_hiato"})
+
+
+def _fatos_criticos(df: pd.DataFrame) -> pd.DataFrame:
+    cont = df.groupby(["id_aluno", "materia", "conteudo"])[["acertos", "total"]].sum().reset_index()
+    cont = cont[cont["total"] >= _MIN_QUESTOES]
+    cont["%"] = cont["acertos"] / cont["total"] * 100
+    criticos = cont[cont["%"] < LIMITE_CRITICO].sort_values(["id_aluno", "%"])
+    criticos["rotulo"] = criticos["conteudo"].astype(str) + " (" + criticos["%"].round(0).astype(int).astype(str) + "%)"
+    return criticos.groupby("id_aluno").agg(
+        n_criticos=("rotulo", "size"),
+        piores=("rotulo", lambda r: ", ".join(r.head(3))),
+    )
+
+
+@medir
+def _calcular_fatos(sequencias: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    # Hiato e críticos são agregados: valem sobre o histórico com o resumo dos meses arquivados
+    fatos = sequencias.join(_fatos_hiato(df), how="outer").join(_fatos_criticos(df), how="left")
+    fatos["streak_final"] = fatos["streak_final"].fillna(0).astype(int)
+    fatos["n_criticos"] = fatos["n_criticos"].fillna(0).astype(int)
+    fatos["piores"] = fatos["piores"].fillna("")
+    return fatos
+
+
+# --- Motor ---
+
+class MotorAlertas:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._assinaturas = pd.Series(dtype="uint64")
+        self._fatos = pd.DataFrame()
+        self.versao: str | None = None
+        self.em_andamento: str | None = None
+        self.reavaliados = 0
+
+    def agendar(self, df_atividades: pd.DataFrame, historico: pd.DataFrame) -> None:
+        # `historico` é a versão com o resumo dos meses arquivados; a versão dele cobre as duas
+        versao = versao_dados(historico)
+        with self._trava:
+            if versao in (self.versao, self.em_andamento):
+                return
+            self.em_andamento = versao
+        threading.Thread(target=self._processar, args=(versao, df_atividades, historico), daemon=True).start()
+
+    def _processar(self, versao: str, df_atividades: pd.DataFrame, historico: pd.DataFrame) -> None:
+        try:
+            assinaturas = assinaturas_por_aluno(historico, ["data", "materia", "conteudo", "acertos", "total"])
+            alterados, removidos = alunos_alterados(self._assinaturas, assinaturas)
+            # Só os alunos com linhas novas, editadas ou removidas são reavaliados
+            novos = _calcular_fatos(
+                _sequencias(df_atividades, alterados), historico[historico["id_aluno"].isin(alterados)]
+            )
+            fatos = self._fatos.drop(index=alterados.union(removidos), errors="ignore")
+            fatos = pd.concat([fatos, novos]) if not fatos.empty else novos
+            with self._trava:
+                self._assinaturas, self._fatos = assinaturas, fatos
+                self.versao, self.reavaliados = versao, len(alterados)
+        finally:
+            with self._trava:
+                if self.em_andamento == versao:
+                    self.em_andamento = None
+
+    def resumo(self, hoje: datetime) -> pd.DataFrame:
+        with self._trava:
+            fatos = self._fatos.copy()
+        if fatos.empty:
+            return fatos
+        hoje = pd.Timestamp(hoje).normalize()
+        fatos["hiato_dias"] = (hoje - fatos["data_hiato"].dt.normalize()).dt.days
+        inativo = (hoje - fatos["ultima_data"]).dt.days
+        fatos["streak"] = np.where(inativo <= 1, fatos["streak_final"], 0)
+        fatos["streak_quebrado"] = (inativo > 1) & (fatos["streak_final"] >= STREAK_MINIMO)
+
+        fatos["prioridade"] = (
+            (fatos["hiato_dias"] - LIMITE_HIATO).clip(lower=0).fillna(0)
+            + 5 * fatos["streak_quebrado"]
+            + 3 * fatos["n_criticos"]
+        )
+        atencao = (fatos["hiato_dias"] > LIMITE_HIATO) | fatos["streak_quebrado"] | (fatos["n_criticos"] > 0)
+        return fatos[atencao].sort_values("prioridade", ascending=False)
+
+
+@st.cache_resource(show_spinner=False)
+def _motor() -> MotorAlertas:
+    return MotorAlertas()
+
+
+def render_painel_alertas(df_alunos: pd.DataFrame, df_atividades: pd.DataFrame, limite: int = 10) -> None:
+    motor = _motor()
+    # Hiato e críticos olham o histórico inteiro; meses arquivados entram pelo resumo
+    motor.agendar(df_atividades, com_historico(df_atividades))
+
+    with st.sidebar.expander("🔔 Alertas da Turma"):
+        if motor.versao is None:
+            st.caption("Calculando alertas...")
+            return
+        resumo = motor.resumo(datetime.now())
+        if motor.em_andamento:
+            st.caption("Atualizando com os dados mais recentes...")
+        if resumo.empty:
+            st.success("Nenhum mentorado precisa de atenção agora.")
+            return
+
+        registro = obter_registro(df_alunos)
+        st.caption(f"{len(resumo)} mentorados precisam de atenção • {motor.reavaliados} reavaliados na última carga")
+        tabela = pd.DataFrame({
+            "Aluno": registro.nomes(resumo.index.to_numpy()),
+            "Hiato": [
+                f"{m} ({int(d)}d)" if d > LIMITE_HIATO else ""
+                for m, d in zip(resumo["materia_hiato"], resumo["hiato_dias"].fillna(0))
+            ],
+            "Streak": np.where(resumo["streak_quebrado"], "quebrado (" + resumo["streak_final"].astype(str) + "d)", ""),
+            "Críticos": resumo["piores"].to_numpy(),
+        })
+        st.dataframe(tabela.head(limite), hide_index=True, width="stretch")
@@ -1,13 +1,36 @@
+import importlib
+import threading
+
 import streamlit as st
 import streamlit_authenticator as stauth
-from estilos import aplicar_estilos
-from utils import carregar_dados
-import modulo_individual
-import modulo_simulados
-import modulo_redacoes
+from estilos import ICONE, LOGO, aplicar_estilos
+from instrumentacao import iniciar_rerun, finalizar_rerun, render_painel
+
+# Pilha de análise (pandas, plotly.express, gspread): importada só depois do login.
+# benchmarks/inicializacao.py falha se algum destes voltar para os imports do topo.
+MODULOS_ANALISE = ["utils", "alertas", "compacto", "modulo_individual", "modulo_simulados", "modulo_redacoes"]
+
+
+def _importar_modulos() -> None:
+    for nome in MODULOS_ANALISE:
+        try:
+            importlib.import_module(nome)
+        except Exception:
+            return  # o import do fluxo principal repete e mostra o erro
 
-st.set_page_config(page_title="Mentoria Estude com Danilo", page_icon="icon.jpg", layout="wide")
+
+@st.cache_resource(show_spinner=False)
+def _aquecer_modulos() -> threading.Thread:
+    # Uma vez por processo: os imports correm enquanto o usuário digita a senha
+    fio = threading.Thread(target=_importar_modulos, daemon=True)
+    fio.start()
+    return fio
+
+
+st.set_page_config(page_title="Mentoria Estude com Danilo", page_icon=ICONE, layout="wide")
+iniciar_rerun()
 aplicar_estilos()
+_aquecer_modulos()
 
 # Credenciais
 try:
@@ -37,37 +60,50 @@ authentication_status = st.session_state.get("authentication_status")
 
 # Roteamento por status de autenticação
 if authentication_status:
+    from utils import carregar_dados, render_qualidade_dados
+    from alertas import render_painel_alertas
+    from compacto import render_opcao_compacto
+    from lancamentos import render_lancamentos
+
     try:
         df_alunos, df_atividades, df_simulados, df_redacoes = carregar_dados()
     except Exception as e:
         st.error(f"Erro ao carregar os dados: {e}")
         st.stop()
 
-    st.sidebar.image("logo.png", width="stretch")
+    st.sidebar.image(LOGO, width="stretch")
     st.sidebar.markdown("---")
 
     modulo = st.sidebar.radio(
         "Painel",
         ["🚀 Central de Alta Performance", "✍️ Central de Redações", "📚 Central de Simulados"],
     )
+    render_opcao_compacto()
 
     st.sidebar.markdown("---")
     
     if modulo == "🚀 Central de Alta Performance":
+        import modulo_individual
         modulo_individual.exibir_avaliacao_individual(df_alunos, df_atividades)
     elif modulo == "📚 Central de Simulados":
+        import modulo_simulados
         modulo_simulados.exibir_modulo_simulados(df_alunos, df_simulados)
     elif modulo == "✍️ Central de Redações":
+        import modulo_redacoes
         modulo_redacoes.exibir_modulo_redacoes(df_alunos, df_redacoes)
 
     st.sidebar.markdown("---")
+    render_painel_alertas(df_alunos, df_atividades)
+    render_qualidade_dados()
+    render_lancamentos(df_alunos)
     authenticator.logout("Sair", "sidebar")
+    render_painel(finalizar_rerun(modulo))
 
 elif authentication_status is False:
     st.error("Usuário ou senha incorretos.")
-    st.image("logo.png", width=250)
+    st.image(LOGO, width=250)
 
 else:  # None — tela de login
     _, col_centro, _ = st.columns([2, 1, 2])
     with col_centro:
-        st.image("logo.png", width=250)
+        st.image(LOGO, width=250)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from consultas import versao_dados
+from instrumentacao import medir
+
+# Arquivo por período: atividades por mês, simulados por ano. Na carga só os períodos recentes ficam
+# em memória; os fechados viram snapshots somente leitura numa pasta local, lidos quando um filtro
+# chega neles. Das atividades arquivadas fica em memória um único resumo por aluno × conteúdo (somas e
+# último dia), que basta para os agregados de histórico completo (radar da turma, domínio, alertas)
+# e não cresce com o número de meses.
+ARQUIVO_ENV = "MENTORIA_ARQUIVO"
+MESES_QUENTES = 2  # mês corrente e o anterior: cobrem a janela padrão de 30 dias e a assiduidade
+_MANIFESTO = "manifesto.json"
+_HISTORICO = "historico.pkl"
+_CHAVES_RESUMO = ["id_aluno", "materia", "conteudo"]
+
+
+def chave(tabela: str, dia: date) -> str:
+    return f"{dia:%Y-%m}" if tabela == "atividades" else f"{dia:%Y}"
+
+
+def _cortes(hoje: date) -> dict[str, int]:
+    # Primeiro período quente de cada tabela; em janeiro o ano anterior ainda é quente
+    mes = np.datetime64(hoje, "M") - (MESES_QUENTES - 1)
+    return {"atividades": int(mes.astype(np.int64)), "simulados": int(str(mes.astype("datetime64[Y]")))}
+
+
+def _periodos(tabela: str, df: pd.DataFrame) -> np.ndarray:
+    # Período de cada linha como inteiro (meses desde 1970 ou o ano); -1 quando não há e a linha fica quente
+    if tabela == "atividades":
+        meses = df["data"].to_numpy().astype("datetime64[M]")
+        return np.where(np.isnat(meses), -1, meses.astype(np.int64))
+    return pd.to_numeric(df["ano"], errors="coerce").fillna(-1).astype(np.int64).to_numpy()
+
+
+def _rotulo(tabela: str, periodo: int) -> str:
+    # Nome da partição ("2025-03" ou "2025"); a ordem dos nomes é a ordem dos períodos
+    return str(np.datetime64(periodo, "M")) if tabela == "atividades" else str(periodo)
+
+
+def _resumir(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df.groupby(_CHAVES_RESUMO, sort=False)
+        .agg(acertos=("acertos", "sum"), total=("total", "sum"), dia=("dia", "max"))
+        .reset_index()
+    )
+
+
+def _assinaturas(df: pd.DataFrame, periodos: np.ndarray) -> pd.Series:
+    # Hash das linhas somado por período; textos como categorias: mesmo hash, sem hashear cada string
+    textos = {c: "category" for c in df.columns if pd.api.types.is_string_dtype(df[c]) or df[c].dtype == object}
+    hashes = pd.util.hash_pandas_object(df.astype(textos), index=False)
+    return hashes.groupby(periodos).sum()
+
+
+def _gravar_pickle(df: pd.DataFrame, caminho: str) -> None:
+    # Troca atômica: uma sessão lendo a partição nunca vê o arquivo pela metade
+    temporario = f"{caminho}.tmp"
+    df.to_pickle(temporario)
+    os.replace(temporario, caminho)
+
+
+class Arquivo:
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self._trava = threading.Lock()
+        caminho = os.path.join(pasta, _MANIFESTO)
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                self._manifesto: dict[str, dict] = json.load(f)
+        else:
+            self._manifesto = {}
+        historico = os.path.join(pasta, "atividades", _HISTORICO)
+        self._historico = pd.read_pickle(historico) if os.path.exists(historico) else _resumir(
+            pd.DataFrame(columns=_CHAVES_RESUMO + ["acertos", "total", "dia"])
+        )
+        self._mentorias = pd.Series(dtype="float64")
+        self.versao = self._versao()
+
+    def _versao(self) -> str:
+        return hashlib.sha1(json.dumps(self._manifesto, sort_keys=True).encode()).hexdigest()[:12]
+
+    def _caminho(self, tabela: str, particao: str, tipo: str = "dados") -> str:
+        return os.path.join(self.pasta, tabela, f"{particao}.pkl" if tipo == "dados" else f"{particao}.{tipo}.pkl")
+
+    def particoes(self, tabela: str) -> list[str]:
+        return sorted(self._manifesto.get(tabela, {}))
+
+    def assinatura(self, tabela: str, particao: str) -> str:
+        return self._manifesto[tabela][particao]["assinatura"]
+
+    @medir
+    def separar(
+        self, df_alunos: pd.DataFrame, df_atividades: pd.DataFrame, df_simulados: pd.DataFrame,
+        df_redacoes: pd.DataFrame, relatorio: pd.DataFrame, hoje: date | None = None,
+    ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        # Grava as partições fechadas que mudaram e devolve só as linhas quentes
+        cortes = _cortes(hoje or date.today())
+        with self._trava:
+            df_atividades = self._arquivar("atividades", df_atividades, cortes["atividades"])
+            df_simulados = self._arquivar("simulados", df_simulados, cortes["simulados"])
+            self._mentorias = df_alunos.drop_duplicates("id_aluno").set_index("id_aluno")["id_mentoria"]
+            self._salvar_manifesto()
+        return df_alunos, df_atividades, df_simulados, df_redacoes, relatorio
+
+    def _salvar_manifesto(self) -> None:
+        os.makedirs(self.pasta, exist_ok=True)
+        caminho = os.path.join(self.pasta, _MANIFESTO)
+        with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(f"{caminho}.tmp", caminho)
+        self.versao = self._versao()
+
+    def _arquivar(self, tabela: str, df: pd.DataFrame, corte: int) -> pd.DataFrame:
+        periodos = _periodos(tabela, df)
+        fechado = (periodos >= 0) & (periodos < corte)
+        registro = self._manifesto.setdefault(tabela, {})
+        alteradas = False
+        # Período fechado que sumiu da planilha (todas as linhas apagadas) sai do manifesto e da pasta
+        existentes = {_rotulo(tabela, int(p)) for p in np.unique(periodos[fechado])}
+        for particao in [p for p in registro if p not in existentes]:
+            for tipo in ["dados", "resumo"]:
+                caminho = self._caminho(tabela, particao, tipo)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+            del registro[particao]
+            alteradas = True
+        if fechado.any():
+            # Só partições novas ou editadas na planilha são regravadas
+            for periodo, assinatura in _assinaturas(df[fechado], periodos[fechado]).items():
+                particao, assinatura = _rotulo(tabela, periodo), str(int(assinatura))
+                if registro.get(particao, {}).get("assinatura") == assinatura:
+                    continue
+                parte = df[periodos == periodo].reset_index(drop=True)
+                parte.attrs = {}
+                os.makedirs(os.path.join(self.pasta, tabela), exist_ok=True)
+                _gravar_pickle(parte, self._caminho(tabela, particao))
+                if tabela == "atividades":
+                    _gravar_pickle(_resumir(parte), self._caminho(tabela, particao, "resumo"))
+                registro[particao] = {"linhas": len(parte), "assinatura": assinatura}
+                alteradas = True
+        if alteradas and tabela == "atividades":
+            # Uma vez por mês fechado (ou edição ou remoção num mês antigo): o resumo acumulado é refeito dos resumos mensais
+            self._historico = self._somar_resumos(self.particoes(tabela))
+            _gravar_pickle(self._historico, os.path.join(self.pasta, tabela, _HISTORICO))
+        quente = df[~fechado].reset_index(drop=True)
+        quente.attrs = {**df.attrs, "corte": _rotulo(tabela, corte)}
+        return quente
+
+    def _somar_resumos(self, particoes: list[str]) -> pd.DataFrame:
+        partes = [
+            _ler_particao(self._caminho("atividades", p, "resumo"), self.assinatura("atividades", p))
+            for p in particoes
+        ]
+        if not partes:
+            return self._historico.iloc[:0]
+        return (
+            pd.concat(partes, ignore_index=True)
+            .groupby(_CHAVES_RESUMO, sort=False)
+            .agg(acertos=("acertos", "sum"), total=("total", "sum"), dia=("dia", "max"))
+            .reset_index()
+        )
+
+    def ler(self, tabela: str, particao: str) -> pd.DataFrame:
+        return _ler_particao(self._caminho(tabela, particao), self.assinatura(tabela, particao))
+
+    def da_mentoria(self, df: pd.DataFrame, mentoria: int | None) -> pd.DataFrame:
+        if mentoria is None:
+            return df
+        with self._trava:
+            mentorias = self._mentorias
+        return df[df["id_aluno"].map(mentorias).to_numpy() == mentoria]
+
+    def resumo(self, ate: str, mentoria: int | None = None) -> pd.DataFrame:
+        # Somas por aluno × conteúdo das partições de atividades anteriores a `ate`. No caso comum
+        # (corte da carga) são todas e vale o acumulado; um período estendido soma os resumos mensais.
+        with self._trava:
+            particoes, historico = self.particoes("atividades"), self._historico
+        anteriores = [p for p in particoes if p < ate]
+        resumo = historico if len(anteriores) == len(particoes) else self._somar_resumos(anteriores)
+        return self.da_mentoria(resumo, mentoria)
+
+
+@st.cache_resource(show_spinner=False)
+def obter_arquivo() -> Arquivo | None:
+    pasta = os.environ.get(ARQUIVO_ENV)
+    return Arquivo(pasta) if pasta else None
+
+
+@st.cache_resource(max_entries=48, show_spinner=False)
+def _ler_particao(caminho: str, assinatura: str) -> pd.DataFrame:
+    return pd.read_pickle(caminho)
+
+
+# --- Leitura sob demanda ---
+
+@st.cache_resource(max_entries=8, ttl=600, show_spinner=False)
+def _estendido(versao: str, inicio: str, _df: pd.DataFrame, _arquivo: Arquivo) -> pd.DataFrame:
+    tabela, corte, mentoria = _df.attrs["tabela"], _df.attrs["corte"], _df.attrs.get("mentoria")
+    partes = [
+        _arquivo.da_mentoria(_arquivo.ler(tabela, p), mentoria)
+        for p in _arquivo.particoes(tabela) if inicio <= p < corte
+    ]
+    estendido = pd.concat(partes + [_df], ignore_index=True)
+    estendido.attrs = {**_df.attrs, "versao": f"{versao}<{inicio}", "corte": inicio}
+    return estendido
+
+
+def estender(df: pd.DataFrame, inicio: str) -> pd.DataFrame:
+    # Quando o filtro começa antes do corte, junta as partições arquivadas a partir de `inicio`
+    arquivo, corte = obter_arquivo(), df.attrs.get("corte")
+    if arquivo is None or corte is None or inicio >= corte:
+        return df
+    particoes = [p for p in arquivo.particoes(df.attrs["tabela"]) if inicio <= p < corte]
+    if not particoes:
+        return df
+    return _estendido(versao_dados(df), particoes[0], df, arquivo)
+
+
+def anterior(df: pd.DataFrame) -> pd.DataFrame | None:
+    # `df` com a partição arquivada logo antes do seu corte, com as linhas por dia; None quando não há mais.
+    # Para sequências de dias, que recuam um período por vez só enquanto chegam ao corte
+    arquivo, corte = obter_arquivo(), df.attrs.get("corte")
+    if arquivo is None or corte is None:
+        return None
+    particoes = [p for p in arquivo.particoes(df.attrs["tabela"]) if p < corte]
+    return estender(df, particoes[-1]) if particoes else None
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _com_historico(
+    versao: str, versao_arquivo: str, corte: str, mentoria: int | None, _df: pd.DataFrame, _arquivo: Arquivo,
+) -> pd.DataFrame:
+    resumo = _arquivo.resumo(corte, mentoria)
+    if resumo.empty:
+        return _df
+    linhas = resumo.assign(
+        data=pd.to_datetime(resumo["dia"], unit="D"),
+        **{"%": (resumo["acertos"] / resumo["total"] * 100).where(resumo["total"] > 0, 0)},
+    )
+    combinado = pd.concat([linhas, _df], ignore_index=True)
+    combinado.attrs = {**_df.attrs, "versao": f"{versao}+h{versao_arquivo}"}
+    return combinado
+
+
+def com_historico(df_atividades: pd.DataFrame) -> pd.DataFrame:
+    # Linhas quentes mais uma linha-resumo por aluno × conteúdo arquivado (somas, data do último estudo).
+    # Preserva somas e últimas datas por conteúdo; só serve a agregados, nunca a recortes por dia.
+    arquivo, corte = obter_arquivo(), df_atividades.attrs.get("corte")
+    if arquivo is None or corte is None:
+        return df_atividades
+    return _com_historico(
+        versao_dados(df_atividades), arquivo.versao, corte, df_atividades.attrs.get("mentoria"),
+        df_atividades, arquivo,
+    )
@@ -0,0 +1,30 @@
+# Mesmo roteamento do app.py, sem a tela de login: usado pelos testes de carga via AppTest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st
+from instrumentacao import iniciar_rerun, finalizar_rerun
+from utils import carregar_dados
+from compacto import render_opcao_compacto
+import modulo_individual
+import modulo_simulados
+import modulo_redacoes
+
+PAINEIS = ["🚀 Central de Alta Performance", "✍️ Central de Redações", "📚 Central de Simulados"]
+
+iniciar_rerun()
+df_alunos, df_atividades, df_simulados, df_redacoes = carregar_dados()
+
+modulo = st.sidebar.radio("Painel", PAINEIS)
+render_opcao_compacto()
+
+if modulo == "🚀 Central de Alta Performance":
+    modulo_individual.exibir_avaliacao_individual(df_alunos, df_atividades)
+elif modulo == "📚 Central de Simulados":
+    modulo_simulados.exibir_modulo_simulados(df_alunos, df_simulados)
+elif modulo == "✍️ Central de Redações":
+    modulo_redacoes.exibir_modulo_redacoes(df_alunos, df_redacoes)
+
+finalizar_rerun(modulo)
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.sinteticos import Escala, gerar_dados
+
+_DIAS_SEQUENCIA = 100  # mais que os meses quentes: a sequência atravessa o corte do arquivo
+
+
+def _mib(*dfs) -> float:
+    return sum(df.memory_usage(deep=True).sum() for df in dfs) / 2**20
+
+
+def _derivados(df_alunos, df_atividades) -> float:
+    # O que a primeira sessão de uma versão nova calcula sobre atividades, em ms
+    import agregados
+    import alertas
+    import dominio
+    from arquivo import com_historico
+    from consultas import ORDEM_MATERIAS
+
+    dominio._dominios.clear()
+    inicio = time.perf_counter()
+    agregados.somas_por_materia(df_atividades, df_alunos, None)
+    agregados.faixas_diarias(df_atividades, ORDEM_MATERIAS)
+    dominio.obter_matriz(df_atividades)
+    historico = com_historico(df_atividades)
+    alertas._calcular_fatos(alertas._sequencias(df_atividades, df_alunos["id_aluno"]), historico)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def _medir(anos: int, alunos: int, seed: int) -> dict:
+    import arquivo
+    from utils import normalizar, versionar_tabelas
+
+    dados = gerar_dados(Escala(alunos=alunos, dias=365 * anos, conteudos=20, simulados=12 * anos), seed=seed)
+    brutos = {t: df.copy() for t, df in zip(["alunos", "atividades", "simulados", "redacoes"], dados)}
+
+    os.environ.pop(arquivo.ARQUIVO_ENV, None)
+    arquivo.obter_arquivo.clear()
+    completo = normalizar(brutos)
+    sem_arquivo_ms = _derivados(completo[0], completo[1])
+
+    # Primeira carga grava as partições fechadas; a segunda (a de todo dia) só confere as assinaturas
+    os.environ[arquivo.ARQUIVO_ENV] = tempfile.mkdtemp(prefix="mentoria_arquivo_")
+    arquivo.obter_arquivo.clear()
+    arquivo.obter_arquivo().separar(*normalizar(brutos))
+    carregados = normalizar(brutos)
+    inicio = time.perf_counter()
+    quentes = arquivo.obter_arquivo().separar(*carregados)
+    separar_ms = (time.perf_counter() - inicio) * 1000
+    versionar_tabelas(*quentes[:4])
+    com_arquivo_ms = _derivados(quentes[0], quentes[1])
+
+    return {
+        "anos": anos,
+        "linhas": len(completo[1]) + len(completo[2]),
+        "linhas_quentes": len(quentes[1]) + len(quentes[2]),
+        "separar_ms": separar_ms,
+        "derivados_sem_arquivo_ms": sem_arquivo_ms,
+        "derivados_com_arquivo_ms": com_arquivo_ms,
+        "mib_sem_arquivo": _mib(completo[1], completo[2]),
+        "mib_com_arquivo": _mib(quentes[1], quentes[2]),
+    }
+
+
+def _conferir_sequencias(alunos: int, seed: int) -> list[str]:
+    # O aluno 1 estuda todo dia nos últimos _DIAS_SEQUENCIA dias: com o arquivo ligado, painel e
+    # alertas têm de chegar à mesma sequência que as linhas completas dão
+    from datetime import datetime
+
+    import pandas as pd
+
+    import alertas
+    import arquivo
+    import modulo_individual
+    from utils import normalizar, versionar_tabelas
+
+    hoje = datetime.now()
+    dados = gerar_dados(Escala(alunos=alunos, dias=365, conteudos=20, simulados=12), seed=seed)
+    brutos = {t: df.copy() for t, df in zip(["alunos", "atividades", "simulados", "redacoes"], dados)}
+    ativ = brutos["atividades"]
+    seguidos = pd.DataFrame({
+        "id_aluno": 1, "data": pd.date_range(end=pd.Timestamp(hoje.date()), periods=_DIAS_SEQUENCIA),
+        "materia": ativ["materia"].iloc[0], "conteudo": ativ["conteudo"].iloc[0], "acertos": 5.0, "total": 10.0,
+    })
+    brutos["atividades"] = pd.concat([ativ, seguidos], ignore_index=True)
+
+    completo = normalizar(brutos)
+    esperado = modulo_individual._calcular_streak(completo[1][completo[1]["id_aluno"] == 1], hoje)
+
+    os.environ[arquivo.ARQUIVO_ENV] = tempfile.mkdtemp(prefix="mentoria_arquivo_")
+    arquivo.obter_arquivo.clear()
+    quentes = arquivo.obter_arquivo().separar(*normalizar(brutos))
+    versionar_tabelas(*quentes[:4])
+    obtidos = {
+        "painel": modulo_individual._streak_do_aluno(quentes[1], quentes[0], 1, hoje),
+        "alertas": int(alertas._sequencias(quentes[1], pd.Index([1])).loc[1, "streak_final"]),
+    }
+    falhas = [f"{onde}: {valor} dias, esperado {esperado}" for onde, valor in obtidos.items() if valor != esperado]
+    if esperado < _DIAS_SEQUENCIA:
+        falhas.append(f"sequência completa de {esperado} dias, menor que a plantada")
+    return falhas
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Memória e cálculo por versão dos dados, com e sem o arquivo por período, conforme os anos se acumulam."
+    )
+    parser.add_argument("--anos", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--alunos", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--tolerancia", type=float,
+        help="Falha se, com o arquivo, memória ou cálculo no maior histórico passar do menor por mais que esta fração.",
+    )
+    parser.add_argument("--saida", help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for anos in args.anos:
+        r = _medir(anos, args.alunos, args.seed)
+        resultados.append(r)
+        print(
+            f"{anos} ano(s)  {r['linhas']:>8} linhas ({r['linhas_quentes']:>6} quentes)  "
+            f"separar {r['separar_ms']:>6.0f} ms  "
+            f"derivados {r['derivados_sem_arquivo_ms']:>6.0f} → {r['derivados_com_arquivo_ms']:>5.0f} ms  "
+            f"memória {r['mib_sem_arquivo']:>6.1f} → {r['mib_com_arquivo']:>5.1f} MiB",
+            flush=True,
+        )
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    # Sequências contam dias: não podem sair do resumo dos meses arquivados
+    falhas = _conferir_sequencias(args.alunos, args.seed)
+    if falhas:
+        print(f"FALHA: sequência através do corte do arquivo: {'; '.join(falhas)}")
+        return 1
+    print(f"sequência através do corte do arquivo: ok ({_DIAS_SEQUENCIA}+ dias)")
+
+    if args.tolerancia is not None and len(resultados) > 1:
+        menor, maior = resultados[0], resultados[-1]
+        acima = [
+            campo for campo in ["derivados_com_arquivo_ms", "mib_com_arquivo"]
+            if maior[campo] > menor[campo] * (1 + args.tolerancia)
+        ]
+        if acima:
+            print(f"FALHA: cresceu mais de {args.tolerancia:.0%} com o histórico: {', '.join(acima)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
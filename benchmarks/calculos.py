@@ -0,0 +1,156 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import agregados
+import competencias
+import consultas
+import dominio
+import modulo_individual
+import modulo_simulados
+import temas
+from benchmarks.sinteticos import Escala, gerar_dados
+
+_ESCALAS_PADRAO = [
+    Escala(alunos=50, dias=90, conteudos=10, simulados=6),
+    Escala(alunos=200, dias=180, conteudos=20, simulados=12),
+    Escala(alunos=1000, dias=365, conteudos=40, simulados=24),
+]
+
+
+def _casos(dados) -> dict:
+    df_alunos, df_atividades, df_simulados, df_redacoes = dados
+    hoje = datetime.now()
+    # Aluno com mais registros: o pior caso das visões individuais
+    id_aluno = int(df_atividades["id_aluno"].value_counts().idxmax())
+    df_aluno = df_atividades[df_atividades["id_aluno"] == id_aluno]
+    df_diario = modulo_individual._calcular_diario(df_aluno)
+    df_cont = modulo_individual._calcular_conteudos(df_aluno)
+    id_simu = int(df_simulados["id_aluno"].value_counts().idxmax())
+    primeiro = df_simulados.iloc[0]
+    df_exame = df_simulados[
+        (df_simulados["tipo"] == primeiro["tipo"])
+        & (df_simulados["numero"] == primeiro["numero"])
+        & (df_simulados["ano"] == primeiro["ano"])
+    ]
+    notas = modulo_simulados._notas_parciais(df_simulados)
+    df_turma = df_atividades[df_atividades["materia"].isin(modulo_individual.ORDEM_MATERIAS)]
+    triplas = dominio._triplas(df_atividades)
+    matriz = dominio.MatrizDominio(triplas)
+    materia, conteudo = matriz.resumo_conteudos()["%"].idxmin()
+    indice = temas.IndiceTemas(df_redacoes)
+    celulas = competencias._celulas(df_redacoes)
+    mentorias = df_alunos.drop_duplicates("id_aluno").set_index("id_aluno")["id_mentoria"]
+    cubo = competencias.CuboCompetencias(celulas, mentorias)
+    id_red = int(df_redacoes["id_aluno"].value_counts().idxmax())
+    # Comparação com o máximo de mentorados, todos com muitos registros
+    ids_comparacao = df_atividades["id_aluno"].value_counts().index[:consultas.MAX_COMPARACAO].tolist()
+
+    return {
+        "individual.diario": lambda: modulo_individual._calcular_diario(df_aluno),
+        "individual.tendencia": lambda: modulo_individual._calcular_tendencia(df_diario),
+        "individual.streak": lambda: modulo_individual._calcular_streak(df_aluno, hoje),
+        "individual.hiato": lambda: modulo_individual._calcular_hiato(df_aluno, hoje),
+        "individual.conteudos": lambda: modulo_individual._calcular_conteudos(df_aluno),
+        "individual.retencao": lambda: modulo_individual._calcular_retencao(df_cont, df_aluno, hoje),
+        "individual.radar_turma": lambda: modulo_individual._calcular_media_por_materia(df_turma),
+        "simulados.completos": lambda: modulo_simulados._filtrar_simulados_completos(df_simulados),
+        "simulados.ranking_geral": lambda: modulo_simulados._montar_ranking(df_exame, "Completo"),
+        "simulados.notas": lambda: modulo_simulados._notas_parciais(df_simulados),
+        "simulados.notas_em_partes": lambda: modulo_simulados._combinar_notas([
+            modulo_simulados._notas_parciais(p) for p in modulo_simulados._dividir_por_exame(df_simulados, 8)
+        ]),
+        "simulados.ranking_individual": lambda: modulo_simulados._calcular_ranking_individual(
+            notas, id_simu, "Completo"
+        ),
+        "redacoes.cubo_celulas": lambda: competencias._celulas(df_redacoes),
+        "redacoes.cubo_montar": lambda: competencias.CuboCompetencias(celulas, mentorias),
+        "redacoes.radar_grupo": lambda: (cubo.medias_grupo(None), cubo.medias_top(None)),
+        "redacoes.radar_individual": lambda: (cubo.medias_aluno(id_red), cubo.medias_grupo(None)),
+        "redacoes.tendencia": lambda: cubo.tendencia(None, id_red),
+        "dominio.montar": lambda: dominio.MatrizDominio(triplas),
+        "dominio.coluna": lambda: matriz.abaixo_de(materia, conteudo, 50),
+        "dominio.mapa": lambda: matriz.submatriz(list(range(min(15, len(matriz.conteudos))))),
+        "temas.indice": lambda: temas.IndiceTemas(df_redacoes),
+        "temas.busca": lambda: indice.resumo(indice.buscar("desafios brasil")),
+        "comparacao.lote": lambda: modulo_individual._calcular_comparacao(
+            consultas.filtrar_alunos(df_atividades, ids_comparacao), "Todas"
+        ),
+        "particoes.radar_turma": lambda: agregados.somas_por_materia(df_atividades, df_alunos, None),
+    }
+
+
+def _medir(funcao, repeticoes: int) -> tuple[float, float]:
+    funcao()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(tempos) * 1000, pico / 2**20
+
+
+def executar(escalas: list[Escala], repeticoes: int, seed: int) -> list[dict]:
+    resultados = []
+    for escala in escalas:
+        dados = gerar_dados(escala, seed=seed)
+        linhas = {"atividades": len(dados[1]), "simulados": len(dados[2]), "redacoes": len(dados[3])}
+        for nome, funcao in _casos(dados).items():
+            ms, mib = _medir(funcao, repeticoes)
+            resultados.append({"escala": str(escala), **linhas, "caso": nome, "ms": ms, "pico_mib": mib})
+            print(f"{str(escala):<50} {nome:<32} {ms:>10.2f} ms {mib:>9.2f} MiB", flush=True)
+    return resultados
+
+
+def _regressoes(resultados: list[dict], referencia: list[dict], tolerancia: float) -> list[str]:
+    base = {(r["escala"], r["caso"]): r["ms"] for r in referencia}
+    falhas = []
+    for r in resultados:
+        anterior = base.get((r["escala"], r["caso"]))
+        if anterior and r["ms"] > anterior * (1 + tolerancia):
+            falhas.append(f"{r['caso']} @ {r['escala']}: {anterior:.2f} ms -> {r['ms']:.2f} ms")
+    return falhas
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark headless das funções de cálculo dos painéis.")
+    parser.add_argument(
+        "--escala", action="append", type=Escala.de_texto,
+        help='Ponto de escala, ex.: "alunos=200,dias=365,conteudos=20,simulados=24" (repetível).',
+    )
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", help="Grava os resultados em JSON.")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita (padrão 25%%).")
+    args = parser.parse_args(argv)
+
+    np.seterr(all="ignore")
+    resultados = executar(args.escala or _ESCALAS_PADRAO, args.repeticoes, args.seed)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            falhas = _regressoes(resultados, json.load(f), args.tolerancia)
+        for falha in falhas:
+            print(f"REGRESSÃO: {falha}", file=sys.stderr)
+        return 1 if falhas else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Roda de qualquer diretório (python benchmarks/carga.py ou python -m benchmarks.carga)
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _RAIZ)
+
+from benchmarks.sinteticos import Escala, gerar_dados
+
+_APP = os.path.join(_RAIZ, "benchmarks", "app_sem_login.py")
+_PAINEL_INDIVIDUAL, _PAINEL_REDACOES, _PAINEL_SIMULADOS = (
+    "🚀 Central de Alta Performance", "✍️ Central de Redações", "📚 Central de Simulados",
+)
+
+
+def _rss_mib() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _AmostradorRSS(threading.Thread):
+    def __init__(self, intervalo: float = 0.1):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = _rss_mib()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, _rss_mib())
+
+    def parar(self) -> float:
+        self._parar.set()
+        self.join()
+        return max(self.pico, _rss_mib())
+
+
+def _selectbox(at, label: str):
+    return next(s for s in at.sidebar.selectbox if s.label == label)
+
+
+def _sessao(ids_alunos: list[int], rodadas: int, timeout: float, seed: int) -> list[float]:
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(_APP, default_timeout=timeout)
+    tempos = []
+
+    def rerun(acao=None):
+        inicio = time.perf_counter()
+        (acao or at).run()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    # Roteiro de um mentor: abre o painel, troca de aluno e passa pelas três centrais
+    rerun()
+    for _ in range(rodadas):
+        id_aluno = rng.choice(ids_alunos)
+        rerun(at.sidebar.radio[0].set_value(_PAINEL_INDIVIDUAL))
+        rerun(_selectbox(at, "Mentorado").set_value(id_aluno))
+        rerun(at.sidebar.radio[0].set_value(_PAINEL_SIMULADOS))
+        rerun(_selectbox(at, "Mentorado").set_value(id_aluno))
+        rerun(_selectbox(at, "Mentorado").set_value(None))
+        rerun(at.sidebar.radio[0].set_value(_PAINEL_REDACOES))
+        rerun(_selectbox(at, "Mentorado").set_value(id_aluno))
+    return tempos
+
+
+def _processo_sessao(ids_alunos: list[int], rodadas: int, timeout: float, seed: int, barreira) -> dict:
+    # AppTest não é thread-safe: cada sessão simulada roda no próprio processo. O aquecimento (imports
+    # e cache da carga deste processo) fica fora da medição; a barreira solta todas as sessões juntas.
+    _sessao(ids_alunos, 1, timeout, seed)
+    barreira.wait()
+    amostrador = _AmostradorRSS()
+    amostrador.start()
+    inicio = time.time()
+    tempos = _sessao(ids_alunos, rodadas, timeout, seed)
+    return {"tempos": tempos, "inicio": inicio, "fim": time.time(), "rss_pico_mib": amostrador.parar()}
+
+
+def executar(niveis: list[int], rodadas: int, escala: Escala, timeout: float, seed: int) -> list[dict]:
+    dados = gerar_dados(escala, seed=seed)
+    ids_alunos = dados[0]["id_aluno"].tolist()
+
+    from utils import salvar_snapshot
+    pasta = tempfile.mkdtemp(prefix="mentoria_carga_")
+    salvar_snapshot(pasta, *dados)
+    os.environ["MENTORIA_DADOS_LOCAIS"] = pasta  # herdado pelos processos das sessões
+
+    contexto = multiprocessing.get_context("spawn")
+    resultados = []
+    for n in niveis:
+        with contexto.Manager() as gerente, ProcessPoolExecutor(n, mp_context=contexto) as pool:
+            barreira = gerente.Barrier(n)
+            futuros = [
+                pool.submit(_processo_sessao, ids_alunos, rodadas, timeout, seed + i, barreira) for i in range(n)
+            ]
+            sessoes = [f.result() for f in futuros]
+        tempos = np.concatenate([s["tempos"] for s in sessoes])
+        duracao = max(s["fim"] for s in sessoes) - min(s["inicio"] for s in sessoes)
+        p50, p95, p99 = np.percentile(tempos, [50, 95, 99])
+        resultado = {
+            "sessoes": n, "reruns": len(tempos), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "reruns_por_s": len(tempos) / duracao,
+            # Um processo por sessão: o pico de memória é a soma dos picos de cada um
+            "rss_pico_mib": sum(s["rss_pico_mib"] for s in sessoes),
+        }
+        resultados.append(resultado)
+        print(
+            f"{n:>4} sessões  {len(tempos):>5} reruns  "
+            f"p50 {p50:>8.1f} ms  p95 {p95:>8.1f} ms  p99 {p99:>8.1f} ms  "
+            f"{resultado['reruns_por_s']:>6.1f} reruns/s  RSS {resultado['rss_pico_mib']:>7.1f} MiB",
+            flush=True,
+        )
+    return resultados
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Teste de carga: sessões simultâneas percorrendo os três painéis via AppTest."
+    )
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--rodadas", type=int, default=3, help="Repetições do roteiro por sessão.")
+    parser.add_argument(
+        "--escala", type=Escala.de_texto, default=Escala(alunos=300, dias=365, conteudos=20, simulados=24),
+        help='Volume dos dados locais, ex.: "alunos=300,dias=365,conteudos=20,simulados=24".',
+    )
+    parser.add_argument("--timeout", type=float, default=120, help="Limite por rerun, em segundos.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    print(f"Escala: {args.escala}", flush=True)
+    resultados = executar(args.sessoes, args.rodadas, args.escala, args.timeout, args.seed)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"escala": str(args.escala), "niveis": resultados}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_APP = os.path.join(_RAIZ, "app.py")
+
+# Nada disto pode ser carregado antes do login
+_PROIBIDOS = ["pandas", "numpy", "plotly.express", "gspread", "pyarrow"]
+
+_MEDICAO = """
+import json, sys, time
+inicio = time.perf_counter()
+{imports}
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({{"ms": ms, "modulos": [m for m in {vigiados!r} if m in sys.modules]}}))
+"""
+
+
+def _imports_topo() -> tuple[list[str], list[str]]:
+    # Imports do nível do módulo em app.py (o que roda antes da tela de login) e a lista de módulos adiados
+    with open(_APP, encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    imports, adiados = [], []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            imports.append(ast.unparse(no))
+        elif isinstance(no, ast.Assign) and any(getattr(a, "id", "") == "MODULOS_ANALISE" for a in no.targets):
+            adiados = ast.literal_eval(no.value)
+    return imports, adiados
+
+
+def _medir(imports: list[str], vigiados: list[str]) -> dict:
+    # Interpretador novo a cada medição: é o custo de um cold start do app
+    codigo = _MEDICAO.format(imports="\n".join(imports), vigiados=vigiados)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=_RAIZ, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def executar(rodadas: int) -> dict:
+    imports, adiados = _imports_topo()
+    vigiados = _PROIBIDOS + adiados
+    login = [_medir(imports, vigiados) for _ in range(rodadas)]
+    completo = [_medir(imports + [f"import {m}" for m in adiados], vigiados) for _ in range(rodadas)]
+    return {
+        "login_ms": statistics.median(r["ms"] for r in login),
+        "completo_ms": statistics.median(r["ms"] for r in completo),
+        "vazados": login[0]["modulos"],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tempo de import até a tela de login do app.py.")
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=1000, help="Orçamento da tela de login, em ms.")
+    parser.add_argument("--saida", help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.rodadas)
+    print(f"tela de login   {resultado['login_ms']:>8.1f} ms  (limite {args.limite:.0f} ms)")
+    print(f"pilha completa  {resultado['completo_ms']:>8.1f} ms")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    falhou = False
+    if resultado["vazados"]:
+        print(f"FALHA: importados antes do login: {', '.join(resultado['vazados'])}")
+        falhou = True
+    if resultado["login_ms"] > args.limite:
+        print(f"FALHA: tela de login acima do orçamento ({resultado['login_ms']:.0f} > {args.limite:.0f} ms)")
+        falhou = True
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
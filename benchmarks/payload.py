@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# O perfil precisa estar ligado antes de qualquer import do app: instrumentacao lê o ambiente ao carregar
+_PASTA = tempfile.mkdtemp(prefix="mentoria_payload_")
+_ARQUIVO = os.path.join(_PASTA, "perfil.jsonl")
+os.environ.update(MENTORIA_PERFIL="1", MENTORIA_PERFIL_ARQUIVO=_ARQUIVO, MENTORIA_DADOS_LOCAIS=_PASTA)
+
+from benchmarks.sinteticos import Escala, gerar_dados  # noqa: E402
+
+_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app_sem_login.py")
+
+
+def _roteiro(compacto: bool, id_aluno: int, timeout: float) -> None:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(_APP, default_timeout=timeout)
+    at.session_state["modo_compacto"] = compacto
+    at.run()
+    for painel in at.sidebar.radio[0].options:
+        at.sidebar.radio[0].set_value(painel).run()
+        mentorado = next(s for s in at.sidebar.selectbox if s.label == "Mentorado")
+        mentorado.set_value(id_aluno).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+
+def executar(escala: Escala, timeout: float, seed: int) -> dict:
+    from utils import salvar_snapshot
+    dados = gerar_dados(escala, seed=seed)
+    salvar_snapshot(_PASTA, *dados)
+    id_aluno = int(dados[1]["id_aluno"].value_counts().idxmax())
+
+    resultados = {}
+    for modo, compacto in [("normal", False), ("compacto", True)]:
+        # Cada rerun grava o seu registro (com payload por tipo de elemento) no arquivo do perfil
+        if os.path.exists(_ARQUIVO):
+            os.remove(_ARQUIVO)
+        _roteiro(compacto, id_aluno, timeout)
+        with open(_ARQUIVO, encoding="utf-8") as f:
+            registros = [json.loads(linha) for linha in f]
+        # Por painel, o maior rerun (painel aberto com um aluno escolhido)
+        por_painel = {}
+        for r in registros:
+            if r["payload_bytes"] > por_painel.get(r["painel"], {}).get("payload_bytes", -1):
+                por_painel[r["painel"]] = r
+        resultados[modo] = {p: {"bytes": r["payload_bytes"], "elementos": r["payload"]} for p, r in por_painel.items()}
+    return resultados
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bytes enviados ao navegador por rerun, por painel, com e sem modo compacto.")
+    parser.add_argument(
+        "--escala", type=Escala.de_texto, default=Escala(alunos=300, dias=365, conteudos=20, simulados=24),
+        help='Volume dos dados locais, ex.: "alunos=300,dias=365,conteudos=20,simulados=24".',
+    )
+    parser.add_argument("--timeout", type=float, default=120, help="Limite por rerun, em segundos.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limite", type=float, help="Falha se algum painel no modo compacto passar destes KB.")
+    parser.add_argument("--saida", help="Grava os resultados em JSON.")
+    args = parser.parse_args(argv)
+
+    print(f"Escala: {args.escala}", flush=True)
+    resultados = executar(args.escala, args.timeout, args.seed)
+    for painel, normal in resultados["normal"].items():
+        compacto = resultados["compacto"][painel]
+        maiores = sorted(compacto["elementos"].items(), key=lambda x: -x[1])[:3]
+        print(
+            f"{painel:<34} normal {normal['bytes'] / 1024:>8.1f} KB  compacto {compacto['bytes'] / 1024:>8.1f} KB  "
+            f"({', '.join(f'{t} {b / 1024:.1f}' for t, b in maiores)})"
+        )
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"escala": str(args.escala), **resultados}, f, ensure_ascii=False, indent=2)
+
+    if args.limite is not None:
+        acima = [p for p, r in resultados["compacto"].items() if r["bytes"] / 1024 > args.limite]
+        if acima:
+            print(f"FALHA: acima de {args.limite:.0f} KB no modo compacto: {', '.join(acima)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from utils import normalizar
+
+MATERIAS = [
+    "Linguagens", "História", "Geografia", "Filo / Socio",
+    "Biologia", "Física", "Química", "Matemática",
+]
+AREAS = ["Linguagens", "Humanas", "Natureza", "Matemática"]
+TIPOS = ["ENEM", "SAS", "Bernoulli"]
+TEMAS = [
+    "Desafios da mobilidade urbana no Brasil",
+    "Invisibilidade do trabalho de cuidado realizado pela mulher",
+    "Caminhos para combater a intolerância religiosa",
+    "Democratização do acesso ao cinema",
+    "Manipulação do comportamento do usuário pelo controle de dados",
+    "Estigmas associados às doenças mentais",
+    "Formação educacional de surdos",
+    "Valorização de comunidades e povos tradicionais",
+    "",
+]
+QUESTOES_POR_AREA = 45
+
+
+@dataclass(frozen=True)
+class Escala:
+    alunos: int = 100
+    dias: int = 180
+    conteudos: int = 10
+    simulados: int = 12
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "Escala":
+        # "alunos=200,dias=365,conteudos=20,simulados=24"
+        campos = dict(par.split("=") for par in texto.split(",") if par)
+        return cls(**{k.strip(): int(v) for k, v in campos.items()})
+
+    def __str__(self) -> str:
+        return f"alunos={self.alunos},dias={self.dias},conteudos={self.conteudos},simulados={self.simulados}"
+
+
+def _gerar_alunos(rng: np.random.Generator, escala: Escala) -> pd.DataFrame:
+    ids = np.arange(1, escala.alunos + 1)
+    return pd.DataFrame({
+        "id_aluno": ids,
+        "nome": [f"Aluno {i:05d}" for i in ids],
+        "id_mentoria": np.where(rng.random(escala.alunos) < 0.6, 1, 2),
+    })
+
+
+def _gerar_atividades(rng: np.random.Generator, escala: Escala, hoje: datetime) -> pd.DataFrame:
+    # Cada aluno estuda em ~60% dos dias, com 1 a 3 registros por dia estudado
+    aluno, dia = np.meshgrid(np.arange(1, escala.alunos + 1), np.arange(escala.dias), indexing="ij")
+    ativo = rng.random(aluno.shape) < 0.6
+    aluno, dia = aluno[ativo], dia[ativo]
+    repeticoes = rng.integers(1, 4, len(aluno))
+    aluno, dia = np.repeat(aluno, repeticoes), np.repeat(dia, repeticoes)
+    n = len(aluno)
+
+    materia = rng.integers(0, len(MATERIAS), n)
+    conteudo = rng.integers(0, escala.conteudos, n)
+    # Habilidade por aluno × matéria, para que os rendimentos não sejam ruído puro
+    habilidade = rng.uniform(0.35, 0.9, (escala.alunos + 1, len(MATERIAS)))
+    total = rng.integers(5, 31, n)
+    acertos = rng.binomial(total, habilidade[aluno, materia])
+
+    nomes_materia = np.array(MATERIAS, dtype=object)
+    df = pd.DataFrame({
+        "id_aluno": aluno,
+        "data": pd.Timestamp(hoje.date()) - pd.to_timedelta(escala.dias - 1 - dia, unit="D"),
+        "materia": nomes_materia[materia],
+        "conteudo": [f"{m} - Conteúdo {c + 1}" for m, c in zip(nomes_materia[materia], conteudo)],
+        "acertos": acertos.astype(float),
+        "total": total.astype(float),
+    })
+    return df
+
+
+def _gerar_simulados(rng: np.random.Generator, escala: Escala, hoje: datetime) -> pd.DataFrame:
+    linhas = []
+    inicio = hoje - timedelta(days=escala.dias)
+    for s in range(escala.simulados):
+        tipo = TIPOS[s % len(TIPOS)]
+        numero = s // len(TIPOS) + 1
+        ano = inicio.year + (s * escala.dias // max(escala.simulados, 1)) // 365
+        data_dia1 = inicio + timedelta(days=(s + 1) * escala.dias // (escala.simulados + 1))
+        participa = rng.random(escala.alunos) < 0.8
+        fez_dia2 = rng.random(escala.alunos) < 0.9
+        for i_area, area in enumerate(AREAS):
+            dia2 = i_area >= 2
+            mascara = participa & fez_dia2 if dia2 else participa
+            ids = np.flatnonzero(mascara) + 1
+            linhas.append(pd.DataFrame({
+                "id_aluno": ids,
+                "data": pd.Timestamp(data_dia1 + timedelta(days=7 if dia2 else 0)).normalize(),
+                "tipo": tipo,
+                "numero": numero,
+                "ano": ano,
+                "area": area,
+                "acertos": rng.binomial(QUESTOES_POR_AREA, rng.uniform(0.3, 0.85, len(ids))).astype(float),
+                "total": float(QUESTOES_POR_AREA),
+            }))
+    if not linhas:
+        return pd.DataFrame(columns=["id_aluno", "data", "tipo", "numero", "ano", "area", "acertos", "total"])
+    return pd.concat(linhas, ignore_index=True)
+
+
+def _gerar_redacoes(rng: np.random.Generator, escala: Escala, hoje: datetime) -> pd.DataFrame:
+    semanas = max(escala.dias // 7, 1)
+    aluno, semana = np.meshgrid(np.arange(1, escala.alunos + 1), np.arange(semanas), indexing="ij")
+    entregou = rng.random(aluno.shape) < 0.7
+    aluno, semana = aluno[entregou], semana[entregou]
+    n = len(aluno)
+
+    notas = rng.integers(2, 11, (n, 5)) * 20
+    df = pd.DataFrame({
+        "id_aluno": aluno,
+        "data": pd.Timestamp(hoje.date()) - pd.to_timedelta((semanas - 1 - semana) * 7, unit="D"),
+        "tema": np.array(TEMAS, dtype=object)[rng.integers(0, len(TEMAS), n)],
+    })
+    for i, c in enumerate(["c1", "c2", "c3", "c4", "c5"]):
+        df[c] = notas[:, i].astype(float)
+    df["total"] = notas.sum(axis=1).astype(float)
+    return df
+
+
+def gerar_dados(
+    escala: Escala, seed: int = 0, hoje: datetime | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Passa pela mesma normalização de utils.carregar_dados, com volume configurável
+    rng = np.random.default_rng(seed)
+    hoje = hoje or datetime.now()
+    return normalizar({
+        "alunos": _gerar_alunos(rng, escala),
+        "atividades": _gerar_atividades(rng, escala, hoje),
+        "simulados": _gerar_simulados(rng, escala, hoje),
+        "redacoes": _gerar_redacoes(rng, escala, hoje),
+    })[:4]
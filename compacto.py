@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# Modo compacto: menos bytes por rerun para quem acompanha pelo celular.
+# Os gráficos mantêm a aparência; o que sai é redundância (template inteiro, eixos padrão, casas decimais).
+
+CHAVE = "modo_compacto"
+_CASAS = 2
+_ARRAYS = ("x", "y", "z", "r", "base")
+_PADROES = {"xaxis": "x", "yaxis": "y", "orientation": "v", "textposition": "auto"}
+# Partes do layout do template que só valem para certos tipos de traço
+_SUBPLOTS = {
+    "polar": {"scatterpolar", "scatterpolargl", "barpolar"},
+    "ternary": {"scatterternary"},
+    "scene": {"scatter3d", "surface", "mesh3d"},
+    "geo": {"scattergeo", "choropleth"},
+}
+_SEM_USO = {"sliderdefaults", "updatemenudefaults"}
+
+
+def modo_compacto() -> bool:
+    return st.session_state.get(CHAVE, False)
+
+
+def render_opcao_compacto() -> None:
+    st.sidebar.toggle(
+        "📶 Modo compacto", key=CHAVE,
+        help="Envia menos dados a cada atualização: gráficos enxutos e só a aba aberta é desenhada.",
+    )
+
+
+def _podar_template(fig: go.Figure) -> None:
+    tipos = {t.type for t in fig.data}
+    template = fig.layout.template.to_plotly_json()
+    if not template:
+        return
+    layout = {
+        k: v for k, v in template.get("layout", {}).items()
+        if k not in _SEM_USO and (k not in _SUBPLOTS or _SUBPLOTS[k] & tipos)
+    }
+    dados = {k: v for k, v in template.get("data", {}).items() if k in tipos}
+    fig.layout.template = go.layout.Template(layout=layout, data=dados)
+
+
+def _compactar_array(valores):
+    arr = np.asarray(valores)
+    if arr.dtype.kind == "f":
+        return np.round(arr, _CASAS).astype(np.float32)
+    if arr.dtype.kind == "M":
+        dias = arr.astype("datetime64[D]")
+        if (arr == dias).all():
+            return np.datetime_as_string(dias, unit="D")
+    return valores
+
+
+def compactar_figura(fig: go.Figure) -> go.Figure:
+    _podar_template(fig)
+    for traco in fig.data:
+        for attr, padrao in _PADROES.items():
+            if attr in traco and traco[attr] == padrao:
+                traco[attr] = None
+        for attr in _ARRAYS:
+            if attr in traco and traco[attr] is not None:
+                traco[attr] = _compactar_array(traco[attr])
+    return fig
+
+
+def exibir_grafico(fig: go.Figure, **kwargs) -> None:
+    st.plotly_chart(compactar_figura(fig) if modo_compacto() else fig, **kwargs)
+
+
+def abas(rotulos: list[str], chave: str) -> list:
+    # st.tabs envia o conteúdo de todas as abas; no modo compacto só a escolhida é calculada
+    # e desenhada, e as demais voltam como None
+    if not modo_compacto():
+        return st.tabs(rotulos)
+    escolhida = st.radio("Aba", rotulos, horizontal=True, key=chave, label_visibility="collapsed")
+    return [st.container() if r == escolhida else None for r in rotulos]
+
+
+def _compactar_tabela(df: pd.DataFrame) -> pd.DataFrame:
+    # Textos repetidos viram categorias (dicionário no Arrow) e inteiros o menor tipo que os comporta
+    compacta = df.copy(deep=False)
+    for col in df.columns:
+        serie = df[col]
+        if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+            if serie.nunique() * 2 <= len(serie):
+                compacta[col] = serie.astype("category")
+        elif serie.dtype.kind == "i":
+            compacta[col] = pd.to_numeric(serie, downcast="integer")
+    return compacta
+
+
+def exibir_tabela(dados, **kwargs) -> None:
+    if modo_compacto() and isinstance(dados, pd.DataFrame):
+        dados = _compactar_tabela(dados)
+    st.dataframe(dados, **kwargs)
+
+
+def secao_recolhida(rotulo: str, chave: str):
+    # st.expander envia o conteúdo mesmo fechado; no modo compacto a seção só é montada quando aberta
+    if not modo_compacto():
+        return st.expander(rotulo)
+    return st.container() if st.toggle(rotulo, key=chave) else None
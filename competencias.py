@@ -0,0 +1,136 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from agregados import COMPETENCIAS
+from consultas import versao_dados, assinaturas_por_aluno, alunos_alterados
+from instrumentacao import medir
+
+_COLUNAS_ASSINATURA = ["data", *COMPETENCIAS, "total"]
+_SOMAS = COMPETENCIAS + ["total"]
+_TOP = 5
+_SEM_MES = -1  # redações sem data entram nas médias gerais, não na tendência mensal
+
+
+@medir
+def _celulas(df: pd.DataFrame) -> pd.DataFrame:
+    # Uma célula por aluno × mês, com somas e contagem: médias de qualquer recorte saem de somas
+    meses = df["data"].to_numpy().astype("datetime64[M]")
+    mes = np.where(np.isnat(meses), _SEM_MES, meses.astype(np.int64))
+    grupos = df.groupby([df["id_aluno"].to_numpy(), mes])
+    celulas = grupos[_SOMAS].sum()
+    celulas["n"] = grupos.size()
+    celulas.index.names = ["id_aluno", "mes"]
+    return celulas.reset_index()
+
+
+def _medias(somas: pd.DataFrame) -> pd.DataFrame:
+    return somas[_SOMAS].div(somas["n"].where(somas["n"] > 0), axis=0)
+
+
+class CuboCompetencias:
+    # Mentoria × aluno × mês × competência. As células são as de CuboIncremental; os recortes que
+    # os painéis pedem (turma, top 5, aluno, mês a mês) são somados aqui uma vez por versão,
+    # e cada rerun só faz buscas num dicionário.
+    def __init__(self, celulas: pd.DataFrame, mentorias: pd.Series):
+        celulas = celulas.assign(id_mentoria=celulas["id_aluno"].map(mentorias))
+        self._por_aluno: dict = {}
+        self._grupo: dict = {}
+        self._top: dict = {}
+        self._mensal: dict = {}
+        por_aluno = celulas.groupby("id_aluno")[_SOMAS + ["n"]].sum()
+        mentoria_aluno = por_aluno.index.map(mentorias)
+        for id_mentoria in [None, *pd.unique(mentoria_aluno.dropna())]:
+            dentro = (
+                np.ones(len(por_aluno), dtype=bool) if id_mentoria is None
+                else (mentoria_aluno == id_mentoria)
+            )
+            alunos = por_aluno[dentro]
+            self._por_aluno[id_mentoria] = alunos
+            self._grupo[id_mentoria] = self._medias_de(alunos)
+            top = (alunos["total"] / alunos["n"]).nlargest(_TOP).index
+            self._top[id_mentoria] = self._medias_de(alunos.loc[top])
+            do_grupo = celulas if id_mentoria is None else celulas[celulas["id_mentoria"] == id_mentoria]
+            self._mensal[id_mentoria] = self._por_mes(do_grupo.groupby("mes")[_SOMAS + ["n"]].sum())
+        self._medias_aluno = _medias(por_aluno)[COMPETENCIAS].fillna(0)
+        self._mensal_aluno = celulas.set_index(["id_aluno", "mes"])[_SOMAS + ["n"]].sort_index()
+
+    @staticmethod
+    def _medias_de(somas: pd.DataFrame) -> list[float]:
+        n = somas["n"].sum()
+        if not n:
+            return [0.0] * len(COMPETENCIAS)
+        return (somas[COMPETENCIAS].sum() / n).tolist()
+
+    @staticmethod
+    def _por_mes(somas: pd.DataFrame) -> pd.DataFrame:
+        somas = somas[somas.index != _SEM_MES]
+        mensal = _medias(somas)
+        mensal["n"] = somas["n"].astype(int)
+        mensal.index = pd.to_datetime(somas.index.to_numpy().astype("datetime64[M]")).rename("mes")
+        return mensal
+
+    def por_aluno(self, id_mentoria: int | None) -> pd.DataFrame:
+        return self._por_aluno.get(id_mentoria, self._por_aluno[None].iloc[:0])
+
+    def medias_grupo(self, id_mentoria: int | None) -> list[float]:
+        return self._grupo.get(id_mentoria, [0.0] * len(COMPETENCIAS))
+
+    def medias_top(self, id_mentoria: int | None) -> list[float]:
+        return self._top.get(id_mentoria, [0.0] * len(COMPETENCIAS))
+
+    def medias_aluno(self, id_aluno: int) -> list[float]:
+        if id_aluno not in self._medias_aluno.index:
+            return [0.0] * len(COMPETENCIAS)
+        return self._medias_aluno.loc[id_aluno].tolist()
+
+    def tendencia(self, id_mentoria: int | None, id_aluno: int | None = None) -> pd.DataFrame:
+        # Média de cada competência por mês, do aluno ou da turma (mentoria ou todas)
+        if id_aluno is None:
+            return self._mensal.get(id_mentoria, self._mensal[None].iloc[:0])
+        if id_aluno not in self._por_aluno[None].index:
+            return self._mensal[None].iloc[:0]
+        return self._por_mes(self._mensal_aluno.loc[id_aluno])
+
+
+class CuboIncremental:
+    # Mantém as células entre cargas e só reagrupa os alunos com redações novas, editadas ou removidas
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._assinaturas = pd.Series(dtype="uint64")
+        self._celulas = _celulas(
+            pd.DataFrame(columns=["id_aluno", "data", *_SOMAS])
+            .astype({"id_aluno": "int64", "data": "datetime64[ns]", **dict.fromkeys(_SOMAS, "float64")})
+        )
+        self.cubo = CuboCompetencias(self._celulas, pd.Series(dtype="float64"))
+        self.versao: str | None = None
+        self.reavaliados = 0
+
+    def atualizar(self, df_redacoes: pd.DataFrame, df_alunos: pd.DataFrame) -> CuboCompetencias:
+        # A mentoria vem do cadastro: trocar um aluno de mentoria muda a versão, não as células
+        versao = f"{versao_dados(df_redacoes)}|{versao_dados(df_alunos)}"
+        with self._trava:
+            if versao == self.versao:
+                return self.cubo
+            assinaturas = assinaturas_por_aluno(df_redacoes, _COLUNAS_ASSINATURA)
+            alterados, removidos = alunos_alterados(self._assinaturas, assinaturas)
+            novas = _celulas(df_redacoes[df_redacoes["id_aluno"].isin(alterados)])
+            mantidas = self._celulas[~self._celulas["id_aluno"].isin(alterados.union(removidos))]
+            self._celulas = pd.concat([mantidas, novas], ignore_index=True) if len(mantidas) else novas
+            self._assinaturas = assinaturas
+            mentorias = df_alunos.drop_duplicates("id_aluno").set_index("id_aluno")["id_mentoria"]
+            self.cubo = CuboCompetencias(self._celulas, mentorias)
+            self.versao, self.reavaliados = versao, len(alterados)
+            return self.cubo
+
+
+@st.cache_resource(show_spinner=False)
+def _cubo_incremental() -> CuboIncremental:
+    return CuboIncremental()
+
+
+def obter_cubo(df_redacoes: pd.DataFrame, df_alunos: pd.DataFrame) -> CuboCompetencias:
+    # Um só cubo para a base inteira (a mentoria é uma das dimensões): recebe os frames completos
+    return _cubo_incremental().atualizar(df_redacoes, df_alunos)
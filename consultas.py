@@ -0,0 +1,175 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from registro import RegistroAlunos, obter_registro
+from instrumentacao import medir
+
+MAPA_MENTORIAS = {1: "Estude com Danilo", 2: "Projeto Medicina"}
+ORDEM_MATERIAS = [
+    "Linguagens", "História", "Geografia", "Filo / Socio",
+    "Biologia", "Física", "Química", "Matemática",
+]
+MAX_COMPARACAO = 5
+
+
+@dataclass(frozen=True)
+class FiltroSpec:
+    id_mentoria: int | None = None
+    id_aluno: int | None = None
+    data_inicio: date | None = None
+    data_fim: date | None = None
+
+
+def versao_dados(df: pd.DataFrame) -> str:
+    return df.attrs.get("versao", "")
+
+
+def _dia(d: date) -> int:
+    return int(np.datetime64(d, "D").astype(np.int64))
+
+
+# --- Índices por versão dos dados ---
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _posicoes_por_aluno(versao: str, tabela: str, _df: pd.DataFrame) -> dict:
+    return _df.groupby("id_aluno", sort=False).indices
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def _indices_filtro(
+    versao: str, tabela: str,
+    id_mentoria: int | None, id_aluno: int | None,
+    data_inicio: date | None, data_fim: date | None,
+    _df: pd.DataFrame, _df_alunos: pd.DataFrame,
+) -> np.ndarray:
+    posicoes = _posicoes_por_aluno(versao, tabela, _df)
+    vazio = np.empty(0, dtype=np.intp)
+
+    if id_aluno is not None:
+        idx = posicoes.get(id_aluno, vazio)
+    else:
+        ids = obter_registro(_df_alunos).ids(id_mentoria)
+        partes = [posicoes[i] for i in ids if i in posicoes]
+        idx = np.sort(np.concatenate(partes)) if partes else vazio
+
+    return _recortar_periodo(_df, idx, data_inicio, data_fim)
+
+
+def _recortar_periodo(df: pd.DataFrame, idx: np.ndarray, data_inicio: date | None, data_fim: date | None) -> np.ndarray:
+    if data_inicio is None and data_fim is None:
+        return idx
+    dias = df["dia"].to_numpy()[idx]
+    manter = np.ones(len(idx), dtype=bool)
+    if data_inicio is not None:
+        manter &= dias >= _dia(data_inicio)
+    if data_fim is not None:
+        manter &= dias <= _dia(data_fim)
+    return idx[manter]
+
+
+def indices(df: pd.DataFrame, spec: FiltroSpec, df_alunos: pd.DataFrame) -> np.ndarray:
+    return _indices_filtro(
+        versao_dados(df), df.attrs.get("tabela", ""),
+        spec.id_mentoria, spec.id_aluno, spec.data_inicio, spec.data_fim,
+        df, df_alunos,
+    )
+
+
+@medir
+def filtrar(df: pd.DataFrame, spec: FiltroSpec, df_alunos: pd.DataFrame) -> pd.DataFrame:
+    return df.iloc[indices(df, spec, df_alunos)]
+
+
+@medir
+def filtrar_alunos(
+    df: pd.DataFrame, ids: list[int], data_inicio: date | None = None, data_fim: date | None = None
+) -> pd.DataFrame:
+    # Caminho em lote do modo comparação: as linhas de todos os alunos escolhidos saem de um único
+    # recorte sobre as posições por aluno da versão, sem um filtro completo por aluno
+    posicoes = _posicoes_por_aluno(versao_dados(df), df.attrs.get("tabela", ""), df)
+    partes = [posicoes[i] for i in ids if i in posicoes]
+    idx = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.intp)
+    return df.iloc[_recortar_periodo(df, idx, data_inicio, data_fim)]
+
+
+# --- Partições por mentoria ---
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _particao(versao: str, tabela: str, id_mentoria: int, _df: pd.DataFrame, _df_alunos: pd.DataFrame) -> pd.DataFrame:
+    if tabela == "alunos":
+        parte = _df[_df["id_aluno"].isin(obter_registro(_df_alunos).ids(id_mentoria))]
+    else:
+        parte = _df.iloc[_indices_filtro(versao, tabela, id_mentoria, None, None, None, _df, _df_alunos)]
+    # Cópia própria com versão derivada: índices, registro e agregados da partição ficam em cache à parte
+    parte = parte.reset_index(drop=True)
+    parte.attrs = {
+        "versao": f"{versao}/m{id_mentoria}", "tabela": tabela, "mentoria": id_mentoria,
+        "corte": _df.attrs.get("corte"),
+    }
+    return parte
+
+
+def particao(df: pd.DataFrame, df_alunos: pd.DataFrame, id_mentoria: int | None) -> pd.DataFrame:
+    # "Todas" continua nos dados completos; uma mentoria só enxerga as próprias linhas
+    if id_mentoria is None or df.attrs.get("mentoria") == id_mentoria:
+        return df
+    return _particao(versao_dados(df), df.attrs.get("tabela", ""), id_mentoria, df, df_alunos)
+
+
+def particoes(df: pd.DataFrame, df_alunos: pd.DataFrame, id_mentoria: int | None) -> list[pd.DataFrame]:
+    mentorias = [id_mentoria] if id_mentoria is not None else obter_registro(df_alunos).mentorias()
+    return [particao(df, df_alunos, m) for m in mentorias]
+
+
+# --- Mudanças por aluno entre cargas ---
+
+def assinaturas_por_aluno(df: pd.DataFrame, colunas: list[str]) -> pd.Series:
+    # Hash das linhas somado por aluno: muda sempre que uma linha do aluno entra, sai ou é editada
+    hashes = pd.util.hash_pandas_object(df[colunas], index=False)
+    return hashes.groupby(df["id_aluno"].to_numpy()).sum()
+
+
+def alunos_alterados(anteriores: pd.Series, atuais: pd.Series) -> tuple[pd.Index, pd.Index]:
+    comuns = anteriores.index.intersection(atuais.index)
+    mudaram = comuns[atuais.loc[comuns].to_numpy() != anteriores.loc[comuns].to_numpy()]
+    alterados = atuais.index.difference(anteriores.index).union(mudaram)
+    removidos = anteriores.index.difference(atuais.index)
+    return alterados, removidos
+
+
+# --- Sidebar ---
+
+def render_filtro_mentoria(registro: RegistroAlunos) -> int | None:
+    return st.sidebar.selectbox(
+        "Mentoria", [None] + registro.mentorias(),
+        format_func=lambda i: "Todas" if i is None else MAPA_MENTORIAS.get(i, f"Mentoria {i}"),
+    )
+
+
+def render_filtro_aluno(
+    registro: RegistroAlunos, id_mentoria: int | None, incluir_todos: bool, key: str | None = None
+) -> tuple[int | None, str]:
+    # Nomes repetidos recebem o id no rótulo para que a seleção nunca seja ambígua
+    rotulo = lambda i: "Todos" if i is None else registro.rotulo(i)
+    opcoes = ([None] if incluir_todos else []) + registro.ids(id_mentoria).tolist()
+    id_aluno = st.sidebar.selectbox("Mentorado", opcoes, format_func=rotulo, key=key)
+    return id_aluno, rotulo(id_aluno)
+
+
+def render_filtro_comparacao(registro: RegistroAlunos, id_mentoria: int | None, key: str) -> list[int]:
+    if not st.sidebar.toggle("👥 Comparar mentorados", key=f"{key}_ativo"):
+        return []
+    return st.sidebar.multiselect(
+        "Mentorados em comparação", registro.ids(id_mentoria).tolist(), format_func=registro.rotulo,
+        max_selections=MAX_COMPARACAO, key=key, placeholder=f"Escolha de 2 a {MAX_COMPARACAO}",
+    )
+
+
+def render_filtro_periodo(dias: int = 30) -> tuple[date, date]:
+    st.sidebar.markdown("Período de Análise")
+    hoje = datetime.now()
+    data_inicio = st.sidebar.date_input("Início", hoje - timedelta(days=dias), format="DD/MM/YYYY")
+    data_fim = st.sidebar.date_input("Fim", hoje, format="DD/MM/YYYY")
+    return data_inicio, data_fim
@@ -0,0 +1,204 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from arquivo import com_historico
+from consultas import versao_dados, assinaturas_por_aluno, alunos_alterados
+from instrumentacao import medir
+
+_COLUNAS_ASSINATURA = ["data", "materia", "conteudo", "acertos", "total"]
+
+# Mesma curva de _calcular_retencao: retenção = acertos_% × e^(-0.03 × dias)
+DECAIMENTO = 0.03
+LIMITE_RETENCAO = 70
+QUESTOES_POR_REVISAO = 10
+
+
+@medir
+def _triplas(df: pd.DataFrame) -> pd.DataFrame:
+    # Formato COO: uma linha por (aluno, conteúdo) efetivamente estudado
+    triplas = (
+        df.assign(dia=df["dia"].where(df["data"].notna()))
+        .groupby(["id_aluno", "materia", "conteudo"], sort=False)
+        .agg(acertos=("acertos", "sum"), total=("total", "sum"), ultimo_dia=("dia", "max"))
+        .reset_index()
+    )
+    # Dia em que a retenção projetada cruza o limite; quem já está abaixo vence no dia do último estudo.
+    # Só depende das linhas do próprio aluno, então é recalculado junto com as triplas alteradas.
+    perc = np.divide(
+        triplas["acertos"].to_numpy(dtype=float) * 100, triplas["total"].to_numpy(dtype=float),
+        out=np.zeros(len(triplas)), where=triplas["total"].to_numpy(dtype=float) > 0,
+    )
+    folga = np.log(np.maximum(perc, 1e-9) / LIMITE_RETENCAO) / DECAIMENTO
+    triplas["vence_dia"] = triplas["ultimo_dia"].to_numpy(dtype=float) + np.ceil(np.maximum(folga, 0))
+    return triplas
+
+
+class MatrizDominio:
+    # Aluno × conteúdo em colunas comprimidas (CSC): as entradas de cada conteúdo ficam contíguas,
+    # então recortar um conteúdo é uma fatia, sem pivot denso. Imutável: cada carga gera outra.
+    def __init__(self, triplas: pd.DataFrame):
+        conteudos = pd.MultiIndex.from_arrays([triplas["materia"], triplas["conteudo"]])
+        cod_conteudo, self.conteudos = conteudos.factorize(sort=True)
+        cod_aluno, self.alunos = pd.factorize(triplas["id_aluno"].to_numpy(), sort=True)
+
+        ordem = np.lexsort((cod_aluno, cod_conteudo))
+        self._linhas = cod_aluno[ordem]
+        self._acertos = triplas["acertos"].to_numpy(dtype=float)[ordem]
+        self._total = triplas["total"].to_numpy(dtype=float)[ordem]
+        self._ultimo_dia = triplas["ultimo_dia"].to_numpy(dtype=float)[ordem]
+        self._vence_dia = triplas["vence_dia"].to_numpy(dtype=float)[ordem]
+        contagem = np.bincount(cod_conteudo, minlength=len(self.conteudos))
+        self._inicio = np.concatenate([[0], np.cumsum(contagem)])
+
+    @property
+    def nnz(self) -> int:
+        return len(self._linhas)
+
+    def _fatia(self, j: int) -> slice:
+        return slice(self._inicio[j], self._inicio[j + 1])
+
+    def indice(self, materia: str, conteudo: str) -> int | None:
+        try:
+            return self.conteudos.get_loc((materia, conteudo))
+        except KeyError:
+            return None
+
+    def coluna(self, materia: str, conteudo: str) -> pd.DataFrame:
+        j = self.indice(materia, conteudo)
+        fatia = self._fatia(j) if j is not None else slice(0, 0)
+        acertos, total = self._acertos[fatia], self._total[fatia]
+        return pd.DataFrame({
+            "id_aluno": self.alunos[self._linhas[fatia]],
+            "acertos": acertos,
+            "total": total,
+            "%": np.divide(acertos * 100, total, out=np.zeros_like(acertos), where=total > 0),
+        })
+
+    def abaixo_de(self, materia: str, conteudo: str, limite: float) -> pd.DataFrame:
+        col = self.coluna(materia, conteudo)
+        return col[col["%"] < limite].sort_values("%")
+
+    def resumo_conteudos(self) -> pd.DataFrame:
+        # Somas por coluna direto dos vetores comprimidos (reduceat nos inícios de cada conteúdo)
+        inicios = self._inicio[:-1]
+        if not self.nnz:
+            return pd.DataFrame(columns=["alunos", "acertos", "total", "%"], index=self.conteudos)
+        acertos = np.add.reduceat(self._acertos, inicios)
+        total = np.add.reduceat(self._total, inicios)
+        return pd.DataFrame({
+            "alunos": np.diff(self._inicio),
+            "acertos": acertos,
+            "total": total,
+            "%": np.divide(acertos * 100, total, out=np.zeros_like(acertos), where=total > 0),
+        }, index=self.conteudos)
+
+    def submatriz(self, colunas: list[int]) -> pd.DataFrame:
+        # Densifica só o recorte pedido (alunos presentes × conteúdos escolhidos); ausência = NaN
+        partes = [np.arange(self._inicio[j], self._inicio[j + 1]) for j in colunas]
+        pos = np.concatenate(partes) if partes else np.empty(0, dtype=np.intp)
+        cod_col = np.repeat(np.arange(len(colunas)), [len(p) for p in partes])
+        linhas, cod_linha = np.unique(self._linhas[pos], return_inverse=True)
+
+        acertos = np.zeros((len(linhas), len(colunas)))
+        total = np.zeros((len(linhas), len(colunas)))
+        acertos[cod_linha, cod_col] = self._acertos[pos]
+        total[cod_linha, cod_col] = self._total[pos]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            perc = np.where(total > 0, acertos * 100 / total, np.nan)
+        return pd.DataFrame(perc, index=self.alunos[linhas], columns=self.conteudos[colunas])
+
+    def fila_revisoes(self, hoje: int, dias: int, orcamento: int) -> pd.DataFrame:
+        # Fila dia a dia para todos os alunos de uma vez. Cada revisão custa QUESTOES_POR_REVISAO,
+        # então o orçamento vira `vagas` por dia. Por aluno, em ordem de vencimento, a vaga da
+        # revisão i é s_i = max(s_{i-1} + 1, vence_i × vagas) = i + cummax(vence_j × vagas − j).
+        vagas = max(orcamento // QUESTOES_POR_REVISAO, 1)
+        valido = ~np.isnan(self._vence_dia)
+        coluna = np.repeat(np.arange(len(self.conteudos)), np.diff(self._inicio))[valido]
+        aluno = self._linhas[valido]
+        perc = np.divide(
+            self._acertos[valido] * 100, self._total[valido],
+            out=np.zeros(valido.sum()), where=self._total[valido] > 0,
+        )
+        ultimo = self._ultimo_dia[valido]
+        vence = np.maximum(self._vence_dia[valido] - hoje, 0).astype(np.int64)
+        retencao_hoje = perc * np.exp(-DECAIMENTO * (hoje - ultimo))
+
+        ordem = np.lexsort((retencao_hoje, vence, aluno))
+        aluno, coluna, vence = aluno[ordem], coluna[ordem], vence[ordem]
+        perc, ultimo = perc[ordem], ultimo[ordem]
+        inicio_aluno = np.flatnonzero(np.r_[True, aluno[1:] != aluno[:-1]])
+        i = np.arange(len(aluno)) - np.repeat(inicio_aluno, np.diff(np.r_[inicio_aluno, len(aluno)]))
+        vaga = i + pd.Series(vence * vagas - i).groupby(aluno).cummax().to_numpy()
+        dia = vaga // vagas
+
+        dentro = dia < dias
+        dia_abs = hoje + dia[dentro]
+        return pd.DataFrame({
+            "id_aluno": self.alunos[aluno[dentro]],
+            "materia": self.conteudos.get_level_values(0)[coluna[dentro]],
+            "conteudo": self.conteudos.get_level_values(1)[coluna[dentro]],
+            "data": pd.to_datetime(dia_abs, unit="D"),
+            "atraso": vence[dentro] == 0,
+            "retencao": perc[dentro] * np.exp(-DECAIMENTO * (dia_abs - ultimo[dentro])),
+            "questoes": QUESTOES_POR_REVISAO,
+        })
+
+
+class DominioIncremental:
+    # Mantém as triplas entre cargas e só reagrupa os alunos com linhas novas, editadas ou removidas
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._assinaturas = pd.Series(dtype="uint64")
+        self._triplas = _triplas(
+            pd.DataFrame(columns=["id_aluno", "data", "dia", "materia", "conteudo", "acertos", "total"])
+        )
+        self.matriz = MatrizDominio(self._triplas)
+        self.versao: str | None = None
+        self.reavaliados = 0
+
+    def atualizar(self, df_atividades: pd.DataFrame) -> MatrizDominio:
+        versao = versao_dados(df_atividades)
+        with self._trava:
+            if versao == self.versao:
+                return self.matriz
+            assinaturas = assinaturas_por_aluno(df_atividades, _COLUNAS_ASSINATURA)
+            alterados, removidos = alunos_alterados(self._assinaturas, assinaturas)
+            novas = _triplas(df_atividades[df_atividades["id_aluno"].isin(alterados)])
+            mantidas = self._triplas[~self._triplas["id_aluno"].isin(alterados.union(removidos))]
+            self._triplas = pd.concat([mantidas, novas], ignore_index=True) if len(mantidas) else novas
+            self._assinaturas = assinaturas
+            self.matriz = MatrizDominio(self._triplas)
+            self.versao, self.reavaliados = versao, len(alterados)
+            return self.matriz
+
+
+@st.cache_resource(show_spinner=False)
+def _dominios() -> dict:
+    return {}
+
+
+def obter_matriz(df_atividades: pd.DataFrame) -> MatrizDominio:
+    # Uma matriz por partição (mentoria), atualizada a cada nova versão dos dados.
+    # Conteúdos só estudados em meses arquivados entram pelo resumo do arquivo, então o frame
+    # não deve vir de estender(): a janela de uma sessão trocaria as assinaturas de todos os alunos.
+    df_atividades = com_historico(df_atividades)
+    dominios, chave = _dominios(), df_atividades.attrs.get("mentoria")
+    if chave not in dominios:
+        dominios.setdefault(chave, DominioIncremental())
+    return dominios[chave].atualizar(df_atividades)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _fila(versao: str, hoje: int, dias: int, orcamento: int, _matriz: MatrizDominio) -> pd.DataFrame:
+    return _matriz.fila_revisoes(hoje, dias, orcamento)
+
+
+def fila_revisoes(df_atividades: pd.DataFrame, hoje: date, dias: int, orcamento: int) -> pd.DataFrame:
+    # Fila da partição inteira, guardada por versão, dia e parâmetros: o rerun só recorta um aluno
+    matriz = obter_matriz(df_atividades)
+    dia = int(np.datetime64(hoje, "D").astype(np.int64))
+    return _fila(versao_dados(df_atividades), dia, dias, orcamento, matriz)
@@ -1,4 +1,18 @@
+import functools
+import os
+import re
+from typing import TYPE_CHECKING
+
 import streamlit as st
+import plotly.graph_objects as go  # já carregado pelo próprio streamlit
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Imagens pelo caminho do módulo: o app e os testes de carga podem rodar de qualquer diretório
+_PASTA = os.path.dirname(os.path.abspath(__file__))
+LOGO = os.path.join(_PASTA, "logo.png")
+ICONE = os.path.join(_PASTA, "icon.jpg")
 
 _CSS_GLOBAL = """
 <style>
@@ -24,5 +38,46 @@ div[data-testid="stMetricValue"] {
 """
 
 
+@functools.lru_cache(maxsize=None)
+def _minificar(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    return re.sub(r"\s*([{};:,>])\s*", r"\1", re.sub(r"\s+", " ", css)).strip()
+
+
+def aplicar_css(css: str) -> None:
+    # O bloco volta a cada rerun; minificado, e a partir de 256 bytes o navegador o guarda em cache
+    # e recebe só o hash (global.minCachedMessageSize em .streamlit/config.toml)
+    st.markdown(_minificar(css), unsafe_allow_html=True)
+
+
 def aplicar_estilos() -> None:
-    st.markdown(_CSS_GLOBAL, unsafe_allow_html=True)
+    aplicar_css(_CSS_GLOBAL)
+
+
+# Uma cor por aluno no modo comparação (até consultas.MAX_COMPARACAO)
+CORES_COMPARACAO = ["#c00000", "#1f77b4", "#2ca02c", "#ff7f0e", "#9467bd"]
+
+
+def adicionar_faixas(fig: go.Figure, faixas: "pd.DataFrame", sufixo: str = "", forma: str = "linear") -> None:
+    # Leque da turma (p10–p90 e p25–p75, mediana pontilhada) desenhado atrás dos traços do aluno
+    if faixas.empty:
+        return
+    n_antes = len(fig.data)
+    for baixo, alto, cor, nome in [
+        ("p10", "p90", "rgba(255,255,255,0.07)", "Turma p10–p90"),
+        ("p25", "p75", "rgba(255,255,255,0.14)", "Turma p25–p75"),
+    ]:
+        fig.add_trace(go.Scatter(
+            x=faixas.index, y=faixas[alto], mode="lines", line=dict(width=0, shape=forma),
+            hoverinfo="skip", showlegend=False,
+        ))
+        fig.add_trace(go.Scatter(
+            x=faixas.index, y=faixas[baixo], mode="lines", line=dict(width=0, shape=forma),
+            fill="tonexty", fillcolor=cor, name=nome, hoverinfo="skip",
+        ))
+    fig.add_trace(go.Scatter(
+        x=faixas.index, y=faixas["p50"], mode="lines", name="Mediana da Turma",
+        line=dict(color="rgba(255,255,255,0.45)", dash="dot", width=1.5, shape=forma),
+        hovertemplate=f"Mediana da turma: %{{y:.0f}}{sufixo}<extra></extra>",
+    ))
+    fig.data = fig.data[n_antes:] + fig.data[:n_antes]
@@ -0,0 +1,189 @@
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+# pandas e numpy só são importados nas funções que recebem dados: a tela de login não paga esse custo
+
+# Desligado por padrão: com MENTORIA_PERFIL vazio, medir() devolve a própria função
+ATIVO = os.environ.get("MENTORIA_PERFIL", "") not in ("", "0")
+_ARQUIVO = os.environ.get("MENTORIA_PERFIL_ARQUIVO", "metricas_perfil.jsonl")
+
+# Cada sessão roda o script na sua própria thread: um buffer por thread é um buffer por rerun
+_rerun = threading.local()
+
+
+def _linhas(valores) -> int:
+    import pandas as pd
+    return sum(len(v) for v in valores if isinstance(v, (pd.DataFrame, pd.Series)))
+
+
+def _bytes(resultado) -> int:
+    import numpy as np
+    import pandas as pd
+    if isinstance(resultado, pd.DataFrame):
+        return int(resultado.memory_usage(index=False).sum())
+    if isinstance(resultado, pd.Series):
+        return int(resultado.memory_usage(index=False))
+    if isinstance(resultado, np.ndarray):
+        return int(resultado.nbytes)
+    if isinstance(resultado, (tuple, list)):
+        return sum(_bytes(r) for r in resultado)
+    return 0
+
+
+def registrar(secao: str, segundos: float, linhas: int = 0, bytes_: int = 0) -> None:
+    medicoes = getattr(_rerun, "medicoes", None)
+    if medicoes is None:
+        return
+    medicoes.append({"secao": secao, "ms": segundos * 1000, "linhas": linhas, "bytes": bytes_})
+
+
+def medir(func):
+    if not ATIVO:
+        return func
+    secao = f"{func.__module__}.{func.__name__}"
+
+    @functools.wraps(func)
+    def medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = func(*args, **kwargs)
+        registrar(
+            secao, time.perf_counter() - inicio,
+            linhas=_linhas(list(args) + list(kwargs.values())), bytes_=_bytes(resultado),
+        )
+        return resultado
+
+    # Preserva carregar_dados.clear() e afins das funções em cache
+    if hasattr(func, "clear"):
+        medido.clear = func.clear
+    return medido
+
+
+# --- Payload enviado ao navegador ---
+
+def _tipo_mensagem(msg) -> str:
+    tipo = msg.WhichOneof("type")
+    if tipo == "delta":
+        tipo = msg.delta.WhichOneof("type")
+        if tipo == "new_element":
+            return msg.delta.new_element.WhichOneof("type")
+    return tipo or "outro"
+
+
+def _medir_payload() -> None:
+    # Envolve a fila de saída da sessão uma única vez: cada ForwardMsg soma o seu tamanho serializado
+    # ao rerun corrente. Mensagens já em cache no navegador chegam como "ref_hash" (só o hash).
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or getattr(ctx._enqueue, "medido", False):
+        return
+    enviar = ctx._enqueue
+
+    def medido(msg):
+        payload = getattr(_rerun, "payload", None)
+        if payload is not None:
+            tipo = _tipo_mensagem(msg)
+            payload[tipo] = payload.get(tipo, 0) + msg.ByteSize()
+        enviar(msg)
+
+    medido.medido = True
+    ctx._enqueue = medido
+
+
+# --- Ciclo do rerun ---
+
+def iniciar_rerun() -> None:
+    if ATIVO:
+        _rerun.medicoes = []
+        _rerun.payload = {}
+        _rerun.inicio = time.perf_counter()
+        _medir_payload()
+
+
+def finalizar_rerun(painel: str = "") -> dict | None:
+    medicoes = getattr(_rerun, "medicoes", None)
+    if not ATIVO or medicoes is None:
+        return None
+    total = (time.perf_counter() - _rerun.inicio) * 1000
+    payload, _rerun.medicoes, _rerun.payload = _rerun.payload, None, None
+    registro = {
+        "instante": datetime.now().isoformat(timespec="seconds"),
+        "painel": painel,
+        "total_ms": total,
+        "payload_bytes": sum(payload.values()),
+        "payload": payload,
+        "secoes": medicoes,
+    }
+    if _ARQUIVO.endswith(".prom"):
+        _escrever_prometheus(registro)
+    else:
+        with open(_ARQUIVO, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    return registro
+
+
+def _escrever_prometheus(registro: dict) -> None:
+    # Formato textfile do node_exporter: reescrito a cada rerun com os valores mais recentes
+    agregado: dict[str, list[float]] = {}
+    for m in registro["secoes"]:
+        soma = agregado.setdefault(m["secao"], [0.0, 0, 0])
+        soma[0] += m["ms"] / 1000
+        soma[1] += m["linhas"]
+        soma[2] += m["bytes"]
+
+    linhas = [
+        "# TYPE mentoria_rerun_segundos gauge",
+        f'mentoria_rerun_segundos{{painel="{registro["painel"]}"}} {registro["total_ms"] / 1000:.6f}',
+        "# TYPE mentoria_rerun_payload_bytes gauge",
+        f'mentoria_rerun_payload_bytes{{painel="{registro["painel"]}"}} {registro["payload_bytes"]}',
+    ]
+    for i, metrica in enumerate(["segundos", "linhas", "bytes"]):
+        linhas.append(f"# TYPE mentoria_secao_{metrica} gauge")
+        linhas += [
+            f'mentoria_secao_{metrica}{{secao="{secao}"}} {valores[i]:g}'
+            for secao, valores in agregado.items()
+        ]
+    temporario = _ARQUIVO + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+    os.replace(temporario, _ARQUIVO)
+
+
+# --- Painel ---
+
+def usuario_admin() -> bool:
+    try:
+        admins = st.secrets.get("perfil", {}).get("admins", [])
+    except FileNotFoundError:
+        admins = []
+    return st.session_state.get("username") in admins
+
+
+def render_painel(registro: dict | None) -> None:
+    if registro is None or not usuario_admin():
+        return
+    import pandas as pd
+    with st.sidebar.expander("⏱️ Perfil do Rerun"):
+        c1, c2 = st.columns(2)
+        c1.metric("Tempo do Rerun", f"{registro['total_ms']:.0f} ms")
+        c2.metric("Payload", f"{registro['payload_bytes'] / 1024:.1f} KB")
+        payload = pd.Series(registro["payload"], name="bytes").sort_values(ascending=False)
+        st.dataframe(payload.rename_axis("elemento").reset_index(), hide_index=True, width="stretch")
+        if not registro["secoes"]:
+            st.caption("Nenhuma seção medida neste rerun.")
+            return
+        # Seções aninhadas (um _render_* que chama um _calcular_*) aparecem nas duas linhas
+        df = (
+            pd.DataFrame(registro["secoes"])
+            .groupby("secao", sort=False)
+            .agg(chamadas=("ms", "size"), ms=("ms", "sum"), linhas=("linhas", "sum"), bytes=("bytes", "sum"))
+            .sort_values("ms", ascending=False)
+            .reset_index()
+        )
+        st.dataframe(df.round({"ms": 1}), hide_index=True, width="stretch")
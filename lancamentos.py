@@ -0,0 +1,355 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+import pandas as pd
+import streamlit as st
+
+from consultas import ORDEM_MATERIAS, versao_dados
+from registro import obter_registro
+from utils import COLUNA_LANCAMENTO, abrir_aba, normalizar_registros, origem_local
+
+# Lançamentos feitos no app: cada envio de formulário vai para uma fila local durável (JSONL) e entra
+# na hora nos dados em memória, com versão nova, sem recarregar a planilha. Uma thread grava a fila
+# na origem em lotes (append_rows por aba), com novas tentativas; o que não foi gravado sobrevive a
+# um reinício do app e é reenviado. Cada linha leva o id do lançamento (COLUNA_LANCAMENTO): é por ele
+# que um reenvio não duplica linhas e que a fila só solta um lançamento quando uma carga o traz.
+FILA_ENV = "MENTORIA_FILA"
+_PASTA_PADRAO = "fila_lancamentos"
+_ARQUIVO_FILA = "fila.jsonl"
+_INTERVALO_ENVIO = 30  # segundos entre lotes
+_LOTE = 20  # linhas pendentes que antecipam o próximo lote
+_TENTATIVAS = 5
+_ESPERA_INICIAL = 1.0
+_COLUNAS = {
+    "atividades": ["id_aluno", "data", "materia", "conteudo", "acertos", "total"],
+    "simulados": ["id_aluno", "data", "tipo", "numero", "ano", "area", "acertos", "total"],
+    "redacoes": ["id_aluno", "data", "tema", "c1", "c2", "c3", "c4", "c5", "total"],
+}
+_AREAS = ["Linguagens", "Humanas", "Natureza", "Matemática"]
+_QUESTOES_POR_AREA = 45
+_COMPETENCIAS = ["c1", "c2", "c3", "c4", "c5"]
+
+
+# --- Origem dos dados ---
+
+class DestinoPlanilha:
+    def __init__(self):
+        self._abas: dict = {}
+        self._cabecalhos: dict[str, list[str]] = {}
+
+    def _aba(self, tabela: str):
+        if tabela not in self._abas:
+            aba = abrir_aba(tabela)
+            cabecalho = aba.row_values(1)
+            if COLUNA_LANCAMENTO not in cabecalho:
+                # Primeira gravação do app nesta aba: a coluna do id entra no fim do cabeçalho
+                if aba.col_count <= len(cabecalho):
+                    aba.add_cols(1)
+                aba.update_cell(1, len(cabecalho) + 1, COLUNA_LANCAMENTO)
+                cabecalho = cabecalho + [COLUNA_LANCAMENTO]
+            self._abas[tabela], self._cabecalhos[tabela] = aba, cabecalho
+        return self._abas[tabela]
+
+    def ids(self, tabela: str) -> set[str]:
+        aba = self._aba(tabela)
+        return set(aba.col_values(self._cabecalhos[tabela].index(COLUNA_LANCAMENTO) + 1)[1:])
+
+    def anexar(self, tabela: str, linhas: list[dict]) -> None:
+        # Uma chamada por aba e lote; colunas na ordem do cabeçalho da planilha. RAW: conteúdo e tema são
+        # texto livre ("=..." viraria fórmula, "3/4" viraria data); números já vão tipados e a data vai
+        # em ISO, que a carga lê do mesmo jeito
+        aba = self._aba(tabela)
+        cabecalho = self._cabecalhos[tabela]
+        aba.append_rows([[linha.get(col, "") for col in cabecalho] for linha in linhas], value_input_option="RAW")
+
+
+class DestinoLocal:
+    # Snapshot local no lugar da planilha (MENTORIA_DADOS_LOCAIS): testes e uso offline
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+
+    def ids(self, tabela: str) -> set[str]:
+        df = pd.read_pickle(os.path.join(self.pasta, f"{tabela}.pkl"))
+        return set(df[COLUNA_LANCAMENTO].dropna().astype(str)) if COLUNA_LANCAMENTO in df else set()
+
+    def anexar(self, tabela: str, linhas: list[dict]) -> None:
+        caminho = os.path.join(self.pasta, f"{tabela}.pkl")
+        existente = pd.read_pickle(caminho)
+        novas = pd.DataFrame(linhas)
+        if "data" in existente and pd.api.types.is_datetime64_any_dtype(existente["data"]):
+            novas["data"] = pd.to_datetime(novas["data"])
+        combinado = pd.concat([existente, novas], ignore_index=True)
+        combinado.to_pickle(f"{caminho}.tmp")
+        os.replace(f"{caminho}.tmp", caminho)
+
+
+def _gravar(destino, tabela: str, linhas: list[dict]) -> None:
+    # Cota da API (429) e falhas de rede passam sozinhas: espera dobrada a cada tentativa. Um append que
+    # estourou o tempo (ou um envio interrompido por um reinício) pode ter entrado mesmo assim, então
+    # antes de cada tentativa saem do lote as linhas cujo id já está na origem.
+    for tentativa in range(_TENTATIVAS):
+        try:
+            gravados = destino.ids(tabela)
+            faltam = [linha for linha in linhas if linha[COLUNA_LANCAMENTO] not in gravados]
+            if faltam:
+                destino.anexar(tabela, faltam)
+            return
+        except Exception:
+            if tentativa == _TENTATIVAS - 1:
+                raise
+            time.sleep(_ESPERA_INICIAL * 2 ** tentativa)
+
+
+# --- Fila durável ---
+
+class FilaLancamentos:
+    def __init__(self, pasta: str, destino):
+        self.pasta = pasta
+        self.destino = destino
+        self._caminho = os.path.join(pasta, _ARQUIVO_FILA)
+        self._trava = threading.Lock()
+        self._envio = threading.Lock()
+        self._acordar = threading.Event()
+        self.ultimo_erro: str | None = None
+        self._entradas: list[dict] = []
+        if os.path.exists(self._caminho):
+            with open(self._caminho, encoding="utf-8") as f:
+                self._entradas = [json.loads(linha) for linha in f if linha.strip()]
+
+    def adicionar(self, tabela: str, linhas: list[dict]) -> dict:
+        id_lancamento = uuid.uuid4().hex
+        entrada = {
+            "id": id_lancamento, "tabela": tabela,
+            "linhas": [{**linha, COLUNA_LANCAMENTO: id_lancamento} for linha in linhas],
+            "criado": datetime.now().isoformat(), "enviado": None,
+        }
+        with self._trava:
+            # Acrescentada e sincronizada no disco antes de aparecer na tela
+            os.makedirs(self.pasta, exist_ok=True)
+            with open(self._caminho, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._entradas.append(entrada)
+            if sum(len(e["linhas"]) for e in self._entradas if e["enviado"] is None) >= _LOTE:
+                self._acordar.set()
+        return entrada
+
+    def _regravar(self) -> None:
+        with open(f"{self._caminho}.tmp", "w", encoding="utf-8") as f:
+            for entrada in self._entradas:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{self._caminho}.tmp", self._caminho)
+
+    def pendentes(self) -> list[dict]:
+        with self._trava:
+            return [e for e in self._entradas if e["enviado"] is None]
+
+    def entradas(self) -> list[dict]:
+        with self._trava:
+            return list(self._entradas)
+
+    def podar(self, lidos: frozenset[str]) -> None:
+        # Só sai da fila o lançamento que uma carga trouxe de volta da origem: enviado e lido.
+        # Um envio concluído durante a leitura da planilha continua na fila até a carga seguinte.
+        with self._trava:
+            mantidas = [e for e in self._entradas if e["id"] not in lidos]
+            if len(mantidas) < len(self._entradas):
+                self._entradas = mantidas
+                self._regravar()
+
+    def enviar(self) -> int:
+        # Um append_rows por aba com tudo o que está pendente; uma aba que falha não segura as outras
+        with self._envio:
+            por_tabela: dict[str, list[dict]] = {}
+            for entrada in self.pendentes():
+                por_tabela.setdefault(entrada["tabela"], []).append(entrada)
+            enviadas, erros = 0, []
+            for tabela, entradas in por_tabela.items():
+                linhas = [linha for e in entradas for linha in e["linhas"]]
+                try:
+                    _gravar(self.destino, tabela, linhas)
+                except Exception as e:
+                    erros.append(f"{tabela}: {e}")
+                    continue
+                agora = datetime.now().isoformat()
+                ids = {e["id"] for e in entradas}
+                with self._trava:
+                    for entrada in self._entradas:
+                        if entrada["id"] in ids:
+                            entrada["enviado"] = agora
+                    self._regravar()
+                enviadas += len(linhas)
+            self.ultimo_erro = "; ".join(erros) or None
+            return enviadas
+
+    def acordar(self) -> None:
+        self._acordar.set()
+
+    def _laco(self) -> None:
+        while True:
+            self._acordar.wait(_INTERVALO_ENVIO)
+            self._acordar.clear()
+            if self.pendentes():
+                self.enviar()
+
+
+@st.cache_resource(show_spinner=False)
+def obter_fila() -> FilaLancamentos:
+    pasta_local = origem_local()
+    destino = DestinoLocal(pasta_local) if pasta_local else DestinoPlanilha()
+    fila = FilaLancamentos(os.environ.get(FILA_ENV, _PASTA_PADRAO), destino)
+    # Uma thread por processo; o que ficou pendente de uma execução anterior sai no primeiro lote
+    threading.Thread(target=fila._laco, daemon=True).start()
+    if fila.pendentes():
+        fila.acordar()
+    return fila
+
+
+# --- Dados em memória ---
+
+def _assinatura(entradas: list[dict]) -> str:
+    return hashlib.sha1("".join(e["id"] for e in entradas).encode()).hexdigest()[:10]
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _mesclado(versao: str, assinatura: str, _dados: tuple, _entradas: list[dict]) -> tuple:
+    df_alunos, *tabelas = _dados
+    ids_validos = df_alunos["id_aluno"].to_numpy()
+    resultado = [df_alunos]
+    for tabela, df in zip(["atividades", "simulados", "redacoes"], tabelas):
+        entradas = [e for e in _entradas if e["tabela"] == tabela]
+        if not entradas:
+            # Tabela sem lançamentos mantém frame e versão: índices e agregados dela seguem em cache
+            resultado.append(df)
+            continue
+        linhas = [linha for e in entradas for linha in e["linhas"]]
+        novas, _ = normalizar_registros(tabela, pd.DataFrame(linhas), ids_validos)
+        mesclado = pd.concat([df, novas], ignore_index=True)
+        if tabela == "redacoes":
+            mesclado = mesclado.sort_values("data", kind="stable").reset_index(drop=True)
+        mesclado.attrs = {**df.attrs, "versao": f"{versao_dados(df)}+l{_assinatura(entradas)}"}
+        resultado.append(mesclado)
+    return tuple(resultado)
+
+
+def com_lancamentos(dados: tuple, lidos: frozenset[str]) -> tuple:
+    # Base carregada mais os lançamentos que ela ainda não contém (`lidos`: ids que a carga trouxe);
+    # sem nenhum, a própria base
+    fila = obter_fila()
+    fila.podar(lidos)
+    entradas = fila.entradas()
+    if not entradas:
+        return dados
+    return _mesclado(versao_dados(dados[0]), _assinatura(entradas), dados, entradas)
+
+
+# --- Formulários ---
+
+def _data(valor: date) -> str:
+    return valor.isoformat()
+
+
+def _linhas_atividade(estado, id_aluno: int) -> list[dict]:
+    return [{
+        "id_aluno": id_aluno, "data": _data(estado["lanc_data"]), "materia": estado["lanc_materia"],
+        "conteudo": estado["lanc_conteudo"].strip(), "acertos": estado["lanc_acertos"], "total": estado["lanc_total"],
+    }]
+
+
+def _linhas_simulado(estado, id_aluno: int) -> list[dict]:
+    return [
+        {
+            "id_aluno": id_aluno, "data": _data(estado["lanc_data"]), "tipo": estado["lanc_tipo"].strip(),
+            "numero": estado["lanc_numero"], "ano": estado["lanc_ano"], "area": area,
+            "acertos": estado[f"lanc_area_{area}"], "total": _QUESTOES_POR_AREA,
+        }
+        for area in estado["lanc_areas"]
+    ]
+
+
+def _linhas_redacao(estado, id_aluno: int) -> list[dict]:
+    notas = {c: estado[f"lanc_{c}"] for c in _COMPETENCIAS}
+    return [{
+        "id_aluno": id_aluno, "data": _data(estado["lanc_data"]), "tema": estado["lanc_tema"].strip(),
+        **notas, "total": sum(notas.values()),
+    }]
+
+
+_TIPOS = {
+    "Atividade": ("atividades", _linhas_atividade),
+    "Simulado": ("simulados", _linhas_simulado),
+    "Redação": ("redacoes", _linhas_redacao),
+}
+
+
+def _validar(tabela: str, linhas: list[dict]) -> str | None:
+    if not linhas:
+        return "Escolha ao menos uma área."
+    if tabela == "atividades" and not linhas[0]["conteudo"]:
+        return "Informe o conteúdo."
+    if tabela == "atividades" and linhas[0]["acertos"] > linhas[0]["total"]:
+        return "Acertos maior que o total de questões."
+    if tabela == "simulados" and not linhas[0]["tipo"]:
+        return "Informe o tipo do simulado."
+    return None
+
+
+def _lancar(tipo: str) -> None:
+    # Callback do formulário: roda antes do rerun, então a própria execução já mostra o lançamento
+    estado = st.session_state
+    tabela, montar = _TIPOS[tipo]
+    linhas = montar(estado, estado["lanc_aluno"])
+    erro = _validar(tabela, linhas)
+    if erro:
+        estado["lanc_aviso"] = ("erro", erro)
+        return
+    obter_fila().adicionar(tabela, [{col: linha[col] for col in _COLUNAS[tabela]} for linha in linhas])
+    estado["lanc_aviso"] = ("ok", f"{len(linhas)} linha(s) de {tipo.lower()} registrada(s).")
+
+
+def render_lancamentos(df_alunos: pd.DataFrame) -> None:
+    registro = obter_registro(df_alunos)
+    fila = obter_fila()
+    with st.sidebar.expander("📝 Novo Lançamento"):
+        tipo = st.radio("Registro", list(_TIPOS), horizontal=True, key="lanc_tipo_registro")
+        with st.form("lanc_form", clear_on_submit=True, border=False):
+            st.selectbox("Mentorado", registro.ids().tolist(), format_func=registro.rotulo, key="lanc_aluno")
+            st.date_input("Data", value=date.today(), format="DD/MM/YYYY", key="lanc_data")
+            if tipo == "Atividade":
+                st.selectbox("Matéria", ORDEM_MATERIAS, key="lanc_materia")
+                st.text_input("Conteúdo", key="lanc_conteudo")
+                st.number_input("Acertos", min_value=0, step=1, key="lanc_acertos")
+                st.number_input("Total de questões", min_value=1, value=10, step=1, key="lanc_total")
+            elif tipo == "Simulado":
+                st.text_input("Tipo", key="lanc_tipo", placeholder="ex.: ENEM, SAS")
+                st.number_input("Número", min_value=1, step=1, key="lanc_numero")
+                st.number_input("Ano", min_value=2000, value=date.today().year, step=1, key="lanc_ano")
+                st.multiselect("Áreas feitas", _AREAS, default=_AREAS, key="lanc_areas")
+                for area in _AREAS:
+                    st.number_input(
+                        f"Acertos {area}", min_value=0, max_value=_QUESTOES_POR_AREA, step=1, key=f"lanc_area_{area}",
+                    )
+            else:
+                st.text_input("Tema", key="lanc_tema")
+                for i, c in enumerate(_COMPETENCIAS, start=1):
+                    st.number_input(f"C{i}", min_value=0, max_value=200, step=20, key=f"lanc_{c}")
+            st.form_submit_button("Registrar", on_click=_lancar, args=(tipo,), width="stretch")
+
+        aviso = st.session_state.pop("lanc_aviso", None)
+        if aviso is not None:
+            (st.success if aviso[0] == "ok" else st.error)(aviso[1])
+
+        pendentes = sum(len(e["linhas"]) for e in fila.pendentes())
+        if pendentes:
+            st.caption(f"⏳ {pendentes} linha(s) aguardando envio à planilha.")
+            st.button("📤 Enviar agora", on_click=fila.acordar, key="lanc_enviar")
+        if fila.ultimo_erro:
+            st.warning(f"Último envio falhou e será repetido: {fila.ultimo_erro}")
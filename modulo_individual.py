@@ -4,13 +4,17 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-
-ORDEM_MATERIAS = [
-    "Linguagens", "História", "Geografia", "Filo / Socio",
-    "Biologia", "Física", "Química", "Matemática",
-]
-
-MAPA_MENTORIAS = {1: "Estude com Danilo", 2: "Projeto Medicina"}
+from consultas import (
+    ORDEM_MATERIAS, FiltroSpec, filtrar, filtrar_alunos, particao,
+    render_filtro_mentoria, render_filtro_aluno, render_filtro_comparacao, render_filtro_periodo,
+)
+from agregados import somas_por_materia, faixas_diarias
+from estilos import CORES_COMPARACAO, LOGO, adicionar_faixas, aplicar_css
+from compacto import abas, exibir_grafico, exibir_tabela, secao_recolhida
+from dominio import obter_matriz, fila_revisoes, LIMITE_RETENCAO
+from registro import RegistroAlunos, obter_registro
+from instrumentacao import medir
+from arquivo import anterior, chave, com_historico, estender
 
 _CSS_MODULO = """
 <style>
@@ -49,6 +53,7 @@ _CSS_MODULO = """
 
 # --- Cálculos ---
 
+@medir
 def _calcular_tendencia(df_diario: pd.DataFrame) -> tuple[str, str, np.ndarray | None]:
     if len(df_diario) <= 1:
         return "#333", "Sem Dados", None
@@ -64,11 +69,9 @@ def _calcular_tendencia(df_diario: pd.DataFrame) -> tuple[str, str, np.ndarray |
     return "#6c757d", "Estável", linha
 
 
-def _calcular_streak(df_atividades: pd.DataFrame, id_aluno: int, hoje: datetime) -> int:
-    datas_unicas = sorted(
-        df_atividades[df_atividades["id_aluno"] == id_aluno]["data"].dt.date.unique(),
-        reverse=True,
-    )
+@medir
+def _calcular_streak(df_aluno: pd.DataFrame, hoje: datetime) -> int:
+    datas_unicas = sorted(df_aluno["data"].dt.date.unique(), reverse=True)
     streak, ref = 0, hoje.date()
     for d in datas_unicas:
         if d == ref or d == ref - timedelta(days=1):
@@ -79,23 +82,28 @@ def _calcular_streak(df_atividades: pd.DataFrame, id_aluno: int, hoje: datetime)
     return streak
 
 
-def _calcular_hiato(
-    df_atividades: pd.DataFrame, id_aluno: int, hoje: datetime
-) -> tuple[str, int, str] | None:
-    materias_estudadas = df_atividades[df_atividades["id_aluno"] == id_aluno]["materia"].unique()
+def _streak_do_aluno(df_atividades: pd.DataFrame, df_alunos: pd.DataFrame, id_aluno: int, hoje: datetime) -> int:
+    # Dias de verdade (o resumo dos meses arquivados não serve): recua um mês arquivado por vez
+    # enquanto a sequência chega ao corte
+    df = df_atividades
+    while True:
+        df_aluno = filtrar(df, FiltroSpec(id_aluno=id_aluno), df_alunos)
+        streak = _calcular_streak(df_aluno, hoje)
+        corte = df.attrs.get("corte")
+        if not streak or corte is None:
+            return streak
+        inicio = df_aluno["data"].max().normalize() - pd.Timedelta(days=streak - 1)
+        if inicio > pd.Timestamp(corte) or (df := anterior(df)) is None:
+            return streak
+
+
+@medir
+def _calcular_hiato(df_aluno: pd.DataFrame, hoje: datetime) -> tuple[str, int, str] | None:
+    ultima_por_materia = df_aluno.groupby("materia")["data"].max()
     registros = [
-        {
-            "Matéria": m,
-            "Dias": (
-                hoje
-                - df_atividades[
-                    (df_atividades["id_aluno"] == id_aluno)
-                    & (df_atividades["materia"] == m)
-                ]["data"].max()
-            ).days,
-        }
+        {"Matéria": m, "Dias": (hoje - ultima_por_materia[m]).days}
         for m in ORDEM_MATERIAS
-        if m in materias_estudadas
+        if m in ultima_por_materia.index
     ]
     if not registros:
         return None
@@ -105,55 +113,160 @@ def _calcular_hiato(
     return critica["Matéria"], int(critica["Dias"]), cor
 
 
+@medir
 def _calcular_retencao(
     df_cont: pd.DataFrame, dados_filtrado: pd.DataFrame, hoje: datetime
 ) -> pd.DataFrame:
-    # Curva de Ebbinghaus: retenção = acertos_% × e^(-0.03 × dias)
-    df_ret = df_cont.copy()
-    for idx, row in df_ret.iterrows():
-        ultima_data = dados_filtrado[dados_filtrado["conteudo"] == row["conteudo"]]["data"].max()
-        dias = (hoje - ultima_data).days
-        df_ret.at[idx, "Retenção"] = row["%"] * np.exp(-0.03 * dias)
+    # Curva de Ebbinghaus: retenção = acertos_% × e^(-0.03 × dias); último estudo por conteúdo num só groupby
+    ultimas = dados_filtrado.groupby("conteudo")["data"].max().rename("ultima_data")
+    df_ret = df_cont.merge(ultimas, left_on="conteudo", right_index=True, how="left")
+    dias = (pd.Timestamp(hoje) - df_ret.pop("ultima_data")).dt.days
+    df_ret["Retenção"] = df_ret["%"] * np.exp(-0.03 * dias)
     return df_ret
 
 
-# --- Sidebar ---
+def _percentual_por_materia(somas: pd.DataFrame) -> pd.Series:
+    perc = (somas["acertos"] / somas["total"] * 100).where(somas["total"] > 0, 0)
+    return perc.reindex(ORDEM_MATERIAS).fillna(0)
 
-def _render_filtros_sidebar(df_alunos: pd.DataFrame) -> tuple[int, str, str, object, object]:
-    st.sidebar.subheader("Configurações de Análise")
 
-    mapa_ids = {v: k for k, v in MAPA_MENTORIAS.items()}
-    ids_presentes = sorted(df_alunos["id_mentoria"].unique().tolist())
-    nomes_mentorias = [MAPA_MENTORIAS.get(i, f"Mentoria {i}") for i in ids_presentes]
+@medir
+def _calcular_media_por_materia(df: pd.DataFrame) -> pd.Series:
+    return _percentual_por_materia(df.groupby("materia")[["acertos", "total"]].sum())
 
-    mentoria_sel = st.sidebar.selectbox("Mentoria", ["Todas"] + nomes_mentorias)
 
-    if mentoria_sel == "Todas":
-        alunos_filtrados = df_alunos
-    else:
-        id_mentoria = mapa_ids[mentoria_sel]
-        alunos_filtrados = df_alunos[df_alunos["id_mentoria"] == id_mentoria]
+@medir
+def _calcular_diario(dados_filtrado: pd.DataFrame) -> pd.DataFrame:
+    df_diario = (
+        dados_filtrado
+        .groupby(dados_filtrado["data"].dt.date)
+        .agg({"acertos": "sum", "total": "sum"})
+        .reset_index()
+    )
+    df_diario["%"] = (df_diario["acertos"] / df_diario["total"] * 100).fillna(0)
+    return df_diario.sort_values("data")
+
+
+@medir
+def _calcular_gaps(df_cont: pd.DataFrame) -> pd.DataFrame:
+    return df_cont[df_cont["%"] < 70].sort_values("%").head(5)
+
+
+@medir
+def _calcular_conteudos(dados_filtrado: pd.DataFrame) -> pd.DataFrame:
+    df_cont = (
+        dados_filtrado
+        .groupby(["materia", "conteudo"])
+        .agg({"acertos": "sum", "total": "sum"})
+        .reset_index()
+    )
+    df_cont["%"] = df_cont["acertos"] / df_cont["total"] * 100
+    return df_cont
+
+
+# --- Figuras ---
+
+def _figura_radar(r_aluno: list[float], r_turma: list[float]) -> go.Figure:
+    theta = ORDEM_MATERIAS + [ORDEM_MATERIAS[0]]
+    r_aluno_fechado = r_aluno + [r_aluno[0]]
+    r_turma_fechado = r_turma + [r_turma[0]]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=r_turma_fechado, theta=theta, fill="toself", name="Média Turma",
+        line_color="rgba(255,255,255,0.5)", fillcolor="rgba(255,255,255,0.1)",
+        hovertemplate="Média Turma: %{r:.2f}%<extra></extra>",
+    ))
+    fig.add_trace(go.Scatterpolar(
+        r=r_aluno_fechado, theta=theta, fill="toself", name="Desempenho Aluno",
+        line_color="#c00000", fillcolor="rgba(192,0,0,0.3)",
+        hovertemplate="Aluno: %{r:.2f}%<extra></extra>",
+    ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100], gridcolor="#444")),
+        template="plotly_dark",
+        height=515,
+        margin=dict(l=80, r=80, t=20, b=20),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5),
+        hovermode="closest",
+    )
+    return fig
+
 
-    if alunos_filtrados.empty:
+def _figura_evolucao_diaria(df_diario: pd.DataFrame, linha_tendencia, faixas: pd.DataFrame | None = None) -> go.Figure:
+    fig = px.line(df_diario, x="data", y="%", markers=True, color_discrete_sequence=["#c00000"])
+    fig.update_traces(
+        line=dict(width=4),
+        marker=dict(size=10, line=dict(width=2, color="white")),
+        hovertemplate="<b>Data: %{x}</b><br>Rendimento: %{y:.1f}%<extra></extra>",
+    )
+    if linha_tendencia is not None:
+        fig.add_scatter(
+            x=df_diario["data"], y=linha_tendencia,
+            name="Tendência", line=dict(color="white", dash="dash", width=2),
+        )
+    if faixas is not None:
+        adicionar_faixas(fig, faixas, sufixo="%")
+    fig.update_layout(yaxis_range=[0, 105], template="plotly_dark", height=400, hovermode="x unified")
+    return fig
+
+
+def _figura_retencao(df_ret_top: pd.DataFrame) -> go.Figure:
+    fig = px.bar(
+        df_ret_top, x="Retenção", y="conteudo", orientation="h",
+        color="Retenção", color_continuous_scale="RdYlGn", range_color=[0, 100],
+    )
+    fig.update_traces(
+        hovertemplate="<b>Conteúdo:</b> %{y}<br><b>Retenção Estimada:</b> %{x:.2f}%<extra></extra>"
+    )
+    fig.update_layout(
+        template="plotly_dark", height=500, showlegend=False,
+        xaxis_title="Retenção Estimada (%)", yaxis_title="",
+        coloraxis_showscale=False,
+    )
+    return fig
+
+
+def _figura_dominio(sub: pd.DataFrame, rotulos: list[str]) -> go.Figure:
+    fig = go.Figure(go.Heatmap(
+        z=sub.to_numpy(), x=[c for _, c in sub.columns], y=rotulos,
+        customdata=np.broadcast_to(np.array([m for m, _ in sub.columns], dtype=object), sub.shape),
+        zmin=0, zmax=100, colorscale="RdYlGn", xgap=1, ygap=1, colorbar=dict(title="Acertos %"),
+        hovertemplate="<b>%{y}</b><br>%{customdata} - %{x}<br>Acertos: %{z:.0f}%<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_dark", height=max(400, 22 * len(rotulos) + 160),
+        yaxis=dict(autorange="reversed"), xaxis=dict(tickangle=-45), margin=dict(l=10, r=10, t=20),
+    )
+    return fig
+
+
+# --- Sidebar ---
+
+@medir
+def _render_filtros_sidebar(
+    registro: RegistroAlunos,
+) -> tuple[int | None, int, str, list[int], str, object, object]:
+    st.sidebar.subheader("Configurações de Análise")
+
+    id_mentoria = render_filtro_mentoria(registro)
+
+    if not len(registro.ids(id_mentoria)):
         st.warning("Nenhum mentorado encontrado.")
         st.stop()
 
-    nome_aluno = st.sidebar.selectbox(
-        "Mentorado", sorted(alunos_filtrados["nome"].unique())
-    )
-    id_aluno = df_alunos[df_alunos["nome"] == nome_aluno]["id_aluno"].values[0]
+    id_aluno, nome_aluno = render_filtro_aluno(registro, id_mentoria, incluir_todos=False)
+    ids_comparacao = render_filtro_comparacao(registro, id_mentoria, key="ind_comparar")
     materia_sel = st.sidebar.selectbox("Disciplina", ["Todas"] + ORDEM_MATERIAS)
 
-    st.sidebar.markdown("Período de Análise")
-    hoje = datetime.now()
-    data_inicio = st.sidebar.date_input("Início", hoje - timedelta(days=30), format="DD/MM/YYYY")
-    data_fim = st.sidebar.date_input("Fim", hoje, format="DD/MM/YYYY")
+    data_inicio, data_fim = render_filtro_periodo(dias=30)
 
-    return id_aluno, nome_aluno, materia_sel, data_inicio, data_fim
+    return id_mentoria, id_aluno, nome_aluno, ids_comparacao, materia_sel, data_inicio, data_fim
 
 
 # --- Aba: Desempenho & Consistência ---
 
+@medir
 def _render_metricas_gerais(dados: pd.DataFrame, volatilidade: float) -> None:
     m1, m2, m3, m4, m5 = st.columns(5)
     total_q = dados["total"].sum()
@@ -175,56 +288,22 @@ def _render_metricas_gerais(dados: pd.DataFrame, volatilidade: float) -> None:
     m5.metric("Registros de Estudo", len(dados))
 
 
-def _render_radar(mask_geral, df_atividades: pd.DataFrame) -> None:
+@medir
+def _render_radar(dados_geral: pd.DataFrame, somas_turma: pd.DataFrame, id_mentoria: int | None) -> None:
     st.markdown("---")
     st.subheader("📡 Radar de Performance por Disciplina")
-    st.markdown("*O seu desempenho contra a média global*")
-
-    def media_por_materia(df_mask):
-        return (
-            df_atividades.loc[df_mask]
-            .groupby("materia")
-            .apply(
-                lambda x: (x["acertos"].sum() / x["total"].sum() * 100)
-                if x["total"].sum() > 0 else 0,
-                include_groups=False,
-            )
-            .reindex(ORDEM_MATERIAS)
-            .fillna(0)
-        )
+    st.markdown(f"*O seu desempenho contra a média {'global' if id_mentoria is None else 'da mentoria'}*")
 
-    mask_turma = df_atividades["materia"].isin(ORDEM_MATERIAS)
-    r_aluno = media_por_materia(mask_geral).tolist()
-    r_turma = media_por_materia(mask_turma).tolist()
+    r_aluno = _calcular_media_por_materia(dados_geral).tolist()
+    r_turma = _percentual_por_materia(somas_turma).tolist()
 
-    theta = ORDEM_MATERIAS + [ORDEM_MATERIAS[0]]
-    r_aluno_fechado = r_aluno + [r_aluno[0]]
-    r_turma_fechado = r_turma + [r_turma[0]]
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatterpolar(
-        r=r_turma_fechado, theta=theta, fill="toself", name="Média Turma",
-        line_color="rgba(255,255,255,0.5)", fillcolor="rgba(255,255,255,0.1)",
-        hovertemplate="Média Turma: %{r:.2f}%<extra></extra>",
-    ))
-    fig.add_trace(go.Scatterpolar(
-        r=r_aluno_fechado, theta=theta, fill="toself", name="Desempenho Aluno",
-        line_color="#c00000", fillcolor="rgba(192,0,0,0.3)",
-        hovertemplate="Aluno: %{r:.2f}%<extra></extra>",
-    ))
-    fig.update_layout(
-        polar=dict(radialaxis=dict(visible=True, range=[0, 100], gridcolor="#444")),
-        template="plotly_dark",
-        height=515,
-        margin=dict(l=80, r=80, t=20, b=20),
-        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5),
-        hovermode="closest",
-    )
-    st.plotly_chart(fig, width="stretch")
+    exibir_grafico(_figura_radar(r_aluno, r_turma), width="stretch")
 
 
+@medir
 def _render_evolucao_diaria(
-    df_diario: pd.DataFrame, materia_sel: str, cor_bola: str, txt_tendencia: str, linha_tendencia
+    df_diario: pd.DataFrame, materia_sel: str, cor_bola: str, txt_tendencia: str, linha_tendencia,
+    faixas: pd.DataFrame,
 ) -> None:
     st.markdown("---")
     c1, c2 = st.columns([3, 1])
@@ -241,30 +320,17 @@ def _render_evolucao_diaria(
             unsafe_allow_html=True,
         )
 
-    fig = px.line(df_diario, x="data", y="%", markers=True, color_discrete_sequence=["#c00000"])
-    fig.update_traces(
-        line=dict(width=4),
-        marker=dict(size=10, line=dict(width=2, color="white")),
-        hovertemplate="<b>Data: %{x}</b><br>Rendimento: %{y:.1f}%<extra></extra>",
-    )
-    if linha_tendencia is not None:
-        fig.add_scatter(
-            x=df_diario["data"], y=linha_tendencia,
-            name="Tendência", line=dict(color="white", dash="dash", width=2),
-        )
-    fig.update_layout(yaxis_range=[0, 105], template="plotly_dark", height=400, hovermode="x unified")
-    st.plotly_chart(fig, width="stretch")
+    faixas = faixas.loc[pd.Timestamp(df_diario["data"].min()):pd.Timestamp(df_diario["data"].max())]
+    exibir_grafico(_figura_evolucao_diaria(df_diario, linha_tendencia, faixas), width="stretch")
 
 
 # --- Aba: Diagnóstico Estratégico ---
 
-def _render_cards_diagnostico(
-    df_atividades: pd.DataFrame, id_aluno: int, hoje: datetime
-) -> None:
+@medir
+def _render_cards_diagnostico(df_aluno: pd.DataFrame, streak: int, hoje: datetime) -> None:
     d1, d2 = st.columns(2)
 
     with d1:
-        streak = _calcular_streak(df_atividades, id_aluno, hoje)
         st.markdown(
             f'<div class="diag-card" style="border-top:4px solid #ffa500;">'
             f'<h4 style="margin:0;color:#ffa500;">🔥 Streak de Constância</h4>'
@@ -274,7 +340,7 @@ def _render_cards_diagnostico(
         )
 
     with d2:
-        hiato = _calcular_hiato(df_atividades, id_aluno, hoje)
+        hiato = _calcular_hiato(df_aluno, hoje)
         if hiato:
             materia, dias, cor = hiato
             st.markdown(
@@ -293,6 +359,7 @@ def _render_cards_diagnostico(
             )
 
 
+@medir
 def _render_conteudos_criticos(dados_filtrado: pd.DataFrame) -> pd.DataFrame:
     st.subheader(
         "⚠️ Conteúdos Críticos",
@@ -302,15 +369,9 @@ def _render_conteudos_criticos(dados_filtrado: pd.DataFrame) -> pd.DataFrame:
         ),
     )
     st.markdown("*De olho nas revisões*")
-    df_cont = (
-        dados_filtrado
-        .groupby(["materia", "conteudo"])
-        .agg({"acertos": "sum", "total": "sum"})
-        .reset_index()
-    )
-    df_cont["%"] = df_cont["acertos"] / df_cont["total"] * 100
+    df_cont = _calcular_conteudos(dados_filtrado)
 
-    gaps = df_cont[df_cont["%"] < 70].sort_values("%").head(5)
+    gaps = _calcular_gaps(df_cont)
     if not gaps.empty:
         for _, row in gaps.iterrows():
             if row["%"] < 50:
@@ -323,6 +384,7 @@ def _render_conteudos_criticos(dados_filtrado: pd.DataFrame) -> pd.DataFrame:
     return df_cont
 
 
+@medir
 def _render_retencao(df_cont: pd.DataFrame, dados_filtrado: pd.DataFrame, hoje: datetime) -> None:
     st.subheader(
         "🧠 Retenção Estimada por Conteúdo",
@@ -335,31 +397,123 @@ def _render_retencao(df_cont: pd.DataFrame, dados_filtrado: pd.DataFrame, hoje:
     df_ret = _calcular_retencao(df_cont, dados_filtrado, hoje)
     df_ret_top = df_ret.sort_values("Retenção").head(15)
 
-    fig = px.bar(
-        df_ret_top, x="Retenção", y="conteudo", orientation="h",
-        color="Retenção", color_continuous_scale="RdYlGn", range_color=[0, 100],
-    )
-    fig.update_traces(
-        hovertemplate="<b>Conteúdo:</b> %{y}<br><b>Retenção Estimada:</b> %{x:.2f}%<extra></extra>"
+    exibir_grafico(_figura_retencao(df_ret_top), width="stretch")
+
+
+@medir
+def _render_plano_revisoes(df_atividades: pd.DataFrame, id_aluno: int, hoje: datetime) -> None:
+    st.subheader(
+        "📅 Plano de Revisões",
+        help=(
+            f"Cada conteúdo entra na fila no dia em que a retenção projetada cai abaixo de {LIMITE_RETENCAO}%. "
+            "As revisões são distribuídas respeitando o limite diário de questões."
+        ),
     )
+    c1, c2 = st.columns(2)
+    with c1:
+        dias = st.slider("Próximos dias", 7, 30, 14, key="rev_dias")
+    with c2:
+        orcamento = st.number_input("Questões por dia", 10, 200, 40, step=10, key="rev_orcamento")
+
+    fila = fila_revisoes(df_atividades, hoje.date(), dias, orcamento)
+    fila = fila[fila["id_aluno"].to_numpy() == id_aluno]
+    if fila.empty:
+        st.success("Nenhuma revisão prevista para o período.")
+        return
+    st.caption(f"{len(fila)} revisões nos próximos {dias} dias • {int(fila['atraso'].sum())} já abaixo do limite")
+    tabela = pd.DataFrame({
+        "Dia": fila["data"].dt.strftime("%d/%m").to_numpy(),
+        "Matéria": fila["materia"].to_numpy(),
+        "Conteúdo": fila["conteudo"].to_numpy(),
+        "Retenção no dia": fila["retencao"].map("{:.0f}%".format).to_numpy(),
+        "Questões": fila["questoes"].to_numpy(),
+    })
+    exibir_tabela(tabela, hide_index=True, width="stretch")
+
+
+# --- Aba: Domínio da Turma ---
+
+_MAX_ALUNOS_MAPA = 40
+
+@medir
+def _render_dominio_turma(df_atividades: pd.DataFrame, registro: RegistroAlunos, id_aluno: int) -> None:
+    st.subheader("🧩 Mapa de Domínio da Turma")
+    st.markdown("*Todo o histórico da turma: conteúdos e alunos mais fracos primeiro, para planejar revisões em grupo*")
+    matriz = obter_matriz(df_atividades)
+    resumo = matriz.resumo_conteudos()
+    if resumo.empty:
+        st.info("Nenhuma atividade registrada para a turma.")
+        return
+
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        materia = st.selectbox("Matéria", ["Todas"] + ORDEM_MATERIAS, key="dom_materia")
+    with c2:
+        n_conteudos = st.slider("Conteúdos", 5, 40, 15, key="dom_n")
+    if materia != "Todas":
+        resumo = resumo[resumo.index.get_level_values(0) == materia]
+    resumo = resumo.sort_values("%")
+    if resumo.empty:
+        st.info("Nenhum conteúdo registrado nesta matéria.")
+        return
+
+    sub = matriz.submatriz([matriz.indice(*c) for c in resumo.index[:n_conteudos]])
+    sub = sub.loc[sub.mean(axis=1).sort_values().index[:_MAX_ALUNOS_MAPA]]
+    rotulos = [f"➤ {registro.rotulo(i)}" if i == id_aluno else registro.rotulo(i) for i in sub.index.tolist()]
+    st.caption(f"{len(sub)} alunos com menor domínio nos {sub.shape[1]} conteúdos mais fracos da turma.")
+    exibir_grafico(_figura_dominio(sub, rotulos), width="stretch")
+
+    st.markdown("**Quem está abaixo do limite em um conteúdo?**")
+    q1, q2 = st.columns([3, 1])
+    with q1:
+        conteudo = st.selectbox(
+            "Conteúdo", resumo.index.tolist(), format_func=lambda c: f"{c[0]} - {c[1]}", key="dom_conteudo"
+        )
+    with q2:
+        limite = st.number_input("Abaixo de (%)", 0, 100, 50, step=5, key="dom_limite")
+    abaixo = registro.juntar_nomes(matriz.abaixo_de(*conteudo, limite), coluna="Aluno")
+    if abaixo.empty:
+        st.success("Ninguém abaixo do limite neste conteúdo.")
+        return
+    abaixo["%"] = abaixo["%"].map("{:.1f}%".format)
+    exibir_tabela(abaixo[["Aluno", "acertos", "total", "%"]], hide_index=True, width="stretch")
+
+
+@medir
+def _render_carga_revisoes(df_atividades: pd.DataFrame, hoje: datetime) -> None:
+    # Mesmos parâmetros escolhidos no Plano de Revisões (aba Diagnóstico)
+    dias = st.session_state.get("rev_dias", 14)
+    orcamento = st.session_state.get("rev_orcamento", 40)
+    fila = fila_revisoes(df_atividades, hoje.date(), dias, orcamento)
+    st.markdown("---")
+    st.subheader("📅 Carga de Revisões da Turma")
+    if fila.empty:
+        st.success("Nenhuma revisão prevista para a turma no período.")
+        return
+    st.caption(f"Próximos {dias} dias, até {orcamento} questões por aluno por dia.")
+    carga = fila.groupby(["data", "materia"]).size().rename("revisoes").reset_index()
+    fig = px.bar(carga, x="data", y="revisoes", color="materia", category_orders={"materia": ORDEM_MATERIAS})
     fig.update_layout(
-        template="plotly_dark", height=500, showlegend=False,
-        xaxis_title="Retenção Estimada (%)", yaxis_title="",
-        coloraxis_showscale=False,
+        template="plotly_dark", height=380, xaxis=dict(tickformat="%d/%m"),
+        yaxis_title="Revisões", xaxis_title="", legend_title="",
     )
-    st.plotly_chart(fig, width="stretch")
+    exibir_grafico(fig, width="stretch")
 
 
 # --- Histórico ---
 
+@medir
 def _render_historico(dados_filtrado: pd.DataFrame) -> None:
-    with st.expander("📄 Histórico Completo de Registros"):
+    secao = secao_recolhida("📄 Histórico Completo de Registros", "ind_historico")
+    if secao is None:
+        return
+    with secao:
         df_display = dados_filtrado.copy()
         df_display["data"] = df_display["data"].dt.strftime("%d/%m/%Y")
         df_display["%"] = df_display["%"].map("{:.2f}%".format)
         df_display["acertos"] = df_display["acertos"].astype(int)
         df_display["total"] = df_display["total"].astype(int)
-        st.dataframe(
+        exibir_tabela(
             df_display[["data", "materia", "conteudo", "acertos", "total", "%"]]
             .sort_values("data", ascending=False),
             width="stretch",
@@ -367,58 +521,192 @@ def _render_historico(dados_filtrado: pd.DataFrame) -> None:
         )
 
 
+# --- Modo Comparação ---
+
+@medir
+def _calcular_comparacao(dados: pd.DataFrame, materia_sel: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Uma passada agrupada por visão para todos os alunos escolhidos, em vez de um filtro por aluno
+    somas = dados.groupby(["id_aluno", "materia"])[["acertos", "total"]].sum()
+    por_materia = (
+        (somas["acertos"] / somas["total"] * 100).where(somas["total"] > 0)
+        .unstack().reindex(columns=ORDEM_MATERIAS)
+    )
+
+    recorte = dados if materia_sel == "Todas" else dados[dados["materia"] == materia_sel]
+    diario = recorte[recorte["data"].notna()].groupby(["id_aluno", "dia"])[["acertos", "total"]].sum()
+    diario = diario[diario["total"] > 0].reset_index()
+    diario["%"] = diario["acertos"] / diario["total"] * 100
+    diario["data"] = pd.to_datetime(diario["dia"], unit="D")
+
+    grupos = recorte.groupby("id_aluno")
+    resumo = grupos[["total", "acertos"]].sum()
+    resumo["taxa"] = (resumo["acertos"] / resumo["total"] * 100).where(resumo["total"] > 0, 0)
+    resumo["consistencia"] = diario.groupby("id_aluno")["%"].std()
+    resumo["registros"] = grupos.size()
+    return por_materia, diario, resumo
+
+
+def _figura_radar_comparacao(por_materia: pd.DataFrame, r_turma: list[float], rotulos: list[str]) -> go.Figure:
+    theta = ORDEM_MATERIAS + [ORDEM_MATERIAS[0]]
+    fig = go.Figure(go.Scatterpolar(
+        r=r_turma + [r_turma[0]], theta=theta, fill="toself", name="Média Turma",
+        line_color="rgba(255,255,255,0.5)", fillcolor="rgba(255,255,255,0.1)",
+        hovertemplate="Média Turma: %{r:.2f}%<extra></extra>",
+    ))
+    for (_, linha), rotulo, cor in zip(por_materia.fillna(0).iterrows(), rotulos, CORES_COMPARACAO):
+        r = linha.tolist()
+        fig.add_trace(go.Scatterpolar(
+            r=r + [r[0]], theta=theta, name=rotulo, line=dict(color=cor, width=3),
+            hovertemplate=f"{rotulo}: %{{r:.2f}}%<extra></extra>",
+        ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100], gridcolor="#444")),
+        template="plotly_dark", height=515, margin=dict(l=80, r=80, t=20, b=20),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5),
+    )
+    return fig
+
+
+def _figura_evolucao_comparacao(
+    diario: pd.DataFrame, ids: list[int], rotulos: list[str], faixas: pd.DataFrame | None = None
+) -> go.Figure:
+    fig = go.Figure()
+    por_aluno = dict(tuple(diario.groupby("id_aluno")))
+    for id_aluno, rotulo, cor in zip(ids, rotulos, CORES_COMPARACAO):
+        serie = por_aluno.get(id_aluno, diario.iloc[:0])
+        fig.add_trace(go.Scatter(
+            x=serie["data"], y=serie["%"], mode="lines+markers", name=rotulo,
+            line=dict(color=cor, width=3), marker=dict(size=7),
+            hovertemplate=f"{rotulo}: %{{y:.1f}}%<extra></extra>",
+        ))
+    if faixas is not None:
+        adicionar_faixas(fig, faixas, sufixo="%")
+    fig.update_layout(yaxis_range=[0, 105], template="plotly_dark", height=420, hovermode="x unified")
+    return fig
+
+
+@medir
+def _render_comparacao(
+    df_atividades: pd.DataFrame, df_alunos: pd.DataFrame, registro: RegistroAlunos, ids: list[int],
+    id_mentoria: int | None, materia_sel: str, data_inicio, data_fim,
+) -> None:
+    st.subheader(f"👥 Comparação de Mentorados - {materia_sel}")
+    rotulos = [registro.rotulo(i) for i in ids]
+
+    dados = filtrar_alunos(df_atividades, ids, data_inicio, data_fim)
+    dados = dados[dados["materia"].isin(ORDEM_MATERIAS)]
+    if dados.empty:
+        st.info("Nenhuma atividade dos mentorados escolhidos no período.")
+        return
+    por_materia, diario, resumo = _calcular_comparacao(dados, materia_sel)
+
+    resumo = resumo.reindex(ids)
+    tabela = pd.DataFrame({
+        "Mentorado": rotulos,
+        "Questões": resumo["total"].fillna(0).astype(int).to_numpy(),
+        "Acertos": resumo["acertos"].fillna(0).astype(int).to_numpy(),
+        "Taxa de Acerto": resumo["taxa"].fillna(0).round(1).to_numpy(),
+        "Consistência": resumo["consistencia"].round(1).to_numpy(),
+        "Registros": resumo["registros"].fillna(0).astype(int).to_numpy(),
+    })
+    exibir_tabela(
+        tabela, hide_index=True, width="stretch",
+        column_config={"Taxa de Acerto": st.column_config.ProgressColumn(
+            "Taxa de Acerto", min_value=0, max_value=100, format="%.1f%%",
+        )},
+    )
+
+    st.markdown("---")
+    st.subheader("📡 Radar por Disciplina")
+    st.markdown(f"*Cada mentorado contra a média {'global' if id_mentoria is None else 'da mentoria'}*")
+    r_turma = _percentual_por_materia(somas_por_materia(df_atividades, df_alunos, id_mentoria)).tolist()
+    exibir_grafico(_figura_radar_comparacao(por_materia.reindex(ids), r_turma, rotulos), width="stretch")
+
+    st.markdown("---")
+    st.subheader("📌 Evolução de Desempenho")
+    faixas = faixas_diarias(df_atividades, ORDEM_MATERIAS if materia_sel == "Todas" else [materia_sel])
+    if not diario.empty:
+        faixas = faixas.loc[diario["data"].min():diario["data"].max()]
+    exibir_grafico(_figura_evolucao_comparacao(diario, ids, rotulos, faixas), width="stretch")
+
+
 # --- Ponto de entrada ---
 
 def exibir_avaliacao_individual(df_alunos: pd.DataFrame, df_atividades: pd.DataFrame) -> None:
-    st.markdown(_CSS_MODULO, unsafe_allow_html=True)
+    aplicar_css(_CSS_MODULO)
     st.title("🚀 Central de Alta Performance")
     st.subheader("*Decisões estratégicas começam com dados precisos*")
 
     hoje = datetime.now()
 
-    id_aluno, nome_aluno, materia_sel, data_inicio, data_fim = _render_filtros_sidebar(df_alunos)
-
-    mask_geral = (
-        (df_atividades["id_aluno"] == id_aluno)
-        & (df_atividades["data"].dt.date >= data_inicio)
-        & (df_atividades["data"].dt.date <= data_fim)
-        & (df_atividades["materia"].isin(ORDEM_MATERIAS))
-    )
-    mask_materia = (
-        mask_geral if materia_sel == "Todas"
-        else mask_geral & (df_atividades["materia"] == materia_sel)
+    registro = obter_registro(df_alunos)
+    (id_mentoria, id_aluno, nome_aluno, ids_comparacao,
+     materia_sel, data_inicio, data_fim) = _render_filtros_sidebar(registro)
+
+    # Período que começa antes do corte do arquivo traz os meses arquivados; depois,
+    # com uma mentoria escolhida, a sessão só toca a partição dela
+    # Domínio e revisões ficam fora da janela da sessão: o resumo do arquivo já cobre o histórico e
+    # todas as sessões da mentoria atualizam a mesma matriz incremental com a mesma versão
+    df_turma = particao(df_atividades, df_alunos, id_mentoria)
+    df_atividades = estender(df_atividades, chave("atividades", data_inicio))
+    df_atividades = particao(df_atividades, df_alunos, id_mentoria)
+    df_alunos = particao(df_alunos, df_alunos, id_mentoria)
+
+    if len(ids_comparacao) >= 2:
+        _render_comparacao(
+            df_atividades, df_alunos, registro, ids_comparacao, id_mentoria, materia_sel, data_inicio, data_fim
+        )
+        return
+    if ids_comparacao:
+        st.info("👥 Escolha ao menos dois mentorados para comparar.")
+
+    # Hiato olha o histórico todo do aluno, inclusive o resumo dos meses arquivados
+    df_aluno = filtrar(com_historico(df_atividades), FiltroSpec(id_aluno=id_aluno), df_alunos)
+    dados_geral = filtrar(
+        df_atividades,
+        FiltroSpec(id_aluno=id_aluno, data_inicio=data_inicio, data_fim=data_fim),
+        df_alunos,
     )
-    dados_filtrado = df_atividades.loc[mask_materia].copy()
+    dados_geral = dados_geral[dados_geral["materia"].isin(ORDEM_MATERIAS)]
+    dados_filtrado = (
+        dados_geral if materia_sel == "Todas"
+        else dados_geral[dados_geral["materia"] == materia_sel]
+    ).copy()
 
     if dados_filtrado.empty:
         st.info("Nenhuma atividade encontrada para os filtros selecionados.")
         return
 
-    df_diario = (
-        dados_filtrado
-        .groupby(dados_filtrado["data"].dt.date)
-        .agg({"acertos": "sum", "total": "sum"})
-        .reset_index()
-    )
-    df_diario["%"] = (df_diario["acertos"] / df_diario["total"] * 100).fillna(0)
-    df_diario = df_diario.sort_values("data")
+    df_diario = _calcular_diario(dados_filtrado)
     volatilidade = df_diario["%"].std()
     cor_bola, txt_tendencia, linha_tendencia = _calcular_tendencia(df_diario)
 
-    aba_perf, aba_diag = st.tabs(["📈 Desempenho & Consistência", "🎯 Diagnóstico Estratégico"])
-
-    with aba_perf:
-        _render_metricas_gerais(dados_filtrado, volatilidade)
-        _render_radar(mask_geral, df_atividades)
-        _render_evolucao_diaria(df_diario, materia_sel, cor_bola, txt_tendencia, linha_tendencia)
+    aba_perf, aba_diag, aba_turma = abas(
+        ["📈 Desempenho & Consistência", "🎯 Diagnóstico Estratégico", "🧩 Domínio da Turma"], "ind_aba"
+    )
 
-    with aba_diag:
-        st.subheader("🎯 Diagnóstico Avançado")
-        _render_cards_diagnostico(df_atividades, id_aluno, hoje)
-        st.markdown("---")
-        df_cont = _render_conteudos_criticos(dados_filtrado)
-        st.markdown("---")
-        _render_retencao(df_cont, dados_filtrado, hoje)
+    if aba_perf is not None:
+        with aba_perf:
+            _render_metricas_gerais(dados_filtrado, volatilidade)
+            _render_radar(dados_geral, somas_por_materia(df_atividades, df_alunos, id_mentoria), id_mentoria)
+            faixas = faixas_diarias(df_atividades, ORDEM_MATERIAS if materia_sel == "Todas" else [materia_sel])
+            _render_evolucao_diaria(df_diario, materia_sel, cor_bola, txt_tendencia, linha_tendencia, faixas)
+
+    if aba_diag is not None:
+        with aba_diag:
+            st.subheader("🎯 Diagnóstico Avançado")
+            _render_cards_diagnostico(df_aluno, _streak_do_aluno(df_atividades, df_alunos, id_aluno, hoje), hoje)
+            st.markdown("---")
+            df_cont = _render_conteudos_criticos(dados_filtrado)
+            st.markdown("---")
+            _render_retencao(df_cont, dados_filtrado, hoje)
+            st.markdown("---")
+            _render_plano_revisoes(df_turma, id_aluno, hoje)
+
+    if aba_turma is not None:
+        with aba_turma:
+            _render_dominio_turma(df_turma, registro, id_aluno)
+            _render_carga_revisoes(df_turma, hoje)
 
     st.markdown("---")
     _render_historico(dados_filtrado)
@@ -426,7 +714,7 @@ def exibir_avaliacao_individual(df_alunos: pd.DataFrame, df_atividades: pd.DataF
     st.markdown("---")
     col1, col_centro, col2 = st.columns([2, 1, 2])
     with col_centro:
-        st.image("logo.png", width=250)
+        st.image(LOGO, width=250)
     with col1:
         st.caption("*© 2026 • Central de Performance Acadêmica - Estude com Danilo*")
     with col2:
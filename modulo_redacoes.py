@@ -2,9 +2,17 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-import numpy as np
-
-MAPA_MENTORIAS = {1: "Estude com Danilo", 2: "Projeto Medicina"}
+from consultas import (
+    FiltroSpec, filtrar, filtrar_alunos, particao,
+    render_filtro_mentoria, render_filtro_aluno, render_filtro_comparacao,
+)
+from agregados import faixas_semanais
+from competencias import CuboCompetencias, obter_cubo
+from estilos import CORES_COMPARACAO, LOGO, adicionar_faixas, aplicar_css
+from compacto import exibir_grafico, exibir_tabela, secao_recolhida
+from registro import RegistroAlunos, obter_registro
+from temas import obter_indice
+from instrumentacao import medir
 
 _COMPETENCIAS = ["c1", "c2", "c3", "c4", "c5"]
 _LABELS_COMPETENCIAS = [
@@ -33,28 +41,89 @@ _CSS_MODULO = """
 
 # --- Sidebar ---
 
-def _render_filtros_sidebar(df_alunos: pd.DataFrame) -> tuple[pd.DataFrame, str]:
+@medir
+def _render_filtros_sidebar(registro: RegistroAlunos) -> tuple[int | None, int | None, list[int]]:
     st.sidebar.subheader("Configurações de Análise")
-    
-    mentorias = ["Todas"] + [
-        MAPA_MENTORIAS.get(m, m) for m in df_alunos["id_mentoria"].unique()
-    ]
-    mentoria_sel = st.sidebar.selectbox("Mentoria", mentorias)
-    
-    if mentoria_sel != "Todas":
-        id_m = [k for k, v in MAPA_MENTORIAS.items() if v == mentoria_sel][0]
-        alunos_filtrados = df_alunos[df_alunos["id_mentoria"] == id_m]
-    else:
-        alunos_filtrados = df_alunos
 
-    lista_alunos = ["Todos"] + sorted(alunos_filtrados["nome"].unique().tolist())
-    nome_sel = st.sidebar.selectbox("Mentorado", lista_alunos)
+    id_mentoria = render_filtro_mentoria(registro)
+    id_aluno, _ = render_filtro_aluno(registro, id_mentoria, incluir_todos=True)
+    ids_comparacao = render_filtro_comparacao(registro, id_mentoria, key="red_comparar")
+
+    return id_mentoria, id_aluno, ids_comparacao
 
-    return alunos_filtrados, nome_sel
+
+# --- Figuras ---
+
+def _figura_evolucao_individual(df_filtrado: pd.DataFrame, faixas: pd.DataFrame | None = None) -> go.Figure:
+    fig = px.line(
+        df_filtrado, x="data", y="total", markers=True,
+        hover_data={"data": "|%d/%m/%Y", "total": True, "tema": True},
+    )
+    fig.update_traces(
+        line=dict(color="#c00000", width=4),
+        marker=dict(size=12, color="#c00000", line=dict(color="white", width=2)),
+        hovertemplate="<b>Data:</b> %{x|%d/%m/%Y}<br><b>Nota:</b> %{y} pts<br><b>Tema:</b> %{customdata[0]}<extra></extra>",
+    )
+    if faixas is not None:
+        adicionar_faixas(fig, faixas, sufixo=" pts", forma="hv")
+    fig.update_layout(
+        template="plotly_dark",
+        yaxis_range=[0, 1050],
+        xaxis=dict(tickformat="%d/%m", gridcolor="#333"),
+        hovermode="x unified",
+        height=400,
+    )
+    return fig
+
+
+def _figura_radar_individual(medias_aluno: list[float], medias_turma: list[float]) -> go.Figure:
+    labels_radar = _LABELS_COMPETENCIAS + [_LABELS_COMPETENCIAS[0]]
+    medias_aluno_fechado = medias_aluno + [medias_aluno[0]]
+    medias_turma_fechado = medias_turma + [medias_turma[0]]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=medias_turma_fechado, theta=labels_radar, fill="toself",
+        name="Média Geral", line_color="rgba(150,150,150,0.5)", marker=dict(size=0),
+    ))
+    fig.add_trace(go.Scatterpolar(
+        r=medias_aluno_fechado, theta=labels_radar, fill="toself",
+        name="Seu Desempenho", line_color="#c00000",
+    ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 200], gridcolor="#444"),
+            angularaxis=dict(gridcolor="#444"),
+        ),
+        template="plotly_dark",
+        legend=dict(orientation="h", yanchor="bottom", y=1.1, xanchor="center", x=0.5),
+        height=500,
+    )
+    return fig
+
+
+def _figura_tendencia_competencias(mensal: pd.DataFrame) -> go.Figure:
+    fig = go.Figure()
+    for comp, rotulo, cor in zip(_COMPETENCIAS, _LABELS_COMPETENCIAS, CORES_COMPARACAO):
+        fig.add_trace(go.Scatter(
+            x=mensal.index, y=mensal[comp], customdata=mensal[["n"]], mode="lines+markers", name=rotulo,
+            line=dict(color=cor, width=3), marker=dict(size=8, color=cor),
+            hovertemplate=f"<b>{rotulo}:</b> %{{y:.0f}} pts<br>%{{customdata[0]}} redações<extra></extra>",
+        ))
+    fig.update_layout(
+        template="plotly_dark",
+        yaxis_range=[0, 210],
+        xaxis=dict(tickformat="%m/%Y", dtick="M1", gridcolor="#333"),
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="center", x=0.5),
+        height=420,
+    )
+    return fig
 
 
 # --- Métricas ---
 
+@medir
 def _render_metricas_gerais(df_filtrado: pd.DataFrame) -> None:
     m1, m2, m3, m4 = st.columns(4)
     
@@ -71,13 +140,11 @@ def _render_metricas_gerais(df_filtrado: pd.DataFrame) -> None:
 
 # --- Visão Grupo ---
 
-def _render_radar_grupo(df_filtrado: pd.DataFrame) -> None:
+@medir
+def _render_radar_grupo(cubo: CuboCompetencias, id_mentoria: int | None) -> None:
     st.subheader("🎯 Diagnóstico Estratégico: Grupo vs Alta Performance")
     
-    medias_grupo = df_filtrado[_COMPETENCIAS].mean().tolist()
-    
-    top_5_ids = df_filtrado.groupby("id_aluno")["total"].mean().nlargest(5).index
-    medias_top5 = df_filtrado[df_filtrado["id_aluno"].isin(top_5_ids)][_COMPETENCIAS].mean().tolist()
+    medias_grupo, medias_top5 = cubo.medias_grupo(id_mentoria), cubo.medias_top(id_mentoria)
 
     labels_radar = _LABELS_COMPETENCIAS + [_LABELS_COMPETENCIAS[0]]
     medias_grupo_fechado = medias_grupo + [medias_grupo[0]]
@@ -101,77 +168,62 @@ def _render_radar_grupo(df_filtrado: pd.DataFrame) -> None:
         legend=dict(orientation="h", yanchor="bottom", y=1.1, xanchor="center", x=0.5),
         height=600,
     )
-    st.plotly_chart(fig, use_container_width=True)
+    exibir_grafico(fig, use_container_width=True)
 
 
 # --- Visão Individual ---
 
-def _render_evolucao_individual(df_filtrado: pd.DataFrame) -> None:
+@medir
+def _render_evolucao_individual(df_filtrado: pd.DataFrame, faixas: pd.DataFrame) -> None:
     st.subheader("📈 Curva de Performance")
     
-    fig = px.line(
-        df_filtrado, x="data", y="total", markers=True,
-        hover_data={"data": "|%d/%m/%Y", "total": True, "tema": True},
-    )
-    fig.update_traces(
-        line=dict(color="#c00000", width=4),
-        marker=dict(size=12, color="#c00000", line=dict(color="white", width=2)),
-        hovertemplate="<b>Data:</b> %{x|%d/%m/%Y}<br><b>Nota:</b> %{y} pts<br><b>Tema:</b> %{customdata[0]}<extra></extra>",
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        yaxis_range=[0, 1050],
-        xaxis=dict(tickformat="%d/%m", gridcolor="#333"),
-        hovermode="x unified",
-        height=400,
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    # Semanas da turma que cobrem o período das redações do aluno
+    inicio = df_filtrado["data"].min() - pd.Timedelta(days=6)
+    faixas = faixas.loc[inicio:df_filtrado["data"].max()]
+    exibir_grafico(_figura_evolucao_individual(df_filtrado, faixas), use_container_width=True)
 
 
-def _render_radar_individual(df_filtrado: pd.DataFrame, df_redacoes: pd.DataFrame) -> None:
+@medir
+def _render_radar_individual(cubo: CuboCompetencias, id_aluno: int, id_mentoria: int | None) -> None:
     st.markdown("---")
     st.subheader("🎯 Diagnóstico Estratégico")
     
-    medias_aluno = df_filtrado[_COMPETENCIAS].mean().tolist()
-    medias_turma = df_redacoes[_COMPETENCIAS].mean().tolist()
+    medias_aluno = cubo.medias_aluno(id_aluno)
+    medias_turma = cubo.medias_grupo(id_mentoria)
 
-    labels_radar = _LABELS_COMPETENCIAS + [_LABELS_COMPETENCIAS[0]]
-    medias_aluno_fechado = medias_aluno + [medias_aluno[0]]
-    medias_turma_fechado = medias_turma + [medias_turma[0]]
+    exibir_grafico(_figura_radar_individual(medias_aluno, medias_turma), use_container_width=True)
 
-    fig = go.Figure()
-    fig.add_trace(go.Scatterpolar(
-        r=medias_turma_fechado, theta=labels_radar, fill="toself",
-        name="Média Geral", line_color="rgba(150,150,150,0.5)", marker=dict(size=0),
-    ))
-    fig.add_trace(go.Scatterpolar(
-        r=medias_aluno_fechado, theta=labels_radar, fill="toself",
-        name="Seu Desempenho", line_color="#c00000",
-    ))
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(visible=True, range=[0, 200], gridcolor="#444"),
-            angularaxis=dict(gridcolor="#444"),
-        ),
-        template="plotly_dark",
-        legend=dict(orientation="h", yanchor="bottom", y=1.1, xanchor="center", x=0.5),
-        height=500,
-    )
-    st.plotly_chart(fig, use_container_width=True)
+
+# --- Tendência Mensal ---
+
+@medir
+def _render_tendencia_competencias(cubo: CuboCompetencias, id_mentoria: int | None, id_aluno: int | None) -> None:
+    st.markdown("---")
+    st.subheader("📆 Competências Mês a Mês")
+
+    mensal = cubo.tendencia(id_mentoria, id_aluno)
+    if mensal.empty:
+        st.info("💡 Nenhuma redação com data para montar a tendência.")
+        return
+    exibir_grafico(_figura_tendencia_competencias(mensal), use_container_width=True)
 
 
 # --- Histórico ---
 
-def _render_historico(df_filtrado: pd.DataFrame, df_alunos: pd.DataFrame, nome_sel: str) -> None:
-    with st.expander("📋 Ver Histórico Detalhado de Redações"):
+@medir
+def _render_historico(df_filtrado: pd.DataFrame, registro: RegistroAlunos, id_aluno: int | None) -> None:
+    secao = secao_recolhida("📋 Ver Histórico Detalhado de Redações", "red_historico")
+    if secao is None:
+        return
+    with secao:
         df_tab = df_filtrado.copy()
         
         df_tab["data_f"] = df_tab["data"].dt.strftime("%d/%m/%Y")
         
         colunas_base = ["data_f", "tema", "c1", "c2", "c3", "c4", "c5", "total"]
         
-        if nome_sel == "Todos":
-            df_tab = df_tab.merge(df_alunos[["id_aluno", "nome"]], on="id_aluno")
+        if id_aluno is None:
+            df_tab = registro.juntar_nomes(df_tab)
             colunas_finais = ["nome"] + colunas_base
         else:
             colunas_finais = colunas_base
@@ -179,31 +231,209 @@ def _render_historico(df_filtrado: pd.DataFrame, df_alunos: pd.DataFrame, nome_s
         df_render = df_tab.sort_values("data", ascending=False)[colunas_finais]
         df_render = df_render.rename(columns={"data_f": "data"})
 
-        st.dataframe(
+        exibir_tabela(
             df_render,
             use_container_width=True, 
             hide_index=True,
         )
 
 
+# --- Explorador de Temas ---
+
+_MAX_TEMAS_MAPA = 12
+
+
+def _figura_temas(resumo: pd.DataFrame) -> go.Figure:
+    fig = go.Figure(go.Heatmap(
+        z=resumo[_COMPETENCIAS].to_numpy(), x=_LABELS_COMPETENCIAS, y=resumo["tema"],
+        customdata=resumo[["redacoes"]].to_numpy(),
+        zmin=0, zmax=200, colorscale="RdYlGn", xgap=1, ygap=1, colorbar=dict(title="Média"),
+        hovertemplate="<b>%{y}</b><br>%{x}: %{z:.0f} pts<br>%{customdata[0]} redações<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_dark", height=max(300, 30 * len(resumo) + 120),
+        yaxis=dict(autorange="reversed"), margin=dict(l=10, r=10, t=20),
+    )
+    return fig
+
+
+@medir
+def _render_explorador_temas(
+    df_redacoes: pd.DataFrame, df_filtrado: pd.DataFrame, registro: RegistroAlunos, id_aluno: int | None
+) -> None:
+    st.subheader("🔎 Explorador de Temas")
+    indice = obter_indice(df_redacoes)
+    consulta = st.text_input(
+        "Buscar tema", key="tema_busca", placeholder="ex.: mobilidade, intoler, cinema",
+        help="Cada palavra casa pelo começo, sem acentos; o tema precisa conter todas.",
+    )
+    temas = indice.buscar(consulta)
+    if not len(temas):
+        st.info("Nenhum tema encontrado para essa busca.")
+        return
+
+    resumo = indice.resumo(temas).sort_values(["redacoes", "total"], ascending=False)
+    st.caption(f"{len(resumo)} tema(s) • {int(resumo['redacoes'].sum())} redações da turma")
+
+    tabela = resumo.rename(columns={
+        "tema": "Tema", "redacoes": "Redações", "alunos": "Alunos", "total": "Média Turma",
+        **dict(zip(_COMPETENCIAS, [c.upper() for c in _COMPETENCIAS])),
+    })
+    if id_aluno is not None:
+        # Média do aluno em cada tema, lida dos códigos do índice para as linhas dele
+        notas_aluno = df_filtrado["total"].groupby(indice.codigos(df_filtrado.index)).mean()
+        tabela.insert(3, "Sua Média", notas_aluno.reindex(tabela.index).to_numpy())
+    exibir_tabela(
+        tabela.round(0), hide_index=True, use_container_width=True,
+        column_config={
+            "Média Turma": st.column_config.ProgressColumn("Média Turma", min_value=0, max_value=1000, format="%d"),
+        },
+    )
+    exibir_grafico(_figura_temas(resumo.head(_MAX_TEMAS_MAPA)), use_container_width=True)
+
+    if consulta.strip():
+        secao = secao_recolhida("📋 Redações encontradas", "tema_redacoes")
+        if secao is None:
+            return
+        with secao:
+            encontradas = df_redacoes.iloc[indice.linhas(temas)]
+            if id_aluno is not None:
+                encontradas = encontradas[encontradas["id_aluno"] == id_aluno]
+            encontradas = registro.juntar_nomes(encontradas).sort_values("data", ascending=False)
+            encontradas["data"] = encontradas["data"].dt.strftime("%d/%m/%Y")
+            exibir_tabela(
+                encontradas[["nome", "data", "tema"] + _COMPETENCIAS + ["total"]],
+                hide_index=True, use_container_width=True,
+            )
+
+
+# --- Modo Comparação ---
+
+@medir
+def _calcular_comparacao(por_aluno: pd.DataFrame, df_sel: pd.DataFrame, ids: list[int]) -> pd.DataFrame:
+    # Médias por competência de todos os escolhidos saem das somas por aluno do cubo;
+    # recorde e nota mais recente, de um único groupby sobre as redações deles
+    selecao = por_aluno.reindex(ids)
+    n = selecao["n"].fillna(0)
+    tabela = selecao[_COMPETENCIAS + ["total"]].div(n.where(n > 0), axis=0)
+    tabela["n"] = n.astype(int)
+    grupos = df_sel.sort_values("data").groupby("id_aluno")["total"]
+    tabela["recorde"] = grupos.max()
+    tabela["recente"] = grupos.last()
+    return tabela
+
+
+def _figura_radar_comparacao(tabela: pd.DataFrame, medias_turma: list[float], rotulos: list[str]) -> go.Figure:
+    labels_radar = _LABELS_COMPETENCIAS + [_LABELS_COMPETENCIAS[0]]
+    fig = go.Figure(go.Scatterpolar(
+        r=medias_turma + [medias_turma[0]], theta=labels_radar, fill="toself",
+        name="Média Geral", line_color="rgba(150,150,150,0.5)", marker=dict(size=0),
+    ))
+    for (_, linha), rotulo, cor in zip(tabela[_COMPETENCIAS].fillna(0).iterrows(), rotulos, CORES_COMPARACAO):
+        r = linha.tolist()
+        fig.add_trace(go.Scatterpolar(r=r + [r[0]], theta=labels_radar, name=rotulo, line=dict(color=cor, width=3)))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 200], gridcolor="#444"),
+            angularaxis=dict(gridcolor="#444"),
+        ),
+        template="plotly_dark",
+        legend=dict(orientation="h", yanchor="bottom", y=1.1, xanchor="center", x=0.5),
+        height=550,
+    )
+    return fig
+
+
+def _figura_evolucao_comparacao(
+    df_sel: pd.DataFrame, ids: list[int], rotulos: list[str], faixas: pd.DataFrame | None = None
+) -> go.Figure:
+    fig = go.Figure()
+    por_aluno = dict(tuple(df_sel.sort_values("data").groupby("id_aluno")))
+    for id_aluno, rotulo, cor in zip(ids, rotulos, CORES_COMPARACAO):
+        serie = por_aluno.get(id_aluno, df_sel.iloc[:0])
+        fig.add_trace(go.Scatter(
+            x=serie["data"], y=serie["total"], customdata=serie[["tema"]], mode="lines+markers", name=rotulo,
+            line=dict(color=cor, width=3), marker=dict(size=9, color=cor),
+            hovertemplate=f"<b>{rotulo}:</b> %{{y}} pts<br>%{{customdata[0]}}<extra></extra>",
+        ))
+    if faixas is not None:
+        adicionar_faixas(fig, faixas, sufixo=" pts", forma="hv")
+    fig.update_layout(
+        template="plotly_dark",
+        yaxis_range=[0, 1050],
+        xaxis=dict(tickformat="%d/%m", gridcolor="#333"),
+        hovermode="x unified",
+        height=420,
+    )
+    return fig
+
+
+@medir
+def _render_comparacao(
+    df_redacoes: pd.DataFrame, cubo: CuboCompetencias, registro: RegistroAlunos, ids: list[int],
+    id_mentoria: int | None,
+) -> None:
+    st.subheader("👥 Comparação de Mentorados")
+    rotulos = [registro.rotulo(i) for i in ids]
+
+    df_sel = filtrar_alunos(df_redacoes, ids)
+    if df_sel.empty:
+        st.info("💡 Nenhuma redação registrada para os mentorados escolhidos.")
+        return
+    tabela = _calcular_comparacao(cubo.por_aluno(id_mentoria), df_sel, ids)
+
+    exibir_tabela(
+        pd.DataFrame({
+            "Mentorado": rotulos,
+            "Redações": tabela["n"].to_numpy(),
+            "Pontuação Média": tabela["total"].round(0).to_numpy(),
+            "Maior Pontuação": tabela["recorde"].to_numpy(),
+            "Mais Recente": tabela["recente"].to_numpy(),
+        }),
+        hide_index=True, use_container_width=True,
+        column_config={"Pontuação Média": st.column_config.ProgressColumn(
+            "Pontuação Média", min_value=0, max_value=1000, format="%d",
+        )},
+    )
+
+    st.markdown("---")
+    st.subheader("📈 Curvas de Performance")
+    inicio = df_sel["data"].min() - pd.Timedelta(days=6)
+    faixas = faixas_semanais(df_redacoes).loc[inicio:df_sel["data"].max()]
+    exibir_grafico(_figura_evolucao_comparacao(df_sel, ids, rotulos, faixas), use_container_width=True)
+
+    st.markdown("---")
+    st.subheader("🎯 Competências Lado a Lado")
+    exibir_grafico(
+        _figura_radar_comparacao(tabela, cubo.medias_grupo(id_mentoria), rotulos), use_container_width=True
+    )
+
+
 # --- Ponto de entrada ---
 
 def exibir_modulo_redacoes(df_alunos: pd.DataFrame, df_redacoes: pd.DataFrame) -> None:
-    st.markdown(_CSS_MODULO, unsafe_allow_html=True)
+    aplicar_css(_CSS_MODULO)
     st.title("✍️ Central de Redações")
     st.subheader("*Avaliação técnica, progressão e consistência argumentativa*")
 
-    alunos_filtrados, nome_sel = _render_filtros_sidebar(df_alunos)
+    registro = obter_registro(df_alunos)
+    id_mentoria, id_aluno, ids_comparacao = _render_filtros_sidebar(registro)
 
-    if nome_sel == "Todos":
-        mask_geral = df_redacoes["id_aluno"].isin(alunos_filtrados["id_aluno"])
-    else:
-        id_aluno = df_alunos[df_alunos["nome"] == nome_sel]["id_aluno"].values[0]
-        mask_geral = df_redacoes["id_aluno"] == id_aluno
+    # O cubo de competências cobre todas as mentorias: atualizado com a base inteira, antes da partição
+    cubo = obter_cubo(df_redacoes, df_alunos)
 
-    df_filtrado = df_redacoes[mask_geral].copy()
-    df_filtrado["tema"] = df_filtrado["tema"].replace(["", None, np.nan], "Não informado")
-    df_filtrado = df_filtrado.sort_values("data")
+    # Com uma mentoria escolhida, a sessão só toca a partição dela
+    df_redacoes = particao(df_redacoes, df_alunos, id_mentoria)
+    df_alunos = particao(df_alunos, df_alunos, id_mentoria)
+
+    if len(ids_comparacao) >= 2:
+        _render_comparacao(df_redacoes, cubo, registro, ids_comparacao, id_mentoria)
+        return
+    if ids_comparacao:
+        st.info("👥 Escolha ao menos dois mentorados para comparar.")
+
+    spec = FiltroSpec(id_mentoria=id_mentoria, id_aluno=id_aluno)
+    df_filtrado = filtrar(df_redacoes, spec, df_alunos)
 
     if df_filtrado.empty:
         st.info("💡 Nenhuma redação registrada para os filtros selecionados.")
@@ -212,18 +442,22 @@ def exibir_modulo_redacoes(df_alunos: pd.DataFrame, df_redacoes: pd.DataFrame) -
     _render_metricas_gerais(df_filtrado)
     st.markdown("---")
 
-    if nome_sel == "Todos":
-        _render_radar_grupo(df_filtrado)
+    if id_aluno is None:
+        _render_radar_grupo(cubo, id_mentoria)
     else:
-        _render_evolucao_individual(df_filtrado)
-        _render_radar_individual(df_filtrado, df_redacoes)
+        _render_evolucao_individual(df_filtrado, faixas_semanais(df_redacoes))
+        _render_radar_individual(cubo, id_aluno, id_mentoria)
+    _render_tendencia_competencias(cubo, id_mentoria, id_aluno)
 
-    _render_historico(df_filtrado, df_alunos, nome_sel)
+    _render_historico(df_filtrado, registro, id_aluno)
+
+    st.markdown("---")
+    _render_explorador_temas(df_redacoes, df_filtrado, registro, id_aluno)
 
     st.markdown("---")
     col1, col_centro, col2 = st.columns([2, 1, 2])
     with col_centro:
-        st.image("logo.png", width=250)
+        st.image(LOGO, width=250)
     with col1:
         st.caption("*© 2026 • Central de Performance Acadêmica - Estude com Danilo*")
     with col2:
@@ -5,14 +5,24 @@ import pandas as pd
 import numpy as np
 import math
 import streamlit.components.v1 as components
-
-MAPA_MENTORIAS = {1: "Estude com Danilo", 2: "Projeto Medicina"}
+from consultas import (
+    FiltroSpec, filtrar, filtrar_alunos, particao, versao_dados,
+    render_filtro_mentoria, render_filtro_aluno, render_filtro_comparacao,
+)
+from registro import RegistroAlunos, obter_registro
+from instrumentacao import medir
+from estilos import CORES_COMPARACAO, LOGO, aplicar_css
+from compacto import abas, exibir_grafico, exibir_tabela, secao_recolhida
+from arquivo import chave, estender, obter_arquivo
+from tarefas import acompanhar, obter_pool
 
 ORDEM_AREAS = ["Linguagens", "Humanas", "Natureza", "Matemática"]
 DIA_1 = ["Linguagens", "Humanas"]
 DIA_2 = ["Natureza", "Matemática"]
 TOTAL_QUESTOES_COMPLETO = 180
 NUM_AREAS = 4
+_VISOES = ["Completo", "Dia 1 (Ling/Hum)", "Dia 2 (Nat/Mat)"]
+_ESTIMADA = "Nota Estimada"
 
 _CORES_AREAS = {
     "Linguagens": "#4d0000",
@@ -42,12 +52,13 @@ _CSS_MODULO = """
 </style>
 """
 
+@medir
 def _filtrar_simulados_completos(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     if df.empty:
         return pd.DataFrame(), pd.DataFrame()
     check = (
         df.groupby(["id_aluno", "tipo", "numero", "ano"])
-        .agg({"area": "nunique", "total": "sum", "acertos": "sum"})
+        .agg({"area": "nunique", "total": "sum", "acertos": "sum", "nota_est": "mean"})
         .reset_index()
     )
     simulados_validos = check[
@@ -61,24 +72,31 @@ def _posicao_ranking(idx: int) -> str:
     emojis = {0: "🥇", 1: "🥈", 2: "🥉"}
     return emojis.get(idx, f"{idx + 1}º")
 
+@medir
 def _render_cards_records(simulados_validos: pd.DataFrame, df_completos: pd.DataFrame) -> None:
     if df_completos.empty:
         st.info("💡 Realize um simulado completo para habilitar as métricas.")
         return
 
-    medias_por_area = df_completos.groupby("area")["acertos"].mean()
-    melhor_area_nome = medias_por_area.idxmax()
-    melhor_area_val  = math.ceil(medias_por_area.max())
-    pior_area_nome   = medias_por_area.idxmin()
-    pior_area_val    = math.ceil(medias_por_area.min())
+    medias_por_area = df_completos.groupby("area")[["acertos", "nota_est"]].mean()
+    melhor_area_nome = medias_por_area["acertos"].idxmax()
+    melhor_area_val  = math.ceil(medias_por_area["acertos"].max())
+    pior_area_nome   = medias_por_area["acertos"].idxmin()
+    pior_area_val    = math.ceil(medias_por_area["acertos"].min())
     melhor_nota_total = simulados_validos["acertos"].max()
+    melhor_estimada   = simulados_validos["nota_est"].max()
     qtd_completos     = len(simulados_validos)
 
+    def _estimada(valor: float) -> str:
+        return "" if pd.isna(valor) else f" • ≈{valor:.0f} pts"
+
     c1, c2, c3, c4 = st.columns(4)
     cards = [
-        (c1, "#28a745", "🏆 Melhor Área",  melhor_area_nome, f"{int(melhor_area_val)}", "acertos"),
-        (c2, "#c00000", "⚠️ Ponto de Melhoria", pior_area_nome, f"{int(pior_area_val)}", "acertos"),
-        (c3, "#c00000", "🎯 Recorde Individual", "Simulado Geral", f"{int(melhor_nota_total)}", "/180"),
+        (c1, "#28a745", "🏆 Melhor Área",  melhor_area_nome, f"{int(melhor_area_val)}",
+         "acertos" + _estimada(medias_por_area.loc[melhor_area_nome, "nota_est"])),
+        (c2, "#c00000", "⚠️ Ponto de Melhoria", pior_area_nome, f"{int(pior_area_val)}",
+         "acertos" + _estimada(medias_por_area.loc[pior_area_nome, "nota_est"])),
+        (c3, "#c00000", "🎯 Recorde Individual", "Simulado Geral", f"{int(melhor_nota_total)}", "/180" + _estimada(melhor_estimada)),
         (c4, "#c00000", "📝 Simulados Concluídos", "Concluídos", f"{qtd_completos}", "simulados"),
     ]
     for col, cor, label, titulo, valor, sufixo in cards:
@@ -92,6 +110,7 @@ def _render_cards_records(simulados_validos: pd.DataFrame, df_completos: pd.Data
                 unsafe_allow_html=True,
             )
 
+@medir
 def _render_diagnostico_geral(df_base: pd.DataFrame) -> None:
     if df_base.empty:
         st.warning("Sem dados disponíveis para os filtros selecionados.")
@@ -113,7 +132,7 @@ def _render_diagnostico_geral(df_base: pd.DataFrame) -> None:
             polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
             template="plotly_dark", margin=dict(t=40, b=40),
         )
-        st.plotly_chart(fig_radar, use_container_width=True)
+        exibir_grafico(fig_radar, use_container_width=True)
     with col_dir:
         df_vol = (
             df_base.groupby("area")["total"].sum()
@@ -129,15 +148,15 @@ def _render_diagnostico_geral(df_base: pd.DataFrame) -> None:
             yaxis={"categoryorder": "array", "categoryarray": ORDEM_AREAS[::-1]},
             margin=dict(t=40),
         )
-        st.plotly_chart(fig_vol, use_container_width=True)
+        exibir_grafico(fig_vol, use_container_width=True)
 
+@medir
 def _render_diagnostico_area(df_base: pd.DataFrame, area_sel: str) -> None:
     col_esq, col_dir = st.columns([1, 1.2])
-    df_area = df_base[df_base["area"] == area_sel].copy()
+    df_area = df_base[df_base["area"] == area_sel]
     if df_area.empty:
         st.info(f"Sem dados registrados para a área: {area_sel}")
         return
-    df_area["data"] = pd.to_datetime(df_area["data"])
     df_plot = (
         df_area.groupby("data")["rendimento_perc"]
         .mean().reset_index().sort_values("data")
@@ -150,7 +169,7 @@ def _render_diagnostico_area(df_base: pd.DataFrame, area_sel: str) -> None:
             gauge={"axis": {"range": [0, 100]}, "bar": {"color": "#c00000"}},
         ))
         fig_gauge.update_layout(template="plotly_dark", height=380)
-        st.plotly_chart(fig_gauge, use_container_width=True)
+        exibir_grafico(fig_gauge, use_container_width=True)
     with col_dir:
         fig_line = px.line(df_plot, x="data", y="rendimento_perc", markers=True)
         fig_line.update_traces(
@@ -169,26 +188,182 @@ def _render_diagnostico_area(df_base: pd.DataFrame, area_sel: str) -> None:
             template="plotly_dark", height=380, yaxis_range=[0, 105], showlegend=False,
             xaxis=dict(tickformat="%d/%m/%y")
         )
-        st.plotly_chart(fig_line, use_container_width=True)
+        exibir_grafico(fig_line, use_container_width=True)
 
-def _render_historico_simulados(df_base: pd.DataFrame, df_alunos: pd.DataFrame, nome_sel: str) -> None:
+@medir
+def _render_historico_simulados(df_base: pd.DataFrame, registro: RegistroAlunos, id_aluno: int | None) -> None:
     if df_base.empty:
         return
-    with st.expander("📄 Histórico Completo de Simulados"):
+    secao = secao_recolhida("📄 Histórico Completo de Simulados", "simu_historico")
+    if secao is None:
+        return
+    with secao:
         df_hist = df_base.copy()
-        df_hist["data"] = pd.to_datetime(df_hist["data"])
         df_hist["Data"] = df_hist["data"].dt.strftime("%d/%m/%Y").fillna("Data N/D")
-        df_hist["%"] = (df_hist["acertos"] / df_hist["total"] * 100).fillna(0).map("{:.1f}%".format)
-        colunas_originais = ["Data", "tipo", "numero", "ano", "area", "acertos", "total", "%"]
-        if nome_sel == "Todos":
-            df_hist = df_hist.merge(df_alunos[["id_aluno", "nome"]], on="id_aluno")
+        df_hist["%"] = df_hist["rendimento_perc"].map("{:.1f}%".format)
+        df_hist[_ESTIMADA] = np.where(
+            df_hist["nota_est"].notna(),
+            df_hist["nota_min"].round().astype("Int64").astype(str) + "–" + df_hist["nota_max"].round().astype("Int64").astype(str),
+            "N/D",
+        )
+        colunas_originais = ["Data", "tipo", "numero", "ano", "area", "acertos", "total", "%", _ESTIMADA]
+        if id_aluno is None:
+            df_hist = registro.juntar_nomes(df_hist)
             colunas_finais = ["nome"] + colunas_originais
         else:
             colunas_finais = colunas_originais
         df_render = df_hist.sort_values("data", ascending=False)[colunas_finais]
-        st.dataframe(df_render, use_container_width=True, hide_index=True)
+        exibir_tabela(df_render, use_container_width=True, hide_index=True)
+
+def _pivotar(df: pd.DataFrame, indice) -> pd.DataFrame:
+    # Acertos e nota estimada por área (nota_<área>), lado a lado, mais o total de questões
+    rp = df.pivot_table(index=indice, columns="area", values=["acertos", "nota_est"],
+                        aggfunc={"acertos": "sum", "nota_est": "mean"})
+    # Sem tabelas_enem.csv a nota estimada é toda NaN e a pivot descarta a coluna: as áreas voltam vazias
+    rp = rp.reindex(columns=pd.MultiIndex.from_product([["acertos", "nota_est"], ORDEM_AREAS]))
+    rf = pd.concat([rp["acertos"], rp["nota_est"].add_prefix("nota_")], axis=1)
+    rf["total"] = df.groupby(indice)["total"].sum()
+    return rf
+
+@medir
+def _montar_ranking(df_exame: pd.DataFrame, visao: str) -> tuple[pd.DataFrame, list[str]]:
+    return _aplicar_visao(_pivotar(df_exame, "id_aluno").reset_index(), visao)
+
+def _aplicar_visao(rf: pd.DataFrame, visao: str) -> tuple[pd.DataFrame, list[str]]:
+    if visao == "Completo":
+        rf = rf[rf["total"] == TOTAL_QUESTOES_COMPLETO].copy()
+        rf["Total Dia 1"] = rf[DIA_1].sum(axis=1)
+        rf["Total Dia 2"] = rf[DIA_2].sum(axis=1)
+        rf["Total Geral"] = rf["Total Dia 1"] + rf["Total Dia 2"]
+        areas, col_notas = ORDEM_AREAS, ORDEM_AREAS + ["Total Dia 1", "Total Dia 2", "Total Geral"]
+    elif visao == "Dia 1 (Ling/Hum)":
+        rf = rf[rf[DIA_1].notnull().all(axis=1)].copy()
+        rf["Total Dia 1"] = rf[DIA_1].sum(axis=1)
+        areas, col_notas = DIA_1, DIA_1 + ["Total Dia 1"]
+    else:
+        rf = rf[rf[DIA_2].notnull().all(axis=1)].copy()
+        rf["Total Dia 2"] = rf[DIA_2].sum(axis=1)
+        areas, col_notas = DIA_2, DIA_2 + ["Total Dia 2"]
+    # Média das notas estimadas das áreas da visão; o total de acertos continua sendo a última coluna.
+    # Área sem estimativa (ou tabelas_enem.csv ausente) é ignorada; sem nenhuma, a nota fica NaN
+    notas = rf.reindex(columns=[f"nota_{a}" for a in areas]).astype(float)
+    rf[_ESTIMADA] = notas.mean(axis=1).round()
+    return rf, col_notas[:-1] + [_ESTIMADA, col_notas[-1]]
+
+# --- Notas por exame (uma vez por versão dos dados) ---
+
+_EXAME = ["tipo", "numero", "ano"]
+_COLUNAS_NOTAS = _EXAME + ["id_aluno", "area", "acertos", "nota_est", "total", "data"]
+
+def _notas_parciais(df: pd.DataFrame) -> dict:
+    # Uma única pivot para todos os exames; por visão, as notas de cada exame e coluna já ordenadas,
+    # de modo que posição e percentil de qualquer aluno saem de uma busca binária.
+    # Cada exame só depende das próprias linhas: no pool, cada processo recebe exames inteiros.
+    chave = _EXAME + ["id_aluno"]
+    notas = _pivotar(df, chave)
+    datas = df.groupby(_EXAME)["data"].min()
+
+    por_visao = {}
+    for visao in _VISOES:
+        rf, col_notas = _aplicar_visao(notas, visao)
+        ordenadas = {
+            exame: {col: np.sort(grupo[col].dropna().to_numpy()) for col in col_notas}
+            for exame, grupo in rf.groupby(level=_EXAME, sort=False)
+        }
+        por_visao[visao] = (rf, col_notas, ordenadas)
+    return {"datas": datas, "visoes": por_visao}
+
+def _dividir_por_exame(df: pd.DataFrame, partes: int) -> list[pd.DataFrame]:
+    df = df[_COLUNAS_NOTAS]
+    exames = list(df.groupby(_EXAME, sort=True).indices.values())
+    if partes <= 1 or len(exames) <= 1:
+        return [df]
+    lotes = np.array_split(np.arange(len(exames)), min(partes, len(exames)))
+    return [df.iloc[np.sort(np.concatenate([exames[i] for i in lote]))] for lote in lotes]
 
-def _render_ranking_geral(df_simulados: pd.DataFrame, df_alunos: pd.DataFrame, df_base: pd.DataFrame) -> None:
+@medir
+def _combinar_notas(partes: list[dict]) -> dict:
+    if len(partes) == 1:
+        return partes[0]
+    visoes = {}
+    for visao in _VISOES:
+        ordenadas = {}
+        for parte in partes:
+            ordenadas.update(parte["visoes"][visao][2])
+        rf = pd.concat([parte["visoes"][visao][0] for parte in partes]).sort_index()
+        visoes[visao] = (rf, partes[0]["visoes"][visao][1], ordenadas)
+    return {"datas": pd.concat([parte["datas"] for parte in partes]).sort_index(), "visoes": visoes}
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _notas_por_exame(versao: str, _df: pd.DataFrame) -> dict:
+    return _notas_parciais(_df)
+
+def _tabela_notas(df_simulados: pd.DataFrame, slot: str) -> dict | None:
+    # Com o pool ligado, a pivot roda fora da thread do script e a seção mostra o progresso até terminar
+    pool, versao = obter_pool(), versao_dados(df_simulados)
+    if pool is None:
+        return _notas_por_exame(versao, df_simulados)
+    return acompanhar(
+        pool, ("simulados.notas", versao), _notas_parciais,
+        lambda partes: _dividir_por_exame(df_simulados, partes), _combinar_notas,
+        rotulo="Notas da turma por simulado", slot=slot,
+    )
+
+def _percentil(ordenadas: np.ndarray, nota: float) -> float:
+    # % da turma do exame com nota estritamente menor
+    return 100 * np.searchsorted(ordenadas, nota, side="left") / len(ordenadas) if len(ordenadas) else 0.0
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _trajetorias(versao: str, _tabela: dict) -> dict:
+    # Um único rank agrupado por exame sobre as provas completas; alunos × exames em ordem cronológica
+    rf, col_notas, _ = _tabela["visoes"]["Completo"]
+    notas = rf[col_notas[-1]]
+    grupos = notas.groupby(level=_EXAME, sort=False)
+    posicoes = grupos.rank(ascending=False, method="min")
+    participantes = grupos.transform("size")
+    percentis = 100 * (1 - (posicoes - 1) / participantes)
+
+    exames = _tabela["datas"].reindex(grupos.size().index).sort_values().index
+    pct = percentis.unstack(_EXAME).reindex(columns=exames)
+    # Variação entre o primeiro e o último simulado feito, em pontos de percentil (positivo = subiu);
+    # recorte sem nenhuma prova completa (ex.: só o dia 1) fica sem colunas e sem variação
+    if pct.shape[1]:
+        delta = pct.ffill(axis=1).iloc[:, -1] - pct.bfill(axis=1).iloc[:, 0]
+    else:
+        delta = pd.Series(np.nan, index=pct.index, dtype=float)
+    ordem = delta.sort_values(ascending=False, na_position="last").index
+    return {
+        "posicoes": posicoes.unstack(_EXAME).reindex(index=ordem, columns=exames),
+        "percentis": pct.loc[ordem],
+        "delta": delta.loc[ordem],
+        "participantes": grupos.size().reindex(exames),
+    }
+
+@medir
+def _calcular_ranking_individual(tabela: dict, id_aluno_focado: int, visao: str) -> pd.DataFrame:
+    rf, col_notas, ordenadas = tabela["visoes"][visao]
+    if id_aluno_focado not in rf.index.get_level_values("id_aluno"):
+        return pd.DataFrame()
+    do_aluno = rf.xs(id_aluno_focado, level="id_aluno")
+    do_aluno = do_aluno.iloc[np.argsort(tabela["datas"].reindex(do_aluno.index).to_numpy(), kind="stable")]
+
+    resumo = []
+    for exame, notas in zip(do_aluno.index, do_aluno[col_notas].to_numpy()):
+        final = ordenadas[exame][col_notas[-1]]
+        # Empates dividem a melhor posição: acima do aluno só quem tirou nota maior
+        acima = len(final) - np.searchsorted(final, notas[-1], side="right")
+        linha = {"Simulado": f"{exame[0]} {exame[1]} ({exame[2]})", "Posição": f"{_posicao_ranking(acima)} de {len(final)}"}
+        for col, nota in zip(col_notas, notas):
+            linha[col] = 0 if np.isnan(nota) else int(nota)
+        for col, nota in zip(col_notas, notas):
+            linha[f"Supera {col}"] = 0.0 if np.isnan(nota) else _percentil(ordenadas[exame][col], nota)
+        resumo.append(linha)
+    return pd.DataFrame(resumo)
+
+@medir
+def _render_ranking_geral(
+    df_simulados: pd.DataFrame, tabela: dict, registro: RegistroAlunos, df_base: pd.DataFrame
+) -> None:
     st.subheader("🏆 Ranking Geral")
     if df_base.empty:
         st.info("Sem dados disponíveis para montar o ranking.")
@@ -203,39 +378,19 @@ def _render_ranking_geral(df_simulados: pd.DataFrame, df_alunos: pd.DataFrame, d
         anos = df_simulados[(df_simulados["tipo"] == r_tipo) & (df_simulados["numero"] == r_num)]["ano"].unique()
         r_ano = st.selectbox("Ano", sorted(anos, key=str), key="r_a")
     with c4:
-        r_visao = st.selectbox("Visão", ["Completo", "Dia 1 (Ling/Hum)", "Dia 2 (Nat/Mat)"], key="r_v")
+        r_visao = st.selectbox("Visão", _VISOES, key="r_v")
 
-    df_f = df_simulados[(df_simulados["tipo"] == r_tipo) & (df_simulados["numero"] == r_num) & (df_simulados["ano"] == r_ano)]
-    df_f = df_f[df_f["id_aluno"].isin(df_base["id_aluno"].unique())]
-    if df_f.empty:
+    # Notas do exame saem da tabela pré-calculada da versão: sem pivot nem conversão por linha no rerun
+    rf, col_notas, ordenadas = tabela["visoes"][r_visao]
+    if (r_tipo, r_num, r_ano) not in ordenadas:
         st.warning("⚠️ Nenhum registro encontrado para este simulado.")
         return
-    rp = df_f.pivot_table(index="id_aluno", columns="area", values="acertos", aggfunc="sum").reset_index()
-    for area in ORDEM_AREAS:
-        if area not in rp.columns: rp[area] = np.nan
-    ct = df_f.groupby("id_aluno")["total"].sum().reset_index()
-    rf = rp.merge(ct, on="id_aluno")
+    rf = rf.xs((r_tipo, r_num, r_ano), level=_EXAME)
+    rf = rf[rf.index.isin(df_base["id_aluno"].unique())].reset_index()
+    if rf.empty: return
+    colunas_exibir = ["Posição", "Aluno"] + col_notas
 
-    if r_visao == "Completo":
-        rf = rf[rf["total"] == TOTAL_QUESTOES_COMPLETO].copy()
-        if rf.empty: return
-        rf["Total Dia 1"] = rf[DIA_1].sum(axis=1)
-        rf["Total Dia 2"] = rf[DIA_2].sum(axis=1)
-        rf["Total Geral"] = rf["Total Dia 1"] + rf["Total Dia 2"]
-        colunas_exibir = ["Posição", "Aluno"] + ORDEM_AREAS + ["Total Dia 1", "Total Dia 2", "Total Geral"]
-    elif r_visao == "Dia 1 (Ling/Hum)":
-        rf = rf[rf[DIA_1].notnull().all(axis=1)].copy()
-        if rf.empty: return
-        rf["Total Dia 1"] = rf[DIA_1].sum(axis=1)
-        colunas_exibir = ["Posição", "Aluno"] + DIA_1 + ["Total Dia 1"]
-    else:
-        rf = rf[rf[DIA_2].notnull().all(axis=1)].copy()
-        if rf.empty: return
-        rf["Total Dia 2"] = rf[DIA_2].sum(axis=1)
-        colunas_exibir = ["Posição", "Aluno"] + DIA_2 + ["Total Dia 2"]
-
-    rf = rf.merge(df_alunos[["id_aluno", "nome"]], on="id_aluno").rename(columns={"nome": "Aluno"})
-    col_notas = [c for c in colunas_exibir if c not in ["Posição", "Aluno"]]
+    rf = registro.juntar_nomes(rf, coluna="Aluno")
     st.markdown("---")
     col_ordem_sel = st.radio("Ordenar ranking por:", col_notas, index=len(col_notas)-1, horizontal=True)
     top_10 = rf.sort_values(col_ordem_sel, ascending=False).head(10)
@@ -253,67 +408,81 @@ def _render_ranking_geral(df_simulados: pd.DataFrame, df_alunos: pd.DataFrame, d
             list_pos.append(_posicao_ranking(pos_aluno))
             pos_aluno += 1
     rf_final["Posição"] = list_pos
-    st.dataframe(rf_final[colunas_exibir].style.apply(lambda r: ['background-color: rgba(192, 0, 0, 0.2); font-weight: bold' if r['Aluno'] == "📊 MÉDIA TOP 10" else ''] * len(r), axis=1), use_container_width=True, hide_index=True)
+    exibir_tabela(rf_final[colunas_exibir].style.apply(lambda r: ['background-color: rgba(192, 0, 0, 0.2); font-weight: bold' if r['Aluno'] == "📊 MÉDIA TOP 10" else ''] * len(r), axis=1), use_container_width=True, hide_index=True)
 
-def _render_ranking_individual(df_simulados: pd.DataFrame, id_aluno_focado: int, nome_sel: str) -> None:
-    st.subheader(f"Histórico de Posicionamento: {nome_sel}")
-    r_visao_ind = st.selectbox("Filtrar Histórico por", ["Completo", "Dia 1 (Ling/Hum)", "Dia 2 (Nat/Mat)"], key="r_v_ind")
-    aluno_simus = df_simulados[df_simulados["id_aluno"] == id_aluno_focado][["tipo", "numero", "ano"]].drop_duplicates()
-    if aluno_simus.empty:
-        st.info("💡 Realize simulados para habilitar o histórico de ranking.")
+def _figura_trajetorias(trajetorias: dict, ids: pd.Index, rotulos: list[str]) -> go.Figure:
+    pct = trajetorias["percentis"].loc[ids]
+    pos = trajetorias["posicoes"].loc[ids].to_numpy()
+    participantes = trajetorias["participantes"].to_numpy()
+    texto = [
+        [f"{int(p)}º de {n}" if not np.isnan(p) else "não fez" for p, n in zip(linha, participantes)]
+        for linha in pos
+    ]
+    fig = go.Figure(go.Heatmap(
+        z=pct.to_numpy(), x=[f"{t} {n} ({a})" for t, n, a in pct.columns], y=rotulos,
+        zmin=0, zmax=100, colorscale="RdYlGn", customdata=texto, xgap=1, ygap=1,
+        colorbar=dict(title="Supera %"),
+        hovertemplate="<b>%{y}</b><br>%{x}<br>Posição: %{customdata}<br>Supera: %{z:.0f}% da turma<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_dark", height=max(400, 24 * len(rotulos) + 140),
+        yaxis=dict(autorange="reversed"), xaxis=dict(tickangle=-45), margin=dict(l=10, r=10, t=20),
+    )
+    return fig
+
+@medir
+def _render_trajetoria_turma(df_simulados: pd.DataFrame, tabela: dict, registro: RegistroAlunos) -> None:
+    st.markdown("---")
+    st.subheader("🧭 Trajetória da Turma")
+    trajetorias = _trajetorias(versao_dados(df_simulados), tabela)
+    if trajetorias["percentis"].shape[1] < 2:
+        st.info("💡 A trajetória aparece a partir de dois simulados completos.")
         return
-    resumo = []
-    for _, row in aluno_simus.iterrows():
-        comp = df_simulados[(df_simulados["tipo"] == row["tipo"]) & (df_simulados["numero"] == row["numero"]) & (df_simulados["ano"] == row["ano"])]
-        comp_pivot = comp.pivot_table(index="id_aluno", columns="area", values="acertos", aggfunc="sum").reset_index()
-        for area in ORDEM_AREAS:
-            if area not in comp_pivot.columns: comp_pivot[area] = np.nan
-        comp_qtd = comp.groupby("id_aluno")["total"].sum().reset_index()
-        rank = comp_pivot.merge(comp_qtd, on="id_aluno")
-        if r_visao_ind == "Completo":
-            rank = rank[rank["total"] == TOTAL_QUESTOES_COMPLETO].copy()
-            if rank.empty: continue
-            rank["Total Dia 1"] = rank[DIA_1].sum(axis=1)
-            rank["Total Dia 2"] = rank[DIA_2].sum(axis=1)
-            rank["Sort_Col"] = rank["Total Dia 1"] + rank["Total Dia 2"]
-            cols_interesse = ORDEM_AREAS + ["Total Dia 1", "Total Dia 2", "Sort_Col"]
-            map_nomes = {"Sort_Col": "Total Geral"}
-        elif r_visao_ind == "Dia 1 (Ling/Hum)":
-            rank = rank[rank[DIA_1].notnull().all(axis=1)].copy()
-            if rank.empty: continue
-            rank["Sort_Col"] = rank[DIA_1].sum(axis=1)
-            cols_interesse = DIA_1 + ["Sort_Col"]
-            map_nomes = {"Sort_Col": "Total Dia 1"}
-        else:
-            rank = rank[rank[DIA_2].notnull().all(axis=1)].copy()
-            if rank.empty: continue
-            rank["Sort_Col"] = rank[DIA_2].sum(axis=1)
-            cols_interesse = DIA_2 + ["Sort_Col"]
-            map_nomes = {"Sort_Col": "Total Dia 2"}
-        if id_aluno_focado in rank["id_aluno"].values:
-            rank = rank.sort_values("Sort_Col", ascending=False).reset_index(drop=True)
-            idx = rank[rank["id_aluno"] == id_aluno_focado].index[0]
-            linha = {"Simulado": f"{row['tipo']} {row['numero']} ({row['ano']})", "Posição": f"{_posicao_ranking(idx)} de {len(rank)}"}
-            for col in cols_interesse: linha[map_nomes.get(col, col)] = int(rank.loc[idx, col]) if not np.isnan(rank.loc[idx, col]) else 0
-            resumo.append(linha)
-    if resumo: st.dataframe(pd.DataFrame(resumo), use_container_width=True, hide_index=True)
-    else: st.warning("⚠️ Nenhum registro completo encontrado.")
-
-def _render_registro_ausencia(df_alunos_filt: pd.DataFrame, df_simu: pd.DataFrame) -> None:
+    st.caption("*Posição em cada simulado completo (Total Geral), ordenada pela variação entre o primeiro e o último simulado feito.*")
+    recorte = st.radio("Mostrar", ["Todos", "10 que mais subiram", "10 que mais caíram"], horizontal=True, key="traj")
+    delta = trajetorias["delta"]
+    if recorte == "10 que mais subiram":
+        delta = delta.dropna().head(10)
+    elif recorte == "10 que mais caíram":
+        delta = delta.dropna().tail(10).iloc[::-1]
+    rotulos = [
+        f"{registro.rotulo(i)} ({d:+.0f})" if not np.isnan(d) else registro.rotulo(i)
+        for i, d in zip(delta.index.tolist(), delta.to_numpy())
+    ]
+    exibir_grafico(_figura_trajetorias(trajetorias, delta.index, rotulos), use_container_width=True)
+
+@medir
+def _render_ranking_individual(df_simulados: pd.DataFrame, tabela: dict, id_aluno_focado: int, nome_sel: str) -> None:
+    st.subheader(f"Histórico de Posicionamento: {nome_sel}")
+    r_visao_ind = st.selectbox("Filtrar Histórico por", _VISOES, key="r_v_ind")
+    resumo = _calcular_ranking_individual(tabela, id_aluno_focado, r_visao_ind)
+    if not resumo.empty:
+        st.caption("*Supera: % da turma do mesmo simulado com nota menor na área ou no dia.*")
+        percentis = {
+            col: st.column_config.ProgressColumn(col, format="%.0f%%", min_value=0, max_value=100)
+            for col in resumo.columns if col.startswith("Supera ")
+        }
+        exibir_tabela(resumo, use_container_width=True, hide_index=True, column_config=percentis)
+    elif (df_simulados["id_aluno"] == id_aluno_focado).any(): st.warning("⚠️ Nenhum registro completo encontrado.")
+    else: st.info("💡 Realize simulados para habilitar o histórico de ranking.")
+
+@medir
+def _render_registro_ausencia(registro: RegistroAlunos, df_simu: pd.DataFrame, df_alunos: pd.DataFrame, id_mentoria: int | None) -> None:
     st.subheader("🕵️ Controle de Assiduidade")
     c1, c2 = st.columns(2)
     with c1: data_ini = st.date_input("Data Inicial", value=pd.to_datetime("today") - pd.Timedelta(days=4), format="DD/MM/YYYY")
     with c2: data_fim = st.date_input("Data Final", value=pd.to_datetime("today"), format="DD/MM/YYYY")
+    df_simu = estender(df_simu, chave("simulados", data_ini))
 
-    df_simu_temp = df_simu.copy()
-    df_simu_temp["data"] = pd.to_datetime(df_simu_temp["data"]).dt.date
-    alunos_com_registro = df_simu_temp[(df_simu_temp["data"] >= data_ini) & (df_simu_temp["data"] <= data_fim)]["id_aluno"].unique()
-    alunos_ausentes = df_alunos_filt[~df_alunos_filt["id_aluno"].isin(alunos_com_registro)].copy()
-    lista_nomes = sorted(alunos_ausentes["nome"].tolist())
+    spec = FiltroSpec(id_mentoria=id_mentoria, data_inicio=data_ini, data_fim=data_fim)
+    alunos_com_registro = filtrar(df_simu, spec, df_alunos)["id_aluno"].unique()
+    ids_mentoria = registro.ids(id_mentoria)
+    ids_ausentes = ids_mentoria[~np.isin(ids_mentoria, alunos_com_registro)]
+    lista_nomes = [registro.nome(i) for i in ids_ausentes.tolist()]
 
     if lista_nomes:
         st.error(f"⚠️ {len(lista_nomes)} alunos não realizaram simulados neste período.")
-        st.dataframe(alunos_ausentes[["nome"]].sort_values("nome"), use_container_width=True, hide_index=True)
+        exibir_tabela(pd.DataFrame({"nome": lista_nomes}), use_container_width=True, hide_index=True)
         texto_copiar = "\\n".join(lista_nomes)
         html_button = f"""
             <button id="copy-btn" style="background-color: #4d0000; color: white; border: none; padding: 10px 20px; border-radius: 5px; cursor: pointer; font-weight: bold; width: 30%; margin-top: 10px;">📋 Copiar Lista de Nomes</button>
@@ -331,61 +500,190 @@ def _render_registro_ausencia(df_alunos_filt: pd.DataFrame, df_simu: pd.DataFram
         components.html(html_button, height=60)
     else: st.success("✅ Excelente! Todos os alunos realizaram simulados no período.")
 
+# --- Modo Comparação ---
+
+@medir
+def _calcular_comparacao(df_sel: pd.DataFrame, trajetorias: dict, ids: list[int]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Rendimento por área, simulados feitos e completos de todos os escolhidos em groupbys únicos;
+    # percentis vêm da trajetória da turma, já calculada uma vez por versão
+    somas = df_sel.groupby(["id_aluno", "area"])[["acertos", "total"]].sum()
+    por_area = (
+        (somas["acertos"] / somas["total"] * 100).where(somas["total"] > 0)
+        .unstack().reindex(index=ids, columns=ORDEM_AREAS)
+    )
+    validos, _ = _filtrar_simulados_completos(df_sel)
+    geral = somas.groupby(level="id_aluno").sum()
+    pct = trajetorias["percentis"].reindex(ids)
+
+    resumo = pd.DataFrame(index=pd.Index(ids, name="id_aluno"))
+    resumo["simulados"] = df_sel.drop_duplicates(_EXAME + ["id_aluno"]).groupby("id_aluno").size()
+    resumo["completos"] = validos.groupby("id_aluno").size()
+    resumo["rendimento"] = (geral["acertos"] / geral["total"] * 100).where(geral["total"] > 0)
+    resumo["nota_est"] = validos.groupby("id_aluno")["nota_est"].mean()
+    resumo["percentil"] = pct.ffill(axis=1).iloc[:, -1] if pct.shape[1] else np.nan
+    resumo["delta"] = trajetorias["delta"].reindex(ids)
+    return por_area, resumo
+
+def _figura_radar_comparacao(por_area: pd.DataFrame, r_turma: list[float], rotulos: list[str]) -> go.Figure:
+    theta = ORDEM_AREAS + [ORDEM_AREAS[0]]
+    fig = go.Figure(go.Scatterpolar(
+        r=r_turma + [r_turma[0]], theta=theta, fill="toself", name="Média Turma",
+        line_color="rgba(150,150,150,0.5)", marker=dict(size=0),
+        hovertemplate="<b>%{theta}</b><br>Média Turma: %{r:.1f}%<extra></extra>",
+    ))
+    for (_, linha), rotulo, cor in zip(por_area.fillna(0).iterrows(), rotulos, CORES_COMPARACAO):
+        r = linha.tolist()
+        fig.add_trace(go.Scatterpolar(
+            r=r + [r[0]], theta=theta, name=rotulo, line=dict(color=cor, width=3),
+            hovertemplate=f"<b>%{{theta}}</b><br>{rotulo}: %{{r:.1f}}%<extra></extra>",
+        ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+        template="plotly_dark", margin=dict(t=40, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
+    )
+    return fig
+
+def _figura_percentis_comparacao(trajetorias: dict, ids: list[int], rotulos: list[str]) -> go.Figure:
+    pct = trajetorias["percentis"].reindex(ids)
+    pos = trajetorias["posicoes"].reindex(ids).to_numpy()
+    participantes = trajetorias["participantes"].to_numpy()
+    exames = [f"{t} {n} ({a})" for t, n, a in pct.columns]
+    fig = go.Figure()
+    for linha, posicoes, rotulo, cor in zip(pct.to_numpy(), pos, rotulos, CORES_COMPARACAO):
+        texto = [f"{int(p)}º de {n}" if not np.isnan(p) else "" for p, n in zip(posicoes, participantes)]
+        fig.add_trace(go.Scatter(
+            x=exames, y=linha, customdata=texto, mode="lines+markers", name=rotulo, connectgaps=True,
+            line=dict(color=cor, width=3), marker=dict(size=9, color=cor),
+            hovertemplate=f"<b>{rotulo}</b>: %{{customdata}} · supera %{{y:.0f}}%<extra></extra>",
+        ))
+    fig.update_layout(
+        template="plotly_dark", yaxis=dict(range=[0, 105], title="Supera % da turma"),
+        xaxis=dict(tickangle=-45), hovermode="x unified", height=450,
+    )
+    return fig
+
+@medir
+def _render_comparacao(df_simulados: pd.DataFrame, registro: RegistroAlunos, ids: list[int]) -> None:
+    st.markdown("### 👥 Comparação de Mentorados")
+    rotulos = [registro.rotulo(i) for i in ids]
+
+    df_sel = filtrar_alunos(df_simulados, ids)
+    if df_sel.empty:
+        st.info("💡 Nenhum simulado registrado para os mentorados escolhidos.")
+        return
+    tabela = _tabela_notas(df_simulados, "simu_notas")
+    if tabela is None:
+        return
+    trajetorias = _trajetorias(versao_dados(df_simulados), tabela)
+    por_area, resumo = _calcular_comparacao(df_sel, trajetorias, ids)
+
+    exibir_tabela(
+        pd.DataFrame({
+            "Mentorado": rotulos,
+            "Simulados": resumo["simulados"].fillna(0).astype(int).to_numpy(),
+            "Completos": resumo["completos"].fillna(0).astype(int).to_numpy(),
+            "Acerto Geral": resumo["rendimento"].round(1).to_numpy(),
+            _ESTIMADA: resumo["nota_est"].round().to_numpy(),
+            "Supera (último)": resumo["percentil"].round().to_numpy(),
+            "Variação": resumo["delta"].round().to_numpy(),
+        }),
+        use_container_width=True, hide_index=True,
+        column_config={
+            "Acerto Geral": st.column_config.ProgressColumn("Acerto Geral", format="%.1f%%", min_value=0, max_value=100),
+            "Supera (último)": st.column_config.ProgressColumn("Supera (último)", format="%.0f%%", min_value=0, max_value=100),
+            "Variação": st.column_config.NumberColumn("Variação", format="%+.0f"),
+        },
+    )
+
+    st.markdown("---")
+    st.subheader("🎯 Rendimento por Área")
+    somas_turma = df_simulados.groupby("area")[["acertos", "total"]].sum().reindex(ORDEM_AREAS)
+    r_turma = (somas_turma["acertos"] / somas_turma["total"] * 100).fillna(0).tolist()
+    exibir_grafico(_figura_radar_comparacao(por_area, r_turma, rotulos), use_container_width=True)
+
+    st.markdown("---")
+    st.subheader("🧭 Histórico de Posicionamento")
+    if trajetorias["percentis"].shape[1] < 2:
+        st.info("💡 O histórico aparece a partir de dois simulados completos.")
+        return
+    st.caption("*Supera: % da turma do mesmo simulado completo com Total Geral menor.*")
+    exibir_grafico(_figura_percentis_comparacao(trajetorias, ids, rotulos), use_container_width=True)
+
+def _render_filtro_anos(df_simulados: pd.DataFrame) -> str | None:
+    # Anos anteriores ficam no arquivo; o seletor só aparece quando há algum
+    arquivo, corte = obter_arquivo(), df_simulados.attrs.get("corte")
+    anteriores = [] if arquivo is None or corte is None else [a for a in arquivo.particoes("simulados") if a < corte]
+    if not anteriores:
+        return None
+    return st.sidebar.selectbox(
+        "Simulados desde", [corte] + anteriores[::-1], key="simu_desde",
+        format_func=lambda a: f"{a} (atual)" if a == corte else a,
+    )
+
 def exibir_modulo_simulados(df_alunos: pd.DataFrame, df_simulados: pd.DataFrame) -> None:
-    st.markdown(_CSS_MODULO, unsafe_allow_html=True)
+    aplicar_css(_CSS_MODULO)
     st.title("📚 Central de Simulados")
     st.subheader("*Simulados revelam padrões, estratégia corrige trajetórias*")
 
     st.sidebar.subheader("Configurações de Análise")
-    mapa_ids = {v: k for k, v in MAPA_MENTORIAS.items()}
-    ids_presentes = sorted(df_alunos["id_mentoria"].unique().tolist())
-    nomes_mentorias = [MAPA_MENTORIAS.get(i, f"Mentoria {i}") for i in ids_presentes]
-    mentoria_sel = st.sidebar.selectbox("Mentoria", ["Todas"] + nomes_mentorias)
+    registro = obter_registro(df_alunos)
+    id_mentoria = render_filtro_mentoria(registro)
+    id_aluno_focado, nome_sel = render_filtro_aluno(registro, id_mentoria, incluir_todos=True, key="simu_aluno")
+    ids_comparacao = render_filtro_comparacao(registro, id_mentoria, key="simu_comparar")
+    desde = _render_filtro_anos(df_simulados)
 
-    if mentoria_sel == "Todas": alunos_filtrados = df_alunos
-    else: alunos_filtrados = df_alunos[df_alunos["id_mentoria"] == mapa_ids[mentoria_sel]]
+    # Anos arquivados só entram quando escolhidos; com uma mentoria escolhida, a sessão só toca a partição dela
+    if desde is not None:
+        df_simulados = estender(df_simulados, desde)
+    df_simulados = particao(df_simulados, df_alunos, id_mentoria)
+    df_alunos = particao(df_alunos, df_alunos, id_mentoria)
 
-    lista_alunos = ["Todos"] + sorted(alunos_filtrados["nome"].unique().tolist())
-    nome_sel = st.sidebar.selectbox("Mentorado", lista_alunos, key="simu_aluno")
+    if len(ids_comparacao) >= 2:
+        _render_comparacao(df_simulados, registro, ids_comparacao)
+        return
+    if ids_comparacao:
+        st.info("👥 Escolha ao menos dois mentorados para comparar.")
     area_sel = st.sidebar.selectbox("Área", ["Todas"] + sorted(df_simulados["area"].unique().tolist()))
 
-    if nome_sel == "Todos":
-        df_base = df_simulados[df_simulados["id_aluno"].isin(alunos_filtrados["id_aluno"])].copy()
-        id_aluno_focado = None
-    else:
-        id_aluno_focado = df_alunos[df_alunos["nome"] == nome_sel]["id_aluno"].values[0]
-        df_base = df_simulados[df_simulados["id_aluno"] == id_aluno_focado].copy()
+    spec = FiltroSpec(id_mentoria=id_mentoria, id_aluno=id_aluno_focado)
+    df_base = filtrar(df_simulados, spec, df_alunos)
 
     simulados_validos, df_completos = _filtrar_simulados_completos(df_base)
-    df_base["rendimento_perc"] = (df_base["acertos"] / df_base["total"] * 100).fillna(0)
 
     # --- Lógica de Abas Dinâmicas ---
     titulos_abas = ["📈 Desempenho & Consistência", "🏆 Ranking & Posicionamento"]
-    if nome_sel == "Todos":
+    if id_aluno_focado is None:
         titulos_abas.append("🚫 Registro de Ausência")
     
-    abas = st.tabs(titulos_abas)
-
-    with abas[0]:
-        st.markdown("### 📊 Análise de Performance")
-        _render_cards_records(simulados_validos, df_completos)
-        st.markdown("---")
-        st.subheader(f"🎯 Leitura Analítica: {area_sel if area_sel != 'Todas' else 'Visão Global'}")
-        if area_sel == "Todas": _render_diagnostico_geral(df_base)
-        else: _render_diagnostico_area(df_base, area_sel)
-        st.markdown("---")
-        _render_historico_simulados(df_base, df_alunos, nome_sel)
-
-    with abas[1]:
-        if nome_sel == "Todos": _render_ranking_geral(df_simulados, df_alunos, df_base)
-        else: _render_ranking_individual(df_simulados, id_aluno_focado, nome_sel)
-
-    if nome_sel == "Todos":
-        with abas[2]:
-            _render_registro_ausencia(alunos_filtrados, df_simulados)
+    conteineres = abas(titulos_abas, "simu_aba")
+
+    if conteineres[0] is not None:
+        with conteineres[0]:
+            st.markdown("### 📊 Análise de Performance")
+            _render_cards_records(simulados_validos, df_completos)
+            st.markdown("---")
+            st.subheader(f"🎯 Leitura Analítica: {area_sel if area_sel != 'Todas' else 'Visão Global'}")
+            if area_sel == "Todas": _render_diagnostico_geral(df_base)
+            else: _render_diagnostico_area(df_base, area_sel)
+            st.markdown("---")
+            _render_historico_simulados(df_base, registro, id_aluno_focado)
+
+    if conteineres[1] is not None:
+        with conteineres[1]:
+            # None enquanto as notas da turma são calculadas no pool (a barra de progresso já está na aba)
+            tabela = _tabela_notas(df_simulados, "simu_notas")
+            if tabela is not None and id_aluno_focado is None:
+                _render_ranking_geral(df_simulados, tabela, registro, df_base)
+                _render_trajetoria_turma(df_simulados, tabela, registro)
+            elif tabela is not None: _render_ranking_individual(df_simulados, tabela, id_aluno_focado, nome_sel)
+
+    if id_aluno_focado is None and conteineres[2] is not None:
+        with conteineres[2]:
+            _render_registro_ausencia(registro, df_simulados, df_alunos, id_mentoria)
 
     st.markdown("---")
     col1, col_centro, col2 = st.columns([2, 1, 2])
-    with col_centro: st.image("logo.png", width=250)
+    with col_centro: st.image(LOGO, width=250)
     with col1: st.caption("*© 2026 • Central de Performance Acadêmica - Estude com Danilo*")
     with col2: st.markdown('<p style="text-align: right; color: grey; font-size: 0.8rem;">Desenvolvido por Thyago Ribeiro</p>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+
+class RegistroAlunos:
+    def __init__(self, df_alunos: pd.DataFrame):
+        ordenados = df_alunos.sort_values("nome", kind="stable")
+        ids = ordenados["id_aluno"].to_numpy()
+        nomes = ordenados["nome"].astype(str).to_numpy()
+
+        self.nome_por_id: dict = dict(zip(ids.tolist(), nomes.tolist()))
+        self.ids_por_nome: dict[str, list] = {}
+        for i, nome in zip(ids.tolist(), nomes.tolist()):
+            self.ids_por_nome.setdefault(nome, []).append(i)
+        self.repetidos = {n for n, lista in self.ids_por_nome.items() if len(lista) > 1}
+
+        # Ids já na ordem alfabética dos nomes, prontos para os selectbox
+        self.ids_ordenados = ids
+        self.ids_por_mentoria: dict = {
+            id_m: ids[ordenados["id_mentoria"].to_numpy() == id_m]
+            for id_m in sorted(ordenados["id_mentoria"].unique().tolist())
+        }
+
+        # Coluna categórica de nomes alinhada aos ids ordenados: junção por posição
+        ordem = np.argsort(ids, kind="stable")
+        self._ids_busca = ids[ordem]
+        self._nomes_busca = pd.Categorical(nomes[ordem])
+
+    def mentorias(self) -> list:
+        return list(self.ids_por_mentoria)
+
+    def ids(self, id_mentoria: int | None = None) -> np.ndarray:
+        if id_mentoria is None:
+            return self.ids_ordenados
+        return self.ids_por_mentoria.get(id_mentoria, self.ids_ordenados[:0])
+
+    def nome(self, id_aluno) -> str:
+        return self.nome_por_id.get(id_aluno, "")
+
+    def rotulo(self, id_aluno) -> str:
+        nome = self.nome(id_aluno)
+        return f"{nome} (#{id_aluno})" if nome in self.repetidos else nome
+
+    def posicoes(self, ids) -> tuple[np.ndarray, np.ndarray]:
+        ids = np.asarray(ids)
+        if not len(self._ids_busca):
+            return np.zeros(len(ids), dtype=np.intp), np.zeros(len(ids), dtype=bool)
+        pos = np.searchsorted(self._ids_busca, ids).clip(max=len(self._ids_busca) - 1)
+        return pos, self._ids_busca[pos] == ids
+
+    def nomes(self, ids) -> pd.Categorical:
+        pos, encontrados = self.posicoes(ids)
+        return self._nomes_busca.take(np.where(encontrados, pos, -1), allow_fill=True)
+
+    def juntar_nomes(self, df: pd.DataFrame, coluna: str = "nome") -> pd.DataFrame:
+        # Equivale a merge(df_alunos[["id_aluno", "nome"]], on="id_aluno") sem a junção
+        pos, encontrados = self.posicoes(df["id_aluno"].to_numpy())
+        df = df.loc[encontrados].copy()
+        df[coluna] = self._nomes_busca.take(pos[encontrados])
+        return df
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _registro_por_versao(versao: str, _df_alunos: pd.DataFrame) -> RegistroAlunos:
+    return RegistroAlunos(_df_alunos)
+
+
+def obter_registro(df_alunos: pd.DataFrame) -> RegistroAlunos:
+    return _registro_por_versao(df_alunos.attrs.get("versao", ""), df_alunos)
@@ -0,0 +1,260 @@
+import argparse
+import html
+import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+import modulo_individual
+import modulo_redacoes
+import modulo_simulados
+from consultas import MAPA_MENTORIAS, particao
+from registro import RegistroAlunos
+from utils import baixar_snapshot, carregar_snapshot
+
+_CSS_RELATORIO = """
+body { background:#111; color:#f0f0f0; font-family:sans-serif; max-width:1100px; margin:auto; padding:24px; }
+h1 { margin-bottom:0; } h2 { border-bottom:2px solid #c00000; padding-bottom:6px; margin-top:40px; }
+.sub { color:#888; margin-top:4px; }
+.metricas { display:flex; gap:12px; flex-wrap:wrap; }
+.metrica { background:#1e1e1e; border-left:3px solid #c00000; border-radius:10px; padding:12px 16px; min-width:150px; }
+.metrica small { color:#888; display:block; } .metrica b { font-size:1.4em; }
+.critico { color:#ff4b4b; } .atencao { color:#ffa500; }
+table { border-collapse:collapse; width:100%; } th, td { padding:6px 10px; border-bottom:1px solid #333; text-align:left; }
+@media print { body { background:#fff; color:#000; } .metrica { background:#f4f4f4; } }
+"""
+
+# Estado de cada processo do pool: os dados são carregados uma vez no initializer
+_dados: dict = {}
+
+
+def _slug(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-zA-Z0-9]+", "_", texto).strip("_").lower()
+
+
+def _preparar(pasta: str, mentoria: int | None = None) -> None:
+    df_alunos, df_atividades, df_simulados, df_redacoes = carregar_snapshot(pasta)
+    # Como no painel filtrado: médias da turma e ranking só com os alunos da mentoria do lote
+    df_turma = particao(df_atividades, df_alunos, mentoria)
+    df_turma = df_turma[df_turma["materia"].isin(modulo_individual.ORDEM_MATERIAS)]
+    _dados.update(
+        registro=RegistroAlunos(df_alunos),
+        atividades=df_atividades,
+        simulados=df_simulados,
+        redacoes=df_redacoes,
+        # Posições por aluno e médias da turma: calculadas uma vez por processo, não por relatório
+        pos_atividades=df_atividades.groupby("id_aluno").indices,
+        pos_redacoes=df_redacoes.groupby("id_aluno").indices,
+        radar_turma=modulo_individual._calcular_media_por_materia(df_turma).tolist(),
+        competencias_turma=particao(df_redacoes, df_alunos, mentoria)[modulo_redacoes._COMPETENCIAS].mean().tolist(),
+        notas_simulados=modulo_simulados._notas_parciais(particao(df_simulados, df_alunos, mentoria)),
+    )
+
+
+def _linhas_do_aluno(tabela: str, id_aluno: int) -> pd.DataFrame:
+    posicoes = _dados[f"pos_{tabela}"].get(id_aluno, np.empty(0, dtype=np.intp))
+    return _dados[tabela].iloc[posicoes]
+
+
+# --- Seções ---
+
+def _metricas(pares: list[tuple[str, str]]) -> str:
+    cartoes = "".join(
+        f'<div class="metrica"><small>{html.escape(r)}</small><b>{html.escape(v)}</b></div>' for r, v in pares
+    )
+    return f'<div class="metricas">{cartoes}</div>'
+
+
+def _secao_atividades(id_aluno: int, inicio: datetime, hoje: datetime, figura) -> str:
+    df_aluno = _linhas_do_aluno("atividades", id_aluno)
+    dados = df_aluno[
+        (df_aluno["data"] >= inicio) & (df_aluno["materia"].isin(modulo_individual.ORDEM_MATERIAS))
+    ]
+    partes = ["<h2>🚀 Atividades</h2>"]
+    if dados.empty:
+        return partes[0] + "<p>Nenhuma atividade registrada no período.</p>"
+
+    df_diario = modulo_individual._calcular_diario(dados)
+    volatilidade = df_diario["%"].std()
+    _, txt_tendencia, linha_tendencia = modulo_individual._calcular_tendencia(df_diario)
+    total_q, total_a = dados["total"].sum(), dados["acertos"].sum()
+    hiato = modulo_individual._calcular_hiato(df_aluno, hoje)
+    partes.append(_metricas([
+        ("Questões Resolvidas", f"{int(total_q)}"),
+        ("Taxa de Acerto", f"{total_a / total_q * 100 if total_q > 0 else 0:.1f}%"),
+        ("Consistência", f"{0 if np.isnan(volatilidade) else volatilidade:.1f}%"),
+        ("Tendência", txt_tendencia),
+        ("Streak", f"{modulo_individual._calcular_streak(df_aluno, hoje)} dias"),
+        ("Maior Hiato", f"{hiato[0]} ({hiato[1]} dias)" if hiato else "Sem dados"),
+    ]))
+
+    r_aluno = modulo_individual._calcular_media_por_materia(dados).tolist()
+    partes.append("<h3>📡 Radar por Disciplina</h3>")
+    partes.append(figura(modulo_individual._figura_radar(r_aluno, _dados["radar_turma"])))
+    partes.append("<h3>📌 Evolução de Desempenho</h3>")
+    partes.append(figura(modulo_individual._figura_evolucao_diaria(df_diario, linha_tendencia)))
+
+    gaps = modulo_individual._calcular_gaps(modulo_individual._calcular_conteudos(dados))
+    partes.append("<h3>⚠️ Conteúdos Críticos</h3>")
+    if gaps.empty:
+        partes.append("<p>Desempenho sólido em todos os conteúdos registrados!</p>")
+    else:
+        itens = "".join(
+            f'<li class="{"critico" if row["%"] < 50 else "atencao"}">'
+            f'{"CRÍTICO" if row["%"] < 50 else "ATENÇÃO"} | '
+            f'{html.escape(str(row["materia"]))} - {html.escape(str(row["conteudo"]))}: <b>{row["%"]:.1f}%</b></li>'
+            for _, row in gaps.iterrows()
+        )
+        partes.append(f"<ul>{itens}</ul>")
+    return "".join(partes)
+
+
+def _secao_simulados(id_aluno: int) -> str:
+    resumo = modulo_simulados._calcular_ranking_individual(_dados["notas_simulados"], id_aluno, "Completo")
+    if resumo.empty:
+        return "<h2>📚 Simulados</h2><p>Nenhum simulado completo registrado.</p>"
+    return "<h2>📚 Histórico de Posicionamento</h2>" + resumo.to_html(
+        index=False, border=0, float_format=lambda v: f"{v:.0f}%"
+    )
+
+
+def _secao_redacoes(id_aluno: int, figura) -> str:
+    df_red = _linhas_do_aluno("redacoes", id_aluno).sort_values("data")
+    if df_red.empty:
+        return "<h2>✍️ Redações</h2><p>Nenhuma redação registrada.</p>"
+    medias_aluno = df_red[modulo_redacoes._COMPETENCIAS].mean().tolist()
+    return "".join([
+        "<h2>✍️ Redações</h2>",
+        _metricas([
+            ("Mais Recente", f"{int(df_red['total'].iloc[-1])}"),
+            ("Maior Pontuação", f"{int(df_red['total'].max())}"),
+            ("Média", f"{df_red['total'].mean():.0f}"),
+            ("Registradas", f"{len(df_red)}"),
+        ]),
+        "<h3>📈 Curva de Performance</h3>",
+        figura(modulo_redacoes._figura_evolucao_individual(df_red)),
+        "<h3>🎯 Competências</h3>",
+        figura(modulo_redacoes._figura_radar_individual(medias_aluno, _dados["competencias_turma"])),
+    ])
+
+
+# --- Geração ---
+
+def _figura_html(fig: go.Figure) -> str:
+    return fig.to_html(full_html=False, include_plotlyjs=False, config={"displayModeBar": False})
+
+
+def _figura_svg(fig: go.Figure) -> str:
+    # Exportação estática para o PDF: requer o pacote opcional kaleido
+    fig.update_layout(template="plotly_white")
+    return fig.to_image(format="svg").decode("utf-8")
+
+
+def _gerar_relatorio(id_aluno: int, saida: str, formato: str, dias: int, script_plotly: str) -> str:
+    hoje = datetime.now()
+    inicio = pd.Timestamp((hoje - timedelta(days=dias)).date())
+    registro: RegistroAlunos = _dados["registro"]
+    nome = registro.nome(id_aluno)
+    figura = _figura_html if formato == "html" else _figura_svg
+
+    corpo = "".join([
+        f"<h1>{html.escape(nome)}</h1>",
+        f'<p class="sub">Relatório de {inicio:%d/%m/%Y} a {hoje:%d/%m/%Y} • gerado em {hoje:%d/%m/%Y %H:%M}</p>',
+        _secao_atividades(id_aluno, inicio, hoje, figura),
+        _secao_simulados(id_aluno),
+        _secao_redacoes(id_aluno, figura),
+    ])
+    documento = (
+        f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>{html.escape(nome)}</title>'
+        f"{script_plotly if formato == 'html' else ''}<style>{_CSS_RELATORIO}</style></head>"
+        f"<body>{corpo}</body></html>"
+    )
+
+    caminho = os.path.join(saida, f"{id_aluno:05d}_{_slug(nome)}.{formato}")
+    if formato == "html":
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(documento)
+    else:
+        from weasyprint import HTML
+        HTML(string=documento).write_pdf(caminho)
+    return caminho
+
+
+def _verificar_dependencias(formato: str) -> None:
+    if formato != "pdf":
+        return
+    faltando = []
+    for modulo in ("kaleido", "weasyprint"):
+        try:
+            __import__(modulo)
+        except ImportError:
+            faltando.append(modulo)
+    if faltando:
+        sys.exit(f"Exportação em PDF requer: pip install {' '.join(faltando)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera relatórios individuais de todos os alunos de uma mentoria.")
+    parser.add_argument("--snapshot", default=os.environ.get("MENTORIA_DADOS_LOCAIS"),
+                        help="Pasta do snapshot local (padrão: $MENTORIA_DADOS_LOCAIS).")
+    parser.add_argument("--atualizar-snapshot", action="store_true",
+                        help="Baixa a planilha para a pasta do snapshot antes de gerar (requer os secrets).")
+    parser.add_argument("--mentoria", type=int, help="id_mentoria; sem ele, todos os alunos.")
+    parser.add_argument("--saida", default="saida_relatorios")
+    parser.add_argument("--formato", choices=["html", "pdf"], default="html")
+    parser.add_argument("--dias", type=int, default=7, help="Janela das atividades (padrão: 7 dias).")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    parser.add_argument("--plotlyjs", choices=["arquivo", "inline", "cdn"], default="arquivo",
+                        help="arquivo: um plotly.min.js compartilhado na pasta de saída (funciona offline).")
+    args = parser.parse_args(argv)
+
+    if not args.snapshot:
+        parser.error("informe --snapshot ou defina MENTORIA_DADOS_LOCAIS")
+    _verificar_dependencias(args.formato)
+    if args.atualizar_snapshot:
+        baixar_snapshot(args.snapshot)
+
+    _preparar(args.snapshot, args.mentoria)
+    ids = _dados["registro"].ids(args.mentoria).tolist()
+    if not ids:
+        sys.exit("Nenhum aluno encontrado para a mentoria informada.")
+
+    os.makedirs(args.saida, exist_ok=True)
+    script_plotly = ""
+    if args.formato == "html":
+        if args.plotlyjs == "arquivo":
+            with open(os.path.join(args.saida, "plotly.min.js"), "w", encoding="utf-8") as f:
+                f.write(get_plotlyjs())
+            script_plotly = '<script src="plotly.min.js"></script>'
+        elif args.plotlyjs == "inline":
+            script_plotly = f"<script>{get_plotlyjs()}</script>"
+        else:
+            # plotly-latest.min.js parou na 1.x: a versão tem de ser a mesma das figuras geradas aqui
+            script_plotly = f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+
+    mentoria = MAPA_MENTORIAS.get(args.mentoria, "Todas") if args.mentoria else "Todas"
+    print(f"{len(ids)} relatórios ({mentoria}) com {args.processos} processos...", flush=True)
+    inicio = datetime.now()
+    with ProcessPoolExecutor(
+        max_workers=args.processos, initializer=_preparar, initargs=(args.snapshot, args.mentoria)
+    ) as pool:
+        lote = max(1, len(ids) // (args.processos * 4))
+        gerados = list(pool.map(
+            _gerar_relatorio, ids,
+            *[[valor] * len(ids) for valor in (args.saida, args.formato, args.dias, script_plotly)],
+            chunksize=lote,
+        ))
+    print(f"{len(gerados)} arquivos em {args.saida} ({(datetime.now() - inicio).total_seconds():.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
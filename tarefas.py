@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+# Cálculos pesados da turma fora da thread do script, num pool de processos (pandas segura a GIL).
+# Cada tarefa tem uma chave (nome, versão dos dados do recorte) e é dividida em partes independentes;
+# sessões que pedem a mesma chave acompanham a mesma tarefa. Sem a variável, nada muda: os painéis
+# calculam na própria thread, como antes.
+PROCESSOS_ENV = "MENTORIA_PROCESSOS"
+_ESPERA = 0.3  # tarefas curtas terminam dentro do próprio rerun, sem barra de progresso
+_INTERVALO = 0.5
+_MAX_PRONTAS = 16
+
+
+class Tarefa:
+    def __init__(self, chave: tuple, futuros: list, combinar, executor: ProcessPoolExecutor):
+        self.chave = chave
+        self.executor = executor
+        self._futuros = futuros
+        self._combinar = combinar
+        self._trava = threading.Lock()
+        self._resultado = None
+        self._pronta = False
+        self.interessados: set[str] = set()
+
+    @property
+    def progresso(self) -> float:
+        return sum(f.done() for f in self._futuros) / len(self._futuros)
+
+    def concluida(self) -> bool:
+        return all(f.done() for f in self._futuros)
+
+    def esperar(self, segundos: float) -> bool:
+        wait(self._futuros, timeout=segundos)
+        return self.concluida()
+
+    def resultado(self):
+        # As partes são juntadas uma vez, por quem pedir primeiro; as demais sessões reaproveitam
+        with self._trava:
+            if not self._pronta:
+                self._resultado = self._combinar([f.result() for f in self._futuros])
+                self._pronta = True
+            return self._resultado
+
+    def cancelar(self) -> None:
+        # Partes ainda na fila não rodam; a que já está num processo termina e é descartada
+        for futuro in self._futuros:
+            futuro.cancel()
+
+
+class PoolTarefas:
+    def __init__(self, processos: int):
+        self.processos = processos
+        self._trava = threading.Lock()
+        self._executor = self._novo_executor()
+        self._tarefas: OrderedDict[tuple, Tarefa] = OrderedDict()
+
+    def _novo_executor(self) -> ProcessPoolExecutor:
+        # spawn: o servidor tem várias threads, e um fork copiaria travas em uso
+        return ProcessPoolExecutor(self.processos, mp_context=multiprocessing.get_context("spawn"))
+
+    def tarefa(self, chave: tuple) -> Tarefa | None:
+        with self._trava:
+            return self._tarefas.get(chave)
+
+    def submeter(self, chave: tuple, funcao, dividir, combinar, interessado: str) -> Tarefa:
+        # Pedidos repetidos (da mesma sessão ou de outras) juntam-se à tarefa existente
+        tarefa = self.tarefa(chave)
+        partes = dividir(self.processos * 2) if tarefa is None else None
+        with self._trava:
+            tarefa = self._tarefas.get(chave)
+            if tarefa is None:
+                if partes is None:
+                    # A tarefa encontrada foi liberada antes da trava: a divisão fica para agora
+                    partes = dividir(self.processos * 2)
+                tarefa = Tarefa(chave, self._enviar(funcao, partes), combinar, self._executor)
+                self._tarefas[chave] = tarefa
+                self._podar()
+            self._tarefas.move_to_end(chave)
+            tarefa.interessados.add(interessado)
+            return tarefa
+
+    def _enviar(self, funcao, partes: list) -> list:
+        try:
+            return [self._executor.submit(funcao, p) for p in partes]
+        except BrokenProcessPool:
+            # Um processo morreu (memória, sinal): o pool é refeito e a tarefa vai inteira para o novo
+            self._executor = self._novo_executor()
+            return [self._executor.submit(funcao, p) for p in partes]
+
+    def liberar(self, chave: tuple, interessado: str) -> None:
+        # Sem ninguém acompanhando, a tarefa inacabada é cancelada e sai do registro
+        with self._trava:
+            tarefa = self._tarefas.get(chave)
+            if tarefa is None:
+                return
+            tarefa.interessados.discard(interessado)
+            if not tarefa.interessados and not tarefa.concluida():
+                tarefa.cancelar()
+                del self._tarefas[chave]
+
+    def refazer(self, tarefa: Tarefa) -> None:
+        # Processo morto no meio da tarefa: todas as partes daquele pool falham. A primeira sessão que
+        # perceber refaz o pool; a tarefa sai do registro para ser submetida de novo
+        with self._trava:
+            if self._executor is tarefa.executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._novo_executor()
+            if self._tarefas.get(tarefa.chave) is tarefa:
+                del self._tarefas[tarefa.chave]
+
+    def descartar(self, chave: tuple) -> None:
+        with self._trava:
+            self._tarefas.pop(chave, None)
+
+    def _podar(self) -> None:
+        prontas = [c for c, t in self._tarefas.items() if t.concluida()]
+        for chave in prontas[:max(len(prontas) - _MAX_PRONTAS, 0)]:
+            del self._tarefas[chave]
+
+
+@st.cache_resource(show_spinner=False)
+def obter_pool() -> PoolTarefas | None:
+    processos = int(os.environ.get(PROCESSOS_ENV) or 0)
+    return PoolTarefas(processos) if processos > 0 else None
+
+
+# --- Acompanhamento na sessão ---
+
+def _interessado(slot: str) -> str:
+    sessao = st.session_state.setdefault("_tarefas_sessao", uuid.uuid4().hex)
+    return f"{sessao}:{slot}"
+
+
+def _cancelar(pool: PoolTarefas, slot: str, chave: tuple) -> None:
+    pool.liberar(chave, _interessado(slot))
+    st.session_state[f"_tarefa_{slot}_cancelada"] = chave
+
+
+def _retomar(slot: str) -> None:
+    st.session_state.pop(f"_tarefa_{slot}_cancelada", None)
+
+
+@st.fragment(run_every=_INTERVALO)
+def _progresso(pool: PoolTarefas, chave: tuple, rotulo: str) -> None:
+    # Só este trecho roda a cada intervalo; ao terminar, o rerun completo desenha o resultado
+    tarefa = pool.tarefa(chave)
+    if tarefa is None or tarefa.concluida():
+        st.rerun()
+    st.progress(tarefa.progresso, text=f"⏳ {rotulo}: calculando… {tarefa.progresso:.0%}")
+
+
+def acompanhar(pool: PoolTarefas, chave: tuple, funcao, dividir, combinar, rotulo: str, slot: str):
+    # Resultado da tarefa ou None enquanto ela roda (com progresso e botão de cancelar na tela).
+    # `slot` é a seção do painel: quando um filtro muda a chave, a tarefa anterior é liberada.
+    interessado = _interessado(slot)
+    anterior = st.session_state.get(f"_tarefa_{slot}")
+    if anterior is not None and anterior != chave:
+        pool.liberar(anterior, interessado)
+    st.session_state[f"_tarefa_{slot}"] = chave
+
+    if st.session_state.get(f"_tarefa_{slot}_cancelada") == chave:
+        st.info(f"⏹️ {rotulo}: cálculo cancelado.")
+        st.button("🔄 Calcular novamente", key=f"{slot}_retomar", on_click=_retomar, args=(slot,))
+        return None
+
+    tarefa = pool.submeter(chave, funcao, dividir, combinar, interessado)
+    if tarefa.esperar(_ESPERA):
+        try:
+            return tarefa.resultado()
+        except BrokenProcessPool:
+            # Um processo morreu (memória, sinal) no meio da tarefa: pool novo e a tarefa roda outra vez
+            pool.refazer(tarefa)
+            tarefa = pool.submeter(chave, funcao, dividir, combinar, interessado)
+        except Exception:
+            # Parte com erro: a próxima tentativa recomeça do zero em vez de repetir a falha guardada
+            pool.descartar(chave)
+            raise
+    _progresso(pool, chave, rotulo)
+    st.button("⏹️ Cancelar", key=f"{slot}_cancelar", on_click=_cancelar, args=(pool, slot, chave))
+    return None
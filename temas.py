@@ -0,0 +1,100 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from agregados import COMPETENCIAS
+from consultas import versao_dados
+from instrumentacao import medir
+
+SEM_TEMA = "Não informado"
+_STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo pelos "
+    "por que se sem sob sobre sua suas seu seus um uma umas uns".split()
+)
+
+
+def normalizar_texto(texto: str) -> str:
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", sem_acento.lower()).strip()
+
+
+def termos(texto: str) -> list[str]:
+    return [t for t in normalizar_texto(texto).split() if len(t) > 1 and t not in _STOPWORDS]
+
+
+class IndiceTemas:
+    # Índice invertido termo → temas → linhas. Só os temas distintos (poucos perto das redações)
+    # passam pelo tokenizador; as linhas de cada tema ficam contíguas, como em MatrizDominio.
+    # Grafias que normalizam igual ("Mobilidade urbana." / "mobilidade urbana") viram um só tema.
+    def __init__(self, df_redacoes: pd.DataFrame):
+        cod_original, originais = pd.factorize(df_redacoes["tema"].to_numpy())
+        cod_normalizado, normalizados = pd.factorize(pd.Series(originais).map(normalizar_texto).to_numpy())
+        self._cod_linha = cod_normalizado[cod_original] if len(originais) else np.empty(0, dtype=np.intp)
+        # Rótulo de cada tema: a grafia mais frequente entre as que normalizam igual
+        frequencia = np.bincount(cod_original, minlength=len(originais))
+        ordem = np.argsort(-frequencia, kind="stable")
+        self.rotulos = pd.Series(originais[ordem]).groupby(cod_normalizado[ordem]).first().to_numpy()
+
+        self._linhas = np.argsort(self._cod_linha, kind="stable")
+        self._inicio = np.concatenate([[0], np.cumsum(np.bincount(self._cod_linha, minlength=len(normalizados)))])
+
+        indice: dict[str, list[int]] = {}
+        for cod, original in enumerate(self.rotulos):
+            if original == SEM_TEMA:
+                continue
+            for termo in set(termos(original)):
+                indice.setdefault(termo, []).append(cod)
+        self._termos = np.array(sorted(indice), dtype=str)
+        self._temas_por_termo = [np.array(indice[t], dtype=np.intp) for t in self._termos]
+
+        grupos = df_redacoes.groupby(self._cod_linha)
+        self._resumo = grupos[COMPETENCIAS + ["total"]].mean()
+        self._resumo.insert(0, "alunos", grupos["id_aluno"].nunique())
+        self._resumo.insert(0, "redacoes", grupos.size())
+        self._resumo.insert(0, "tema", self.rotulos[self._resumo.index])
+
+    def __len__(self) -> int:
+        return len(self.rotulos)
+
+    def buscar(self, consulta: str) -> np.ndarray:
+        # Cada palavra da consulta casa por prefixo ("intoler" → intolerância); os temas precisam
+        # conter todas as palavras. Consulta vazia devolve todos os temas.
+        resultado = None
+        for palavra in termos(consulta):
+            ini = np.searchsorted(self._termos, palavra, side="left")
+            fim = np.searchsorted(self._termos, palavra + "\uffff", side="left")
+            casados = (
+                np.unique(np.concatenate(self._temas_por_termo[ini:fim]))
+                if fim > ini else np.empty(0, dtype=np.intp)
+            )
+            resultado = casados if resultado is None else np.intersect1d(resultado, casados)
+        return np.arange(len(self)) if resultado is None else resultado
+
+    def linhas(self, temas: np.ndarray) -> np.ndarray:
+        partes = [self._linhas[self._inicio[t]:self._inicio[t + 1]] for t in temas]
+        return np.concatenate(partes) if partes else np.empty(0, dtype=self._linhas.dtype)
+
+    def codigos(self, linhas) -> np.ndarray:
+        # Posições no frame indexado; após a carga (e nas partições) o índice é um RangeIndex,
+        # então os rótulos de um recorte do frame servem como posições
+        return self._cod_linha[np.asarray(linhas)]
+
+    def resumo(self, temas: np.ndarray) -> pd.DataFrame:
+        return self._resumo.loc[temas]
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _indice(versao: str, _df: pd.DataFrame) -> IndiceTemas:
+    return _montar_indice(_df)
+
+
+@medir
+def _montar_indice(df_redacoes: pd.DataFrame) -> IndiceTemas:
+    return IndiceTemas(df_redacoes)
+
+
+def obter_indice(df_redacoes: pd.DataFrame) -> IndiceTemas:
+    return _indice(versao_dados(df_redacoes), df_redacoes)
@@ -1,9 +1,18 @@
+import os
 import streamlit as st
 import pandas as pd
+import numpy as np
+from datetime import datetime
+from instrumentacao import medir, usuario_admin
+from arquivo import obter_arquivo
 import gspread
 from google.oauth2.service_account import Credentials
 
 _SHEET_ID = "1fh9e5mSvMYKbs1BcuknM5Cuhj8Bbqn-r_enPUt1e5_g"
+# Pasta com um snapshot local (um .pkl por aba); substitui a planilha em testes de carga e relatórios
+_DADOS_LOCAIS_ENV = "MENTORIA_DADOS_LOCAIS"
+COLUNA_LANCAMENTO = "id_lancamento"  # preenchida nas linhas gravadas pelo app (ver lancamentos.py)
+_ABAS = {"alunos": "Alunos", "atividades": "Atividades", "simulados": "Simulados", "redacoes": "Redações"}
 _SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive",
@@ -17,9 +26,41 @@ def _conectar() -> gspread.Client:
     return gspread.authorize(creds)
 
 
+def origem_local() -> str | None:
+    return os.environ.get(_DADOS_LOCAIS_ENV)
+
+
+def abrir_aba(tabela: str) -> gspread.Worksheet:
+    return _conectar().open_by_key(_SHEET_ID).worksheet(_ABAS[tabela])
+
+
+def _ler_planilha() -> dict[str, pd.DataFrame]:
+    client = _conectar()
+    sh = client.open_by_key(_SHEET_ID)
+    return {
+        tabela: pd.DataFrame(sh.worksheet(aba).get_all_records())
+        for tabela, aba in _ABAS.items()
+    }
+
+
+def _ler_snapshot(pasta: str) -> dict[str, pd.DataFrame]:
+    return {tabela: pd.read_pickle(os.path.join(pasta, f"{tabela}.pkl")) for tabela in _ABAS}
+
+
+def salvar_snapshot(
+    pasta: str, df_alunos: pd.DataFrame, df_atividades: pd.DataFrame,
+    df_simulados: pd.DataFrame, df_redacoes: pd.DataFrame,
+) -> None:
+    os.makedirs(pasta, exist_ok=True)
+    for tabela, df in zip(_ABAS, [df_alunos, df_atividades, df_simulados, df_redacoes]):
+        df.to_pickle(os.path.join(pasta, f"{tabela}.pkl"))
+
+
 def _padronizar_data(df: pd.DataFrame) -> pd.DataFrame:
     if "data" in df.columns:
         df["data"] = pd.to_datetime(df["data"], errors="coerce").dt.tz_localize(None)
+        # Dia como inteiro (dias desde 1970): base dos recortes de período em consultas.py
+        df["dia"] = df["data"].values.astype("datetime64[D]").astype(np.int64)
     return df
 
 
@@ -28,26 +69,209 @@ def _to_numeric(df: pd.DataFrame, colunas: list[str]) -> pd.DataFrame:
         df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
     return df
 
-@st.cache_data(ttl=600)
+def versionar_tabelas(
+    df_alunos: pd.DataFrame, df_atividades: pd.DataFrame,
+    df_simulados: pd.DataFrame, df_redacoes: pd.DataFrame,
+) -> None:
+    # Versão da carga: chave dos índices e agregados em cache (ver consultas.py)
+    versao = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    for tabela, df in [
+        ("alunos", df_alunos), ("atividades", df_atividades),
+        ("simulados", df_simulados), ("redacoes", df_redacoes),
+    ]:
+        df.attrs.update(versao=versao, tabela=tabela)
+
+
+# --- Normalização (uma vez por carga) ---
+
+_TEXTOS = {
+    "alunos": ["nome"],
+    "atividades": ["materia", "conteudo"],
+    "simulados": ["tipo", "area"],
+    "redacoes": ["tema"],
+}
+_COMPETENCIAS = ["c1", "c2", "c3", "c4", "c5"]
+# acertos → faixa de nota estimada por área (TRI aproximada); substitua pela tabela de referência atualizada
+_TABELA_ENEM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tabelas_enem.csv")
+
+
+class _Relatorio:
+    # Linhas descartadas ou suspeitas, com o número da linha na planilha (cabeçalho = linha 1)
+    def __init__(self):
+        self._partes: list[pd.DataFrame] = []
+
+    def anotar(self, tabela: str, df: pd.DataFrame, mascara, motivo: str, descartada: bool = False) -> None:
+        mascara = np.asarray(mascara, dtype=bool)
+        if mascara.any():
+            self._partes.append(pd.DataFrame({
+                "tabela": tabela,
+                "linha": df.index[mascara] + 2,
+                "id_aluno": df["id_aluno"].to_numpy()[mascara] if "id_aluno" in df else pd.NA,
+                "motivo": motivo,
+                "descartada": descartada,
+            }))
+
+    def tabela(self) -> pd.DataFrame:
+        if not self._partes:
+            return pd.DataFrame(columns=["tabela", "linha", "id_aluno", "motivo", "descartada"])
+        return pd.concat(self._partes, ignore_index=True)
+
+
+def _limpar_textos(df: pd.DataFrame, colunas: list[str]) -> pd.DataFrame:
+    for col in colunas:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str).str.strip()
+    return df
+
+
+def _validar_ids(tabela: str, df: pd.DataFrame, relatorio: _Relatorio, ids_validos=None) -> pd.DataFrame:
+    ids = pd.to_numeric(df["id_aluno"], errors="coerce")
+    sem_id = ids.isna().to_numpy()
+    relatorio.anotar(tabela, df, sem_id, "id_aluno vazio ou inválido", descartada=True)
+    df = df[~sem_id].copy()
+    df["id_aluno"] = ids[~sem_id].astype(np.int64)
+    if ids_validos is not None:
+        relatorio.anotar(tabela, df, ~df["id_aluno"].isin(ids_validos), "aluno não cadastrado")
+    return df
+
+
+def _estimar_notas(df_simulados: pd.DataFrame) -> pd.DataFrame:
+    # Tabela vira uma matriz área × acertos; a estimativa de todas as linhas sai de uma indexação
+    tabela = pd.read_csv(_TABELA_ENEM) if os.path.exists(_TABELA_ENEM) else pd.DataFrame(
+        columns=["area", "acertos", "nota_min", "nota_max"]
+    )
+    areas = pd.Index(tabela["area"].unique())
+    max_acertos = int(tabela["acertos"].max()) if len(tabela) else 0
+    grade = {
+        col: tabela.pivot(index="area", columns="acertos", values=col)
+        .reindex(index=areas, columns=range(max_acertos + 1)).to_numpy(dtype=float)
+        for col in ["nota_min", "nota_max"]
+    }
+    cod_area = areas.get_indexer(df_simulados["area"])
+    acertos = df_simulados["acertos"].to_numpy().round().clip(0, max_acertos).astype(np.int64)
+    valido = cod_area >= 0
+    for col, valores in grade.items():
+        estimado = np.full(len(df_simulados), np.nan)
+        estimado[valido] = valores[cod_area[valido], acertos[valido]]
+        df_simulados[col] = estimado
+    df_simulados["nota_est"] = (df_simulados["nota_min"] + df_simulados["nota_max"]) / 2
+    return df_simulados
+
+
+def _normalizar_registros(
+    tabela: str, df: pd.DataFrame, relatorio: _Relatorio, ids_validos
+) -> pd.DataFrame:
+    df = _validar_ids(tabela, df, relatorio, ids_validos)
+    df = _limpar_textos(_padronizar_data(df), _TEXTOS[tabela])
+    relatorio.anotar(tabela, df, df["data"].isna(), "data vazia ou inválida")
+
+    if tabela in ("atividades", "simulados"):
+        df = _to_numeric(df, ["acertos", "total"])
+        relatorio.anotar(tabela, df, df["acertos"] > df["total"], "acertos maior que o total")
+        relatorio.anotar(tabela, df, df["total"] <= 0, "total de questões zerado")
+        df["%"] = (df["acertos"] / df["total"] * 100).replace([np.inf, -np.inf], np.nan).fillna(0)
+
+    if tabela == "simulados":
+        df["rendimento_perc"] = df.pop("%")
+        df = _estimar_notas(df)
+        relatorio.anotar("simulados", df, df["nota_est"].isna(), "área sem tabela de nota estimada")
+
+    if tabela == "redacoes":
+        df = _to_numeric(df, _COMPETENCIAS + ["total"])
+        fora_da_escala = ((df[_COMPETENCIAS] < 0) | (df[_COMPETENCIAS] > 200)).any(axis=1)
+        relatorio.anotar("redacoes", df, fora_da_escala, "competência fora de 0–200")
+        relatorio.anotar(
+            "redacoes", df, df[_COMPETENCIAS].sum(axis=1) != df["total"],
+            "total diferente da soma das competências",
+        )
+        df["tema"] = df["tema"].replace("", "Não informado")
+    return df
+
+
+def normalizar(
+    brutos: dict[str, pd.DataFrame]
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Todas as conversões acontecem aqui; os painéis recebem colunas prontas e não convertem nada por rerun
+    relatorio = _Relatorio()
+    df_alunos = _limpar_textos(_validar_ids("alunos", brutos["alunos"], relatorio), _TEXTOS["alunos"])
+    relatorio.anotar("alunos", df_alunos, df_alunos["id_aluno"].duplicated(), "id_aluno repetido")
+    ids_validos = df_alunos["id_aluno"].to_numpy()
+
+    df_atividades, df_simulados, df_redacoes = (
+        _normalizar_registros(tabela, brutos[tabela], relatorio, ids_validos)
+        for tabela in ["atividades", "simulados", "redacoes"]
+    )
+    # Redações já ficam em ordem cronológica: todo recorte posicional sai ordenado
+    df_redacoes = df_redacoes.sort_values("data", kind="stable")
+
+    for df in [df_alunos, df_atividades, df_simulados, df_redacoes]:
+        df.reset_index(drop=True, inplace=True)
+    versionar_tabelas(df_alunos, df_atividades, df_simulados, df_redacoes)
+
+    return df_alunos, df_atividades, df_simulados, df_redacoes, relatorio.tabela()
+
+
+def normalizar_registros(tabela: str, brutos: pd.DataFrame, ids_validos) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Mesmas conversões da carga para poucas linhas (lançamentos feitos no app); devolve também os alertas
+    relatorio = _Relatorio()
+    df = _normalizar_registros(tabela, brutos, relatorio, ids_validos)
+    return df, relatorio.tabela()
+
+
+def carregar_snapshot(pasta: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    return normalizar(_ler_snapshot(pasta))[:4]
+
+
+def baixar_snapshot(pasta: str) -> None:
+    os.makedirs(pasta, exist_ok=True)
+    for tabela, df in _ler_planilha().items():
+        df.to_pickle(os.path.join(pasta, f"{tabela}.pkl"))
+
+
+def _lancamentos_lidos(dados: tuple) -> frozenset[str]:
+    ids: set[str] = set()
+    for df in dados[1:4]:
+        if COLUNA_LANCAMENTO in df:
+            ids.update(df[COLUNA_LANCAMENTO].dropna().astype(str).unique())
+    ids.discard("")
+    return frozenset(ids)
+
+
+# cache_resource: todas as sessões compartilham os mesmos frames (nenhum painel os altera),
+# em vez de cada rerun receber uma cópia desserializada da base inteira
+@st.cache_resource(ttl=600)
+def _carregar() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, frozenset[str]]:
+    pasta_local = origem_local()
+    dados = normalizar(_ler_snapshot(pasta_local) if pasta_local else _ler_planilha())
+    # Lançamentos do app que esta carga já trouxe; contados antes do arquivo, que tira linhas da memória
+    lidos = _lancamentos_lidos(dados)
+    # Com o arquivo ligado, só os períodos recentes seguem em memória (ver arquivo.py)
+    arquivo = obter_arquivo()
+    return (*(arquivo.separar(*dados) if arquivo is not None else dados), lidos)
+
+
+@medir
 def carregar_dados() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    client = _conectar()
-    sh = client.open_by_key(_SHEET_ID)
+    # Lançamentos feitos no app entram por cima da carga, sem baixar a planilha de novo
+    from lancamentos import com_lancamentos  # lancamentos importa utils
+    dados = _carregar()
+    return com_lancamentos(dados[:4], dados[5])
 
-    df_alunos = pd.DataFrame(sh.worksheet("Alunos").get_all_records())
 
-    df_atividades = pd.DataFrame(sh.worksheet("Atividades").get_all_records())
-    df_atividades = _padronizar_data(df_atividades)
-    df_atividades = _to_numeric(df_atividades, ["acertos", "total"])
-    df_atividades["%"] = (df_atividades["acertos"] / df_atividades["total"] * 100).fillna(0)
+def relatorio_normalizacao() -> pd.DataFrame:
+    return _carregar()[4]
 
-    df_simulados = pd.DataFrame(sh.worksheet("Simulados").get_all_records())
-    df_simulados = _padronizar_data(df_simulados)
-    df_simulados = _to_numeric(df_simulados, ["acertos", "total"])
 
-    df_redacoes = pd.DataFrame(sh.worksheet("Redações").get_all_records())
-    df_redacoes = _padronizar_data(df_redacoes)
+carregar_dados.clear = _carregar.clear
 
-    colunas_red = ["c1", "c2", "c3", "c4", "c5", "total"]
-    df_redacoes = _to_numeric(df_redacoes, colunas_red)
 
-    return df_alunos, df_atividades, df_simulados, df_redacoes
\ No newline at end of file
+def render_qualidade_dados() -> None:
+    if not usuario_admin():
+        return
+    relatorio = relatorio_normalizacao()
+    with st.sidebar.expander(f"🧹 Qualidade dos Dados ({len(relatorio)})"):
+        if relatorio.empty:
+            st.caption("Nenhuma linha descartada ou suspeita na última carga.")
+            return
+        st.caption(f"{int(relatorio['descartada'].sum())} linhas descartadas • {int((~relatorio['descartada']).sum())} mantidas com alerta")
+        st.dataframe(relatorio, hide_index=True, width="stretch")